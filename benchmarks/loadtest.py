@@ -0,0 +1,182 @@
+"""
+Terheléses teszt a lokális stand-in szerverek ellen (valódi CoinGeckoService, LLMEngine és pipeline kód).
+Használat:
+    python -m benchmarks.loadtest --coins 200 --rounds 5 --audits 20 --concurrency 4 --rate-429 0.05
+"""
+import asyncio
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import ollama
+import typer
+from loguru import logger
+from rich.console import Console
+from rich.table import Table
+
+from config.settings import settings
+from src.core.llm_engine import LLMEngine
+from src.core.pipeline import AnalysisPipeline
+from src.core.rag_engine import RAGEngine
+from src.core.risk_engine import RiskEngine
+from src.services.coingecko import CoinGeckoService
+from src.services.web_search import WebSearchService
+from src.utils.rate_limiter import AsyncRateLimiter
+from src.utils.telemetry import tracer
+from benchmarks.fakes import fixture_search_backend, load_fixture
+from benchmarks.standin import CoinGeckoStandIn, FaultConfig, OllamaStandIn, start_site
+
+app = typer.Typer()
+console = Console()
+
+
+def latency_stats(samples: List[float], wall_s: float) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0, "p50_ms": 0.0, "p99_ms": 0.0, "throughput_per_s": 0.0}
+    arr = np.asarray(samples) * 1000
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(np.percentile(arr, 50)), 1),
+        "p99_ms": round(float(np.percentile(arr, 99)), 1),
+        "throughput_per_s": round(len(samples) / wall_s, 2) if wall_s > 0 else 0.0,
+    }
+
+
+def _counter_sum(name: str, endpoints=("coin", "history", "markets")) -> float:
+    return sum(tracer.counter(name, service="coingecko", endpoint=e) for e in endpoints)
+
+
+async def run_load_test(coins: int, rounds: int, audits: int, concurrency: int, faults: FaultConfig,
+                        llm_faults: FaultConfig, calls_per_minute: float, backoff: float,
+                        render_pdf: bool = False, tier: str = "full") -> Dict[str, Any]:
+    cg_standin, ollama_standin = CoinGeckoStandIn(faults), OllamaStandIn(llm_faults)
+    cg_runner, cg_url = await start_site(cg_standin.build_app())
+    ollama_runner, ollama_url = await start_site(ollama_standin.build_app())
+
+    # Ismert (fixture) coinok + szintetikus id-k a kért méretig
+    coin_ids = list(load_fixture("coins.json"))
+    coin_ids += [f"loadcoin-{i}" for i in range(max(0, coins - len(coin_ids)))]
+    coin_ids = coin_ids[:coins]
+
+    cg_service = CoinGeckoService(base_url=f"{cg_url}/api/v3")
+    # Példány szintű keret: a teszt nem fogyasztja a folyamat közös (éles) keretét
+    cg_service.rate_limiter = AsyncRateLimiter(calls_per_minute / 60, burst=settings.COINGECKO_BURST)
+    llm = LLMEngine()
+    llm.client = ollama.AsyncClient(host=ollama_url)
+    pipeline = AnalysisPipeline(cg_service, WebSearchService(backend=fixture_search_backend), llm,
+                                RAGEngine(), RiskEngine())
+
+    # Cache nélkül minden kör valódi API forgalom; a 429 utáni várakozás skálázható
+    overrides = {"COINGECKO_CACHE_TTL": 0.0, "COINGECKO_RETRY_BACKOFF": backoff}
+    originals = {key: getattr(settings, key) for key in overrides}
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    tracer.reset()
+
+    try:
+        # 1. Dashboard körök (egyedi coin lekérések, mint a dashboard parancs)
+        dashboard_samples = []
+        started = time.perf_counter()
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            await pipeline.market_overview(coin_ids, concurrency=concurrency)
+            dashboard_samples.append(time.perf_counter() - t0)
+        dashboard_wall = time.perf_counter() - started
+
+        # 2. Kötegelt auditok, legfeljebb `concurrency` párhuzamosan
+        sem = asyncio.Semaphore(concurrency)
+        audit_samples, outcomes = [], {"ok": 0, "degraded": 0, "failed": 0}
+        tiers: Dict[str, int] = {}
+
+        async def one_audit(token: str):
+            async with sem:
+                t0 = time.perf_counter()
+                result = await pipeline.audit(token, render_pdf=render_pdf, tier=tier)
+                audit_samples.append(time.perf_counter() - t0)
+                result_tier = (result.get("tier") or {}).get("tier")
+                if result_tier:
+                    tiers[result_tier] = tiers.get(result_tier, 0) + 1
+                if result.get("error"):
+                    outcomes["failed"] += 1
+                elif result.get("degraded"):
+                    outcomes["degraded"] += 1
+                else:
+                    outcomes["ok"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one_audit(coin_ids[i % len(coin_ids)]) for i in range(audits)])
+        audit_wall = time.perf_counter() - started
+
+        api_samples = [s.duration_s for s in tracer.spans() if s.name.startswith("coingecko.")]
+        return {
+            "dashboard": latency_stats(dashboard_samples, dashboard_wall),
+            "dashboard_coins_per_s": round(rounds * len(coin_ids) / dashboard_wall, 1) if dashboard_wall else 0.0,
+            "audit": latency_stats(audit_samples, audit_wall),
+            "audit_outcomes": outcomes,
+            "audit_tiers": tiers,
+            "api_calls": latency_stats(api_samples, dashboard_wall + audit_wall),
+            "client_429": _counter_sum("http_429_total"),
+            "wasted_retries": _counter_sum("retries_total", ("coin", "markets")),
+            "retry_wait_s": round(_counter_sum("retry_wait_seconds_total"), 2),
+            "client_errors": _counter_sum("errors_total"),
+            "server_coingecko": dict(cg_standin.stats),
+            "server_ollama": dict(ollama_standin.stats),
+        }
+    finally:
+        for key, value in originals.items():
+            setattr(settings, key, value)
+        await pipeline.close()
+        await cg_runner.cleanup()
+        await ollama_runner.cleanup()
+
+
+def print_report(report: Dict[str, Any]):
+    table = Table(title="🔥 Load test", border_style="red")
+    for column in ("Workload", "Count", "Throughput (/s)", "p50 (ms)", "p99 (ms)"):
+        table.add_column(column, justify="left" if column == "Workload" else "right")
+    for name in ("dashboard", "audit", "api_calls"):
+        stats = report[name]
+        table.add_row(name, str(stats["count"]), f"{stats['throughput_per_s']:,.2f}",
+                      f"{stats['p50_ms']:,.1f}", f"{stats['p99_ms']:,.1f}")
+    console.print(table)
+    server = report["server_coingecko"]
+    console.print(
+        f"Dashboard: {report['dashboard_coins_per_s']} coin/s | Audit: {report['audit_outcomes']} | szintek: {report['audit_tiers']}\n"
+        f"CoinGecko szerver: {server['requests']} kérés, {server['injected_429']} injektált 429, "
+        f"{server['injected_errors']} injektált hiba | Ollama: {report['server_ollama']['requests']} kérés\n"
+        f"Kliens: {report['client_429']:g} x 429, {report['wasted_retries']:g} elpazarolt retry "
+        f"({report['retry_wait_s']}s várakozás), {report['client_errors']:g} hálózati hiba"
+    )
+
+
+@app.command()
+def main(
+    coins: int = typer.Option(50, "--coins", help="Dashboard watchlist mérete"),
+    rounds: int = typer.Option(3, "--rounds", help="Dashboard frissítési körök"),
+    audits: int = typer.Option(10, "--audits", help="Kötegelt auditok száma"),
+    concurrency: int = typer.Option(4, "--concurrency", help="Párhuzamos lekérések / auditok"),
+    latency_ms: float = typer.Option(50.0, "--latency-ms", help="CoinGecko stand-in késleltetés (ms)"),
+    jitter_ms: float = typer.Option(20.0, "--jitter-ms"),
+    rate_429: float = typer.Option(0.05, "--rate-429", help="429 válaszok aránya (0-1)"),
+    error_rate: float = typer.Option(0.01, "--error-rate", help="500 válaszok aránya (0-1)"),
+    llm_latency_ms: float = typer.Option(300.0, "--llm-latency-ms", help="Szimulált LLM válaszidő (ms)"),
+    llm_error_rate: float = typer.Option(0.0, "--llm-error-rate"),
+    calls_per_minute: float = typer.Option(6000.0, "--calls-per-minute", help="Kliens oldali API keret"),
+    backoff: float = typer.Option(0.2, "--backoff", help="429 utáni várakozási egység (mp)"),
+    pdf: bool = typer.Option(False, "--pdf", help="PDF renderelés az auditokban"),
+    tier: str = typer.Option("full", "--tier", help="Audit szint: full (minden audit LLM-mel) | auto | fast | rules"),
+    seed: int = typer.Option(42, "--seed"),
+):
+    """Dashboard körök + kötegelt auditok a stand-in szerverek ellen; átbocsátás, p50/p99, elpazarolt retry-k."""
+    logger.remove()  # A per-kérés logok torzítanák a mérést
+    report = asyncio.run(run_load_test(
+        coins, rounds, audits, concurrency,
+        FaultConfig(latency_ms, jitter_ms, rate_429, error_rate, seed),
+        FaultConfig(llm_latency_ms, error_rate=llm_error_rate, seed=seed),
+        calls_per_minute, backoff, render_pdf=pdf, tier=tier,
+    ))
+    print_report(report)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,219 @@
+"""
+Offline benchmark a forró útvonalakra (hálózat és Ollama nélkül).
+Használat:
+    python -m benchmarks.run                  # futtatás + összevetés a baseline-nal
+    python -m benchmarks.run --save-baseline  # az eredmény lesz az új baseline
+    python -m benchmarks.run --only risk_metrics,audit_pipeline --scale 0.2
+"""
+import asyncio
+import inspect
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Union
+
+import numpy as np
+import typer
+from loguru import logger
+from rich.console import Console
+from rich.table import Table
+
+from config.settings import settings
+from src.core.llm_engine import LLMEngine
+from src.core.pipeline import AnalysisPipeline, DEFAULT_DASHBOARD_COINS
+from src.core.rag_engine import RAGEngine
+from src.core.risk_engine import RiskEngine
+from src.services.web_search import WebSearchService
+from src.utils.report_gen import ReportGenerator
+from benchmarks.fakes import FakeOllamaClient, FixtureCoinGeckoService, fixture_search_backend, load_fixture
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.25  # Ennyivel lassabb p50 már regressziónak számít
+
+app = typer.Typer()
+console = Console()
+
+
+class Benchmark(NamedTuple):
+    name: str
+    fn: Callable[[], Union[Any, Awaitable[Any]]]
+    iterations: int
+    warmup: int = 2
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    arr = np.asarray(samples) * 1000
+    return {
+        "iterations": len(samples),
+        "mean_ms": round(float(arr.mean()), 4),
+        "p50_ms": round(float(np.percentile(arr, 50)), 4),
+        "p95_ms": round(float(np.percentile(arr, 95)), 4),
+        "ops_per_s": round(len(samples) / (arr.sum() / 1000), 2) if arr.sum() > 0 else float("inf"),
+    }
+
+
+async def measure(bench: Benchmark, scale: float = 1.0) -> Dict[str, float]:
+    """Bemelegítés után iterációnként mér (sync és async függvényre is)."""
+    is_async = inspect.iscoroutinefunction(bench.fn)
+    iterations = max(1, int(bench.iterations * scale))
+    samples = []
+    for i in range(bench.warmup + iterations):
+        started = time.perf_counter()
+        if is_async:
+            await bench.fn()
+        else:
+            bench.fn()
+        if i >= bench.warmup:
+            samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float = DEFAULT_THRESHOLD) -> Dict[str, str]:
+    """p50 alapú összevetés: regression / improved / ok / new."""
+    verdicts = {}
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            verdicts[name] = "new"
+        elif stats["p50_ms"] > base["p50_ms"] * (1 + threshold):
+            verdicts[name] = "regression"
+        elif stats["p50_ms"] < base["p50_ms"] * (1 - threshold):
+            verdicts[name] = "improved"
+        else:
+            verdicts[name] = "ok"
+    return verdicts
+
+
+def build_benchmarks() -> List[Benchmark]:
+    """Komponensek rögzített bemenetekkel; a pipeline-ok a valódi kódot futtatják fake I/O-val."""
+    coins = load_fixture("coins.json")
+    charts = load_fixture("market_chart.json")
+    btc = coins["bitcoin"]
+    btc_prices = [p[1] for p in charts["bitcoin"]["prices"]]
+
+    risk_engine = RiskEngine()
+    warm_rag = RAGEngine()
+
+    cg_service = FixtureCoinGeckoService()
+    web_search = WebSearchService(backend=fixture_search_backend)
+    llm = LLMEngine()
+    llm.client = FakeOllamaClient()
+    pipeline = AnalysisPipeline(cg_service, web_search, llm, RAGEngine(), risk_engine)
+
+    analysis = dict(FakeOllamaClient.RESPONSE)
+    dimensions = risk_engine.calculate_risk_metrics(btc)["dimensions"]
+
+    def pdf():
+        ReportGenerator.create_pdf(analysis, "BENCH", historical_prices=btc_prices, risk_dimensions=dimensions)
+
+    async def dashboard():
+        cg_service.clear_cache()
+        await pipeline.market_overview(list(DEFAULT_DASHBOARD_COINS), concurrency=len(DEFAULT_DASHBOARD_COINS))
+
+    async def audit():
+        cg_service.clear_cache()
+        web_search._cache.clear()
+        # Mindig a teljes (LLM-es) útvonal, hogy a baseline összevethető maradjon
+        await pipeline.audit("bitcoin", render_pdf=True, tier="full")
+
+    return [
+        Benchmark("risk_metrics", lambda: risk_engine.calculate_risk_metrics(btc), 500),
+        Benchmark("risk_batch_6", lambda: risk_engine.calculate_risk_batch(list(coins.values())), 200),
+        Benchmark("quant_metrics", lambda: risk_engine.get_quant_finance_metrics(btc_prices), 500),
+        Benchmark("rag_load_cold", lambda: RAGEngine().load_context(), 200),
+        Benchmark("rag_load_warm", warm_rag.load_context, 2000),
+        Benchmark("pdf_render", pdf, 10, warmup=1),
+        Benchmark("dashboard_pipeline", dashboard, 50),
+        Benchmark("audit_pipeline", audit, 10, warmup=1),
+    ]
+
+
+async def run_suite(only: Optional[List[str]] = None, scale: float = 1.0) -> Dict[str, Dict[str, float]]:
+    # A PDF-ek és a diagram képek ideiglenes mappába kerülnek, nem a valódi riportok közé
+    original_report_dir = settings.REPORT_DIR
+    with tempfile.TemporaryDirectory(prefix="chainsentinel_bench_") as tmp:
+        settings.REPORT_DIR = Path(tmp)
+        try:
+            results = {}
+            for bench in build_benchmarks():
+                if only and bench.name not in only:
+                    continue
+                results[bench.name] = await measure(bench, scale)
+                console.print(f"[dim]✓ {bench.name}: p50 {results[bench.name]['p50_ms']:.3f} ms[/dim]")
+            return results
+        finally:
+            settings.REPORT_DIR = original_report_dir
+
+
+def load_baseline(path: Path = BASELINE_FILE) -> Dict[str, Dict[str, float]]:
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_results(results: Dict[str, Dict[str, float]], path: Path):
+    payload = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+
+@app.command()
+def main(
+    save_baseline: bool = typer.Option(False, "--save-baseline", help="Az eredmény mentése új baseline-ként"),
+    threshold: float = typer.Option(DEFAULT_THRESHOLD, "--threshold", help="Megengedett p50 lassulás (0.25 = 25%)"),
+    only: str = typer.Option(None, "--only", help="Csak ezek a benchmarkok (vesszővel elválasztva)"),
+    scale: float = typer.Option(1.0, "--scale", help="Iterációszám szorzó (gyors futáshoz pl. 0.1)"),
+    baseline: Path = typer.Option(BASELINE_FILE, "--baseline", help="Baseline fájl"),
+):
+    """Offline benchmark: RiskEngine, Quant, RAG, PDF, dashboard és audit pipeline."""
+    # A per-iteráció INFO logok torzítanák a mérést
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    selected = [name.strip() for name in only.split(",")] if only else None
+    results = asyncio.run(run_suite(selected, scale))
+    base = load_baseline(baseline)
+    verdicts = compare(results, base, threshold)
+
+    table = Table(title="⏱️ ChainSentinel Benchmark", border_style="blue")
+    for column in ("Benchmark", "Iter", "p50 (ms)", "p95 (ms)", "ops/s", "Baseline p50", "Status"):
+        table.add_column(column, justify="left" if column in ("Benchmark", "Status") else "right")
+    styles = {"regression": "bold red", "improved": "green", "ok": "white", "new": "cyan"}
+    for name, stats in results.items():
+        base_p50 = base.get(name, {}).get("p50_ms")
+        status = verdicts[name]
+        table.add_row(
+            name, str(stats["iterations"]), f"{stats['p50_ms']:.3f}", f"{stats['p95_ms']:.3f}",
+            f"{stats['ops_per_s']:,.1f}", f"{base_p50:.3f}" if base_p50 is not None else "-",
+            f"[{styles[status]}]{status}[/{styles[status]}]",
+        )
+    console.print(table)
+
+    save_results(results, settings.LOG_DIR / "bench_results.json")
+    if save_baseline:
+        save_results(results, baseline)
+        console.print(f"[green]Baseline mentve: {baseline}[/green]")
+        return
+
+    regressions = [name for name, verdict in verdicts.items() if verdict == "regression"]
+    if not base:
+        console.print("[yellow]Nincs baseline; mentés: python -m benchmarks.run --save-baseline[/yellow]")
+    elif regressions:
+        console.print(f"[bold red]❌ Regresszió (>{threshold:.0%} p50): {', '.join(regressions)}[/bold red]")
+        raise typer.Exit(code=1)
+    else:
+        console.print("[green]✅ Nincs regresszió a baseline-hoz képest.[/green]")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,266 @@
+"""
+Lokális, hibainjektáló stand-in szerverek terheléses teszthez.
+- CoinGecko: GET /api/v3/coins/{id}, /api/v3/coins/list, /api/v3/coins/markets, /api/v3/coins/{id}/market_chart
+- Ollama:    POST /api/chat (nem streamelt válasz)
+A késleltetés, a 429 arány és a hibaarány állítható; a GET /_stats a szerver oldali számlálókat adja.
+
+Önálló futtatás (a CLI-t env változókkal lehet rájuk irányítani):
+    python -m benchmarks.standin --latency-ms 80 --rate-429 0.05
+    COINGECKO_BASE_URL=http://127.0.0.1:8801/api/v3 OLLAMA_HOST=http://127.0.0.1:11435 python -m src.main dashboard
+"""
+import asyncio
+import hashlib
+import json
+import random
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import typer
+from aiohttp import web
+
+from benchmarks.fakes import FakeOllamaClient, load_fixture
+
+
+@dataclass
+class FaultConfig:
+    latency_ms: float = 0.0      # Alap késleltetés kérésenként
+    jitter_ms: float = 0.0       # Egyenletes +/- szórás
+    rate_429: float = 0.0        # Ennyi arányban válaszol 429-cel
+    error_rate: float = 0.0      # Ennyi arányban válaszol 500-zal
+    seed: Optional[int] = None
+    rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+
+    async def apply(self, stats: Dict[str, int]) -> Optional[web.Response]:
+        """Késleltetés + hibainjektálás; ha hibát injektál, azt a választ adja vissza."""
+        stats["requests"] += 1
+        delay = self.latency_ms + (self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        roll = self.rng.random()
+        if roll < self.rate_429:
+            stats["injected_429"] += 1
+            return web.json_response({"status": {"error_code": 429, "error_message": "rate limited"}},
+                                     status=429, headers={"Retry-After": "1"})
+        if roll < self.rate_429 + self.error_rate:
+            stats["injected_errors"] += 1
+            return web.json_response({"error": "injected failure"}, status=500)
+        return None
+
+
+def synthetic_coin(coin_id: str) -> Tuple[Dict[str, Any], Dict[str, Any], List[List[float]]]:
+    """
+    Ismeretlen id-re determinisztikus, valószerű coin (detail, markets sor, idősor),
+    így tetszőleges méretű watchlist / audit köteg is kiszolgálható.
+    """
+    seed = int(hashlib.sha256(coin_id.encode()).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    rank = rng.randint(50, 3000)
+    price = 10 ** rng.uniform(-6, 3)
+    mcap = price * 10 ** rng.uniform(7, 10)
+    volume = mcap * rng.uniform(0.001, 0.3)
+    spread = rng.uniform(1, 40)
+    changes = {k: rng.uniform(-40, 40) for k in ("1h", "24h", "7d", "30d")}
+    changes["1h"] /= 10
+    ath_change = -rng.uniform(5, 99)
+
+    detail = {
+        "id": coin_id, "symbol": coin_id[:4], "name": coin_id.replace("-", " ").title(), "market_cap_rank": rank,
+        "market_data": {
+            "current_price": {"usd": price}, "market_cap": {"usd": mcap}, "total_volume": {"usd": volume},
+            "high_24h": {"usd": price * (1 + spread / 200)}, "low_24h": {"usd": price * (1 - spread / 200)},
+            "price_change_percentage_24h": changes["24h"],
+            "price_change_percentage_1h_in_currency": {"usd": changes["1h"]},
+            "price_change_percentage_7d_in_currency": {"usd": changes["7d"]},
+            "price_change_percentage_30d_in_currency": {"usd": changes["30d"]},
+            "ath_change_percentage": {"usd": ath_change},
+        },
+        "community_data": {"twitter_followers": rng.randint(0, 500000)},
+        "developer_data": {"stars": rng.randint(0, 5000)},
+    }
+    market_row = {
+        "id": coin_id, "symbol": detail["symbol"], "name": detail["name"], "market_cap_rank": rank,
+        "current_price": price, "market_cap": mcap, "total_volume": volume,
+        "high_24h": price * (1 + spread / 200), "low_24h": price * (1 - spread / 200),
+        "price_change_percentage_24h": changes["24h"], "ath_change_percentage": ath_change,
+        "price_change_percentage_1h_in_currency": changes["1h"],
+        "price_change_percentage_7d_in_currency": changes["7d"],
+        "price_change_percentage_30d_in_currency": changes["30d"],
+    }
+    prices, p, ts = [], price / (1 + changes["30d"] / 100), 1760000000000
+    for day in range(31):
+        prices.append([ts + day * 86400000, p])
+        p *= 1 + rng.gauss(0, spread / 400)
+    return detail, market_row, prices
+
+
+class CoinGeckoStandIn:
+    """A CoinGeckoService által használt végpontok (rögzített + szintetikus adatokkal)."""
+
+    def __init__(self, faults: FaultConfig, market_size: int = 3000):
+        self.faults = faults
+        self.market_size = market_size  # A toplista (ids nélküli /coins/markets) mérete
+        self.stats: Dict[str, int] = {"requests": 0, "injected_429": 0, "injected_errors": 0}
+        self.coins = load_fixture("coins.json")
+        self.charts = {cid: chart["prices"] for cid, chart in load_fixture("market_chart.json").items()}
+        self.markets = {row["id"]: row for row in load_fixture("markets.json")}
+        self._listed_ids = list(self.markets)
+
+    def _lookup(self, coin_id: str):
+        if coin_id in self.coins:
+            return self.coins[coin_id], self.markets[coin_id], self.charts[coin_id]
+        return synthetic_coin(coin_id)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.get("/api/v3/coins/markets", self.markets_handler),
+            web.get("/api/v3/coins/list", self.list_handler),
+            web.get("/api/v3/coins/{coin_id}/market_chart", self.chart_handler),
+            web.get("/api/v3/coins/{coin_id}", self.coin_handler),
+            web.get("/_stats", self.stats_handler),
+        ])
+        return app
+
+    async def coin_handler(self, request: web.Request) -> web.Response:
+        fault = await self.faults.apply(self.stats)
+        if fault is not None:
+            return fault
+        coin_id = request.match_info["coin_id"]
+        if coin_id.startswith("missing"):
+            return web.json_response({"error": "coin not found"}, status=404)
+        return web.json_response(self._lookup(coin_id)[0])
+
+    async def list_handler(self, request: web.Request) -> web.Response:
+        fault = await self.faults.apply(self.stats)
+        if fault is not None:
+            return fault
+        # A fixture coinok + a toplista szintetikus coinjai (a loadtest id-jei is feloldhatók)
+        listing = [{"id": c["id"], "symbol": c["symbol"], "name": c["name"]} for c in self.coins.values()]
+        for i in range(self.market_size):
+            detail = self._lookup(f"loadcoin-{i}")[0]
+            listing.append({"id": detail["id"], "symbol": detail["symbol"], "name": detail["name"]})
+        return web.json_response(listing)
+
+    async def markets_handler(self, request: web.Request) -> web.Response:
+        fault = await self.faults.apply(self.stats)
+        if fault is not None:
+            return fault
+        per_page = int(request.query.get("per_page", 100))
+        if "ids" in request.query:
+            ids = [c for c in request.query["ids"].split(",") if c]
+            return web.json_response([self._lookup(coin_id)[1] for coin_id in ids[:per_page]])
+        # Toplista: a fixture coinok, utána szintetikus coinok (rang szerint) market_size-ig
+        start = (int(request.query.get("page", 1)) - 1) * per_page
+        rows = []
+        for i in range(start, min(start + per_page, self.market_size)):
+            coin_id = self._listed_ids[i] if i < len(self._listed_ids) else f"loadcoin-{i}"
+            rows.append(dict(self._lookup(coin_id)[1], market_cap_rank=i + 1))
+        return web.json_response(rows)
+
+    async def chart_handler(self, request: web.Request) -> web.Response:
+        fault = await self.faults.apply(self.stats)
+        if fault is not None:
+            return fault
+        return web.json_response({"prices": self._lookup(request.match_info["coin_id"])[2]})
+
+    async def stats_handler(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+
+class OllamaStandIn:
+    """Ollama kompatibilis /api/chat (stream=False), a generálási időt a késleltetés szimulálja."""
+
+    def __init__(self, faults: FaultConfig):
+        self.faults = faults
+        self.stats: Dict[str, int] = {"requests": 0, "injected_429": 0, "injected_errors": 0}
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([web.post("/api/chat", self.chat_handler), web.get("/_stats", self.stats_handler)])
+        return app
+
+    async def chat_handler(self, request: web.Request) -> web.Response:
+        started = time.perf_counter()
+        fault = await self.faults.apply(self.stats)
+        if fault is not None:
+            return fault
+        body = await request.json()
+        prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+        content = json.dumps(FakeOllamaClient.RESPONSE)
+        elapsed_ns = int((time.perf_counter() - started) * 1e9)
+        return web.json_response({
+            "model": body.get("model", ""),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": elapsed_ns,
+            "prompt_eval_count": prompt_chars // 4,
+            "prompt_eval_duration": int(elapsed_ns * 0.3),
+            "eval_count": len(content) // 4,
+            "eval_duration": int(elapsed_ns * 0.7),
+        })
+
+    async def stats_handler(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+
+async def start_site(app: web.Application, host: str = "127.0.0.1", port: int = 0) -> Tuple[web.AppRunner, str]:
+    """
+    Háttérben indított szerver; port=0 esetén szabad portot kap. (runner, base URL)
+    A socketet magunk kötjük (SockSite), így a tényleges port a nyilvános socket API-ból jön.
+    """
+    sock = socket.create_server((host, port))
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.SockSite(runner, sock).start()
+    except BaseException:
+        await runner.cleanup()
+        sock.close()
+        raise
+    return runner, f"http://{host}:{sock.getsockname()[1]}"
+
+
+app = typer.Typer()
+
+
+@app.command()
+def main(
+    host: str = "127.0.0.1",
+    coingecko_port: int = typer.Option(8801, "--coingecko-port"),
+    ollama_port: int = typer.Option(11435, "--ollama-port"),
+    latency_ms: float = typer.Option(0.0, "--latency-ms", help="CoinGecko késleltetés (ms)"),
+    jitter_ms: float = typer.Option(0.0, "--jitter-ms"),
+    rate_429: float = typer.Option(0.0, "--rate-429", help="429 válaszok aránya (0-1)"),
+    error_rate: float = typer.Option(0.0, "--error-rate", help="500 válaszok aránya (0-1)"),
+    llm_latency_ms: float = typer.Option(500.0, "--llm-latency-ms", help="Szimulált LLM válaszidő (ms)"),
+    seed: int = typer.Option(None, "--seed"),
+):
+    """CoinGecko és Ollama stand-in szerverek indítása (Ctrl+C a leállításhoz)."""
+    async def serve():
+        cg = CoinGeckoStandIn(FaultConfig(latency_ms, jitter_ms, rate_429, error_rate, seed))
+        ollama = OllamaStandIn(FaultConfig(llm_latency_ms, seed=seed))
+        cg_runner, cg_url = await start_site(cg.build_app(), host, coingecko_port)
+        ollama_runner, ollama_url = await start_site(ollama.build_app(), host, ollama_port)
+        print(f"COINGECKO_BASE_URL={cg_url}/api/v3")
+        print(f"OLLAMA_HOST={ollama_url}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await cg_runner.cleanup()
+            await ollama_runner.cleanup()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    app()
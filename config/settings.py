@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     APP_NAME: str = "ChainSentinel Enterprise"
@@ -12,10 +13,135 @@ class Settings(BaseSettings):
     LOG_DIR: Path = DATA_DIR / "logs"
     REPORT_DIR: Path = DATA_DIR / "reports"
     KNOWLEDGE_BASE_DIR: Path = DATA_DIR / "knowledge_base"
+    DATASET_DIR: Path = DATA_DIR / "dataset"
+    MODEL_DIR: Path = DATA_DIR / "models"
+    SNAPSHOT_DIR: Path = DATASET_DIR / "snapshots"
+
+    # Naplózás (src/utils/logging_setup.py)
+    LOG_LEVEL: str = "INFO"          # Konzol
+    LOG_FILE_LEVEL: str = "INFO"     # JSON fájl
+    LOG_JSON_FILE: str = "chainsentinel.jsonl"
+    LOG_ROTATION_MB: float = 50.0    # Új fájl, ha ekkora lenne...
+    LOG_ROTATION_TIME: str = "00:00"  # ...vagy naponta ekkor (amelyik előbb jön)
+    LOG_RETENTION: str = "14 days"
+    LOG_COMPRESSION: str = "gz"
+    LOG_MODULE_LEVELS: Dict[str, str] = {}  # Pl. {"src.services": "WARNING", "src.core.pipeline": "DEBUG"}
+    LOG_SAMPLE_WINDOW: float = 10.0  # Hívási helyenként ennyi mp-es ablak...
+    LOG_SAMPLE_BURST: int = 20       # ...ennyi üzenettel; a többit eldobjuk (0 = nincs ritkítás)
+    TRACE_ROTATION_MB: float = 20.0  # traces.jsonl: új fájl ekkora méretnél vagy LOG_ROTATION_TIME-kor
+    TRACE_BACKUPS: int = 5           # Ennyi rotált traces.*.jsonl marad meg
 
     # API Limitek
     MAX_TOKENS: int = 4096
     API_TIMEOUT: int = 30
+    COINGECKO_CACHE_TTL: float = 60.0  # Pillanatnyi coin adatok cache ideje (mp)
+    COINGECKO_STALE_TTL: float = 3600.0  # Lejárat után ennyi ideig még tartalék (határidő túllépéskor), utána törlődik
+    COINGECKO_CACHE_MAX_COINS: int = 2000  # LRU korlát a snapshot cache-re
+    COINGECKO_HISTORY_CACHE_MAX: int = 64  # LRU korlát a (teljes felbontású) idősor cache-re
+    COINGECKO_CALLS_PER_MINUTE: float = 30.0  # Közös API keret (free tier)
+    COINGECKO_BURST: int = 5
+    COINGECKO_BASE_URL: str = "https://api.coingecko.com/api/v3"  # Terheléses teszthez: lokális stand-in
+    COINGECKO_RETRY_BACKOFF: float = 5.0  # 429 után (próba sorszáma x ennyi) mp várakozás
+    OLLAMA_HOST: Optional[str] = None  # None = az ollama kliens alapértelmezése (OLLAMA_HOST env / localhost:11434)
+    LLM_MAX_RETRIES: int = 1  # Újragenerálás csak javíthatatlan (nem JSON / sémának ellentmondó) válasznál
+    LLM_KEEP_ALIVE: str = "30m"  # Ennyi ideig marad betöltve a modell (és a stabil prompt előtag KV cache-e)
+    LLM_STRUCTURED_OUTPUT: bool = True  # JSON séma az Ollama `format` mezőben (Ollama >= 0.5); False = sima 'json' mód
+
+    # Modell útvonalak parancsonként: sorrendben próbált modellek ("small" / "large" = a két alapmodell),
+    # mindegyik a route időkorlátjával; időtúllépés / hiba esetén a következő jön
+    SMALL_MODEL_NAME: str = "llama3.2:3b"
+    LLM_ROUTES: Dict[str, List[str]] = {
+        "audit_fast": ["small", "large"],
+        "audit_full": ["large", "small"],
+        "portfolio": ["small", "large"],
+    }
+    LLM_ROUTE_TIMEOUTS: Dict[str, float] = {"audit_fast": 20.0, "audit_full": 60.0, "portfolio": 30.0}
+
+    # Többszintű audit: rules (nincs LLM) | fast (kis modell) | full (nagy modell) | auto (döntés)
+    AUDIT_DEFAULT_TIER: str = "auto"
+    AUDIT_TIER_SKIP_MARGIN: int = 35  # ML pontszám ennyire az 50-es határtól (<=15 / >=85) + egyező quant: nincs LLM
+    AUDIT_TIER_FAST_MARGIN: int = 20  # ...ennyire (<=30 / >=70): kis modell; a kettő között a nagy modell
+    AUDIT_TIER_CALM_VOLATILITY: float = 60.0   # Éves volatilitás (%) ez alatt + kis visszaesés: nyugodt
+    AUDIT_TIER_CALM_DRAWDOWN: float = -20.0
+    AUDIT_TIER_RISKY_VOLATILITY: float = 100.0  # Ez felett vagy mély visszaesésnél: kockázatos
+    AUDIT_TIER_RISKY_DRAWDOWN: float = -40.0
+
+    # Audit késleltetési keret: teljes határidő és szakaszonkénti részesedés.
+    # A soros (kritikus) út: coin_data + max(history, context, news) + llm + pdf <= 1.0;
+    # a pdf keretét a pipeline ráadásul előre félreteszi.
+    AUDIT_DEADLINE: float = 120.0
+    AUDIT_STAGE_BUDGETS: Dict[str, float] = {
+        "coin_data": 0.15,  # Kötelező (cache-ből pótolható)
+        "history": 0.15,    # Opcionális, párhuzamosan a context / news szakasszal
+        "context": 0.05,    # Tudásbázis (RAG)
+        "news": 0.10,       # Opcionális
+        "llm": 0.55,        # Lejáratkor szabályalapú elemzés
+        "pdf": 0.15,
+    }
+
+    # Árfolyam idősor (audit): felbontás daily | hourly | 5m; a grafikon legfeljebb CHART_MAX_POINTS pontot rajzol
+    HISTORY_DAYS: int = 30
+    HISTORY_INTERVAL: str = "hourly"
+    CHART_MAX_POINTS: int = 600
+    CHART_DOWNSAMPLE: str = "lttb"  # lttb | minmax
+
+    # Hírkeresés
+    SEARCH_CACHE_TTL: float = 900.0  # Lekérdezésenkénti cache (mp)
+    SEARCH_CACHE_MAX_ENTRIES: int = 512  # LRU korlát; a lejárt bejegyzés határidő túllépéskor még tartalék
+    SEARCH_DEADLINE: float = 8.0     # Kemény határidő egy audit kereséseire (mp)
+
+    # Determinisztikus red flag előszűrő (leírás + hírek, LLM nélkül)
+    RED_FLAG_SIGNATURES: Path = BASE_DIR / "config" / "red_flags.toml"
+    RED_FLAG_MAX_PENALTY: int = 25  # Legfeljebb ennyi ponttal emeli az ML kockázati pontszámot
+    # Forrásonkénti szorzó a találat súlyára: a hírek általános piaci eseményekről is szólnak
+    # (pl. egy tőzsde feltörése), ezért csak tört súllyal és kritikus eszkaláció nélkül számítanak
+    RED_FLAG_SOURCE_WEIGHTS: Dict[str, float] = {"description": 1.0, "news": 0.25}
+
+    # Élő dashboard
+    LIVE_REFRESH_INTERVAL: int = 60
+    # Élő monitor (dashboard, watch): újrapontozás csak ennél nagyobb bemeneti változásnál
+    MONITOR_REL_STEP_PCT: float = 1.0  # Ár / kapitalizáció / forgalom: relatív (logaritmikus) lépés, %
+    MONITOR_PCT_STEP: float = 0.5      # Százalékos mezők (árváltozás, ATH távolság): abszolút lépés, %-pont
+
+    # Előre kiszámolt kockázati tábla (precompute parancs -> SQLite)
+    RISK_TABLE_ENABLED: bool = True
+    RISK_DB_PATH: Path = DATA_DIR / "risk_scores.sqlite"
+    RISK_TABLE_MAX_AGE: float = 3600.0       # Ennél régebbi bejegyzés helyett élő pontozás (mp)
+    RISK_TABLE_RETENTION_DAYS: float = 30.0  # Ennél régebbi sorok törlődnek (előzmény / backteszt)
+    PRECOMPUTE_UNIVERSE: int = 3000          # A pontozott toplista mérete
+    PRECOMPUTE_INTERVAL: int = 900           # Ütemezett futás köze (mp) --loop módban
+
+    # Lokális coin index (szimbólum / név -> CoinGecko id feloldás hálózat nélkül)
+    COIN_INDEX_PATH: Path = DATA_DIR / "coin_index.json"
+    COIN_INDEX_TTL: float = 86400.0  # Ennél régebbi index frissül a /coins/list végpontról (mp)
+    COIN_INDEX_RANKED: int = 1000    # Ennyi coin kap piaci rangot (szimbólum ütközés feloldásához)
+    COIN_INDEX_RETRY_BACKOFF: float = 300.0  # Sikertelen frissítés után ennyi ideig nincs új próbálkozás (mp)
+
+    # Screener (piaci toplista szűrése)
+    SCREEN_UNIVERSE: int = 3000  # Ennyi coin kapitalizáció szerint (250 / API hívás)
+    SCREEN_DEFAULT_SORT: str = "-risk_score"
+
+    # ML tanítás (hiperparaméter keresés)
+    TRAIN_CV_FOLDS: int = 5
+    TRAIN_SEARCH_ITERATIONS: int = 20
+    TRAIN_N_JOBS: int = -1  # -1 = az összes CPU mag
+
+    # Inkrementális frissítés (napi snapshotokból)
+    INCREMENTAL_EXTRA_TREES: int = 50      # Új fák száma partíciónként (warm start)
+    INCREMENTAL_MAX_TREES: int = 1000      # E fölött a legrégebbi fák kiesnek
+    INCREMENTAL_MAX_DEGRADATION: float = 0.05  # Ennyivel romolhat a holdout metrika
+    DRIFT_Z_THRESHOLD: float = 1.0         # Standardizált átlag-eltolódás riasztási küszöb
+    DRIFT_RETRAIN_Z_THRESHOLD: float = 3.0  # E fölött nincs inkrementális frissítés, teljes újratanítás jön
+
+    # Hosszan futó folyamatok: ennyi másodpercenként nézzük, jött-e új modell
+    MODEL_RELOAD_INTERVAL: float = 30.0
+
+    # Lokális API szerver (serve parancs)
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_PORT: int = 8765
+    SERVER_MAX_CONCURRENT_REQUESTS: int = 16  # Könnyű végpontok (score, dashboard)
+    SERVER_MAX_CONCURRENT_AUDITS: int = 2     # Nehéz végpontok (audit, portfolio -> LLM)
+    SERVER_QUEUE_TIMEOUT: float = 10.0        # Ennyit várhat egy kérés szabad helyre, utána 503
 
     class Config:
         model_config = SettingsConfigDict(env_file=".env")
@@ -25,4 +151,5 @@ settings = Settings()
 # Automatikus mappa létrehozás
 settings.LOG_DIR.mkdir(parents=True, exist_ok=True)
 settings.REPORT_DIR.mkdir(parents=True, exist_ok=True)
-settings.KNOWLEDGE_BASE_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+settings.KNOWLEDGE_BASE_DIR.mkdir(parents=True, exist_ok=True)
+settings.SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import time
+from functools import partial
+from typing import Awaitable, Callable, Optional
+from aiohttp import web
+from loguru import logger
+from config.settings import settings
+from src.core.pipeline import AUDIT_TIERS
+from src.services.coingecko import HISTORY_INTERVALS
+from src.utils.telemetry import tracer
+
+# A numpy / Path értékeket is sorosítani kell (quant metrikák, PDF útvonal)
+_json_dumps = partial(json.dumps, default=str)
+
+
+class LocalAPIServer:
+    """
+    Hosszan futó lokális HTTP/JSON API (serve mód).
+    A pipeline (modell, cache-ek, HTTP session) a kérések között meleg marad,
+    így a belső eszközök CLI indítás helyett milliszekundumos overheaddel hívhatják.
+    """
+
+    def __init__(self, pipeline, max_requests: Optional[int] = None, max_audits: Optional[int] = None,
+                 queue_timeout: Optional[float] = None):
+        self.pipeline = pipeline
+        self.queue_timeout = settings.SERVER_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        # Két külön limit: a könnyű végpontokat ne blokkolják a lassú LLM-es kérések
+        self._light = asyncio.Semaphore(max_requests or settings.SERVER_MAX_CONCURRENT_REQUESTS)
+        self._heavy = asyncio.Semaphore(max_audits or settings.SERVER_MAX_CONCURRENT_AUDITS)
+        self.started_at = time.time()
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.get("/health", self.health),
+            web.get("/dashboard", self.dashboard),
+            web.get("/score/{coin_id}", self.score),
+            web.post("/audit", self.audit),
+            web.post("/portfolio", self.portfolio),
+            web.get("/metrics", self.metrics),
+        ])
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    # --- Életciklus ---
+    async def _on_startup(self, app: web.Application):
+        # Új modell verzió a szerver újraindítása nélkül is élesedik
+        self.pipeline.risk_engine.start_watching()
+        logger.info("🚀 ChainSentinel API szerver elindult.")
+
+    async def _on_cleanup(self, app: web.Application):
+        self.pipeline.risk_engine.stop_watching()
+        await self.pipeline.close()
+        tracer.export()
+        logger.info("API szerver leállítva.")
+
+    # --- Segédek ---
+    async def _limited(self, sem: asyncio.Semaphore, handler: Callable[[], Awaitable[web.Response]]) -> web.Response:
+        """Konkurencia limit: ha a várakozási időn belül nincs szabad hely, 503-mal válaszolunk."""
+        try:
+            await asyncio.wait_for(sem.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            tracer.incr("server_rejected_total", reason="queue_timeout")
+            return self._error(503, "Server busy, try again later.")
+        try:
+            return await handler()
+        except Exception as e:
+            logger.error(f"Hiba a kérés kiszolgálásakor: {e}")
+            return self._error(500, str(e))
+        finally:
+            sem.release()
+
+    @staticmethod
+    def _json(payload, status: int = 200) -> web.Response:
+        return web.json_response(payload, status=status, dumps=_json_dumps)
+
+    @classmethod
+    def _error(cls, status: int, message: str) -> web.Response:
+        return cls._json({"error": message}, status=status)
+
+    @staticmethod
+    async def _read_body(request: web.Request) -> dict:
+        if not request.can_read_body:
+            return {}
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            raise web.HTTPBadRequest(text=_json_dumps({"error": "Invalid JSON body"}), content_type="application/json")
+        return body if isinstance(body, dict) else {}
+
+    # --- Végpontok ---
+    async def health(self, request: web.Request) -> web.Response:
+        return self._json({
+            "status": "ok",
+            "version": settings.VERSION,
+            "model_version": self.pipeline.risk_engine.model_version,
+            "uptime_s": round(time.time() - self.started_at, 1),
+        })
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        """Prometheus szöveges formátum (ugyanaz, mint a LOG_DIR/metrics.prom)."""
+        return web.Response(text=tracer.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    async def dashboard(self, request: web.Request) -> web.Response:
+        coins = [c.strip() for c in request.query.get("coins", "").split(",") if c.strip()] or None
+
+        async def handler():
+            if coins:
+                # Szimbólumok / nevek is jók; az ismeretlenek kimaradnak
+                matches = await self.pipeline.resolve_coins(coins)
+                coins_resolved = list(dict.fromkeys(m.id for m in matches.values() if m))
+                if not coins_resolved:
+                    return self._error(404, f"Unknown coins: {', '.join(coins)}")
+                rows = await self.pipeline.market_overview(coins_resolved)
+                return self._json({"coins": rows, "unresolved": [q for q, m in matches.items() if m is None]})
+            rows = await self.pipeline.market_overview(coins)
+            return self._json({"coins": rows})
+        return await self._limited(self._light, handler)
+
+    async def score(self, request: web.Request) -> web.Response:
+        coin_id = request.match_info["coin_id"]
+
+        async def handler():
+            result = await self.pipeline.score(coin_id)
+            if result is None:
+                return self._error(404, f"Unknown coin: {coin_id}")
+            return self._json(result)
+        return await self._limited(self._light, handler)
+
+    async def audit(self, request: web.Request) -> web.Response:
+        body = await self._read_body(request)
+        token = str(body.get("token", "")).strip()
+        if not token:
+            return self._error(400, "Missing 'token'.")
+
+        tier = body.get("tier")
+        if tier is not None and tier not in AUDIT_TIERS:
+            return self._error(400, f"'tier' must be one of: {', '.join(AUDIT_TIERS)}.")
+        interval = body.get("interval")
+        if interval is not None and interval not in HISTORY_INTERVALS:
+            return self._error(400, f"'interval' must be one of: {', '.join(HISTORY_INTERVALS)}.")
+        try:
+            days = int(body["days"]) if body.get("days") is not None else None
+        except (TypeError, ValueError):
+            return self._error(400, "'days' must be an integer.")
+        if days is not None and days < 1:
+            return self._error(400, "'days' must be positive.")
+
+        async def handler():
+            result = await self.pipeline.audit(token, render_pdf=bool(body.get("pdf", True)), tier=tier,
+                                               days=days, interval=interval)
+            # Az audit span-jei azonnal a traces.jsonl-be kerülnek (hosszan futó szerver)
+            tracer.export_jsonl()
+            if result.get("error") == "not_found":
+                return self._error(404, f"Unknown coin: {token}")
+            if result.get("error") == "timeout":
+                return self._error(504, f"Coin data for '{token}' did not arrive within the audit deadline.")
+            return self._json(result)
+        return await self._limited(self._heavy, handler)
+
+    async def portfolio(self, request: web.Request) -> web.Response:
+        body = await self._read_body(request)
+        try:
+            budget = int(body.get("budget", 10000))
+        except (TypeError, ValueError):
+            return self._error(400, "'budget' must be an integer.")
+        strategy = str(body.get("strategy", "balanced"))
+
+        async def handler():
+            plan = await self.pipeline.portfolio(budget, strategy)
+            return self._json({"budget": budget, "strategy": strategy, "plan": plan})
+        return await self._limited(self._heavy, handler)
+
+
+def run_server(pipeline, host: Optional[str] = None, port: Optional[int] = None):
+    """Blokkoló indítás (a serve CLI parancs hívja)."""
+    server = LocalAPIServer(pipeline)
+    web.run_app(server.build_app(), host=host or settings.SERVER_HOST, port=port or settings.SERVER_PORT,
+                print=None)
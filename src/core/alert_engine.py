@@ -0,0 +1,196 @@
+import json
+import time
+import tomllib
+import aiohttp
+import numpy as np
+from pathlib import Path
+from typing import Dict, Any, List, Literal, Optional
+from pydantic import BaseModel, Field
+from loguru import logger
+from config.settings import settings
+from src.core.coin_index import CoinIndex
+
+# A szabályokban hivatkozható metrikák (a MarketMonitor sorainak mezői)
+METRIC_COLUMNS = [
+    "risk_score",          # ML kockázati pontszám (0-100)
+    "liquidity_ratio",     # 24h forgalom / piaci kapitalizáció
+    "volatility_24h_pct",  # (High - Low) / ár, %
+    "ath_drawdown_pct",    # Távolság az ATH-tól, % (negatív)
+    "change_24h",
+    "change_7d",
+    "change_30d",
+    "market_cap_rank",
+]
+_METRIC_INDEX = {name: i for i, name in enumerate(METRIC_COLUMNS)}
+_OPS = [">", ">=", "<", "<="]
+
+
+class AlertRule(BaseModel):
+    """Egy deklaratív riasztási szabály (pl. risk_score >= 80)."""
+    name: str
+    metric: Literal[tuple(METRIC_COLUMNS)]
+    op: Literal[tuple(_OPS)]
+    threshold: float
+    cooldown_s: float = 3600.0
+    coins: Optional[List[str]] = None  # Üres = az összes figyelt coin; id, szimbólum vagy név
+    severity: str = "warning"
+
+
+class WatchConfig(BaseModel):
+    coins: List[str] = Field(default_factory=list)
+    watchlist: Optional[str] = None
+    interval: int = 60
+    sink: str = "file"                 # file | webhook
+    sink_path: Optional[str] = None
+    webhook_url: Optional[str] = None
+    rules: List[AlertRule]
+
+
+def load_watch_config(path: str) -> WatchConfig:
+    """TOML (vagy JSON) konfiguráció beolvasása és validálása."""
+    path = Path(path)
+    if path.suffix == ".json":
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    else:
+        with open(path, "rb") as f:
+            raw = tomllib.load(f)
+    return WatchConfig(**raw.get("watch", {}), rules=raw.get("rules", []))
+
+
+class AlertEngine:
+    """
+    Vektorizált szabály kiértékelés: a coinok metrikái egy (C x M) mátrixban, a szabályok
+    paraméterei (R) hosszú tömbökben vannak, így egy tick egyetlen (C x R) tömbművelet.
+    Deduplikáció: csak a feltétel bekapcsolásakor (felfutó él) riaszt, és szabályonként
+    cooldown-t tart, így a folyamatosan fennálló vagy ugráló állapot nem spammel.
+    A szabályok coin listája a lokális CoinIndex-en keresztül oldódik fel (mint a --coins).
+    """
+
+    def __init__(self, rules: List[AlertRule], coin_ids: List[str], coin_index: Optional[CoinIndex] = None):
+        self.rules = rules
+        self.coin_ids = list(dict.fromkeys(coin_ids))
+        self._coin_index = {coin: i for i, coin in enumerate(self.coin_ids)}
+        n_coins, n_rules = len(self.coin_ids), len(rules)
+
+        self.metrics = np.full((n_coins, len(METRIC_COLUMNS)), np.nan)
+        self._metric_idx = np.array([_METRIC_INDEX[r.metric] for r in rules], dtype=int)
+        self._op = np.array([_OPS.index(r.op) for r in rules], dtype=int)
+        self._threshold = np.array([r.threshold for r in rules], dtype=float)
+        self._cooldown = np.array([r.cooldown_s for r in rules], dtype=float)
+
+        # Hatókör maszk: melyik szabály melyik coinra vonatkozik
+        self._scope = np.ones((n_coins, n_rules), dtype=bool)
+        for j, rule in enumerate(rules):
+            if rule.coins:
+                allowed, unresolved = set(), []
+                for query in rule.coins:
+                    coin_id = self._resolve(query, coin_index)
+                    if coin_id in self._coin_index:
+                        allowed.add(self._coin_index[coin_id])
+                    else:
+                        unresolved.append(query)
+                if unresolved:
+                    logger.warning(f"⚠️ A(z) '{rule.name}' szabály coinjai nem figyeltek / ismeretlenek: {', '.join(unresolved)}")
+                self._scope[:, j] = False
+                self._scope[list(allowed), j] = True
+
+        self._active = np.zeros((n_coins, n_rules), dtype=bool)
+        self._last_fired = np.full((n_coins, n_rules), -np.inf)
+
+    @staticmethod
+    def _resolve(query: str, coin_index: Optional[CoinIndex]) -> Optional[str]:
+        if coin_index is None:
+            return query
+        match = coin_index.resolve(query)
+        return match.id if match else None
+
+    def update(self, rows: Dict[str, Dict[str, Any]], changed: Optional[set] = None):
+        """A változott coinok metrika sorainak frissítése (changed=None: mind)."""
+        for coin_id in (changed if changed is not None else rows.keys()):
+            i = self._coin_index.get(coin_id)
+            row = rows.get(coin_id)
+            if i is None or row is None:
+                continue
+            self.metrics[i] = [np.nan if row.get(col) is None else row[col] for col in METRIC_COLUMNS]
+
+    def evaluate(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        now = time.time() if now is None else now
+        values = self.metrics[:, self._metric_idx]  # (C x R)
+        thr = self._threshold
+        with np.errstate(invalid="ignore"):
+            condition = np.select(
+                [self._op == 0, self._op == 1, self._op == 2, self._op == 3],
+                [values > thr, values >= thr, values < thr, values <= thr],
+                default=False,
+            )
+        condition &= self._scope & ~np.isnan(values)
+
+        fire = condition & ~self._active & ((now - self._last_fired) >= self._cooldown)
+        self._active = condition
+        self._last_fired[fire] = now
+
+        events = []
+        for i, j in zip(*np.nonzero(fire)):
+            rule = self.rules[j]
+            events.append({
+                "ts": now,
+                "coin": self.coin_ids[i],
+                "rule": rule.name,
+                "metric": rule.metric,
+                "op": rule.op,
+                "threshold": rule.threshold,
+                "value": float(values[i, j]),
+                "severity": rule.severity,
+            })
+        return events
+
+
+class FileAlertSink:
+    """Riasztások JSON Lines fájlba (alapból settings.LOG_DIR/alerts.jsonl)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else settings.LOG_DIR / "alerts.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    async def emit(self, events: List[Dict[str, Any]]):
+        if not events:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+
+    async def close(self):
+        pass
+
+
+class WebhookAlertSink:
+    """Riasztások POST-olása egy webhookra (egy kérés / tick)."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def emit(self, events: List[Dict[str, Any]]):
+        if not events:
+            return
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        try:
+            async with self._session.post(self.url, json={"alerts": events}, timeout=settings.API_TIMEOUT) as response:
+                if response.status >= 300:
+                    logger.error(f"Webhook hiba: {response.status}")
+        except Exception as e:
+            logger.error(f"A riasztások nem küldhetők a webhookra: {e}")
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def build_sink(config: WatchConfig):
+    if config.sink == "webhook":
+        if not config.webhook_url:
+            raise ValueError("A webhook sinkhez webhook_url szükséges.")
+        return WebhookAlertSink(config.webhook_url)
+    return FileAlertSink(config.sink_path)
@@ -0,0 +1,220 @@
+import asyncio
+import bisect
+import difflib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from loguru import logger
+from config.settings import settings
+from src.utils.telemetry import tracer
+
+_NO_RANK = 10**9
+
+
+class CoinMatch(NamedTuple):
+    """Egy feloldott azonosító: a CoinGecko id, a találat módja és a további jelöltek."""
+    id: str
+    symbol: str
+    name: str
+    rank: Optional[int]
+    method: str                  # id | symbol | name | prefix | fuzzy | passthrough
+    alternatives: tuple = ()     # Azonos szimbólumú / nevű, kisebb rangú coinok id-jai
+
+
+class CoinIndex:
+    """
+    A CoinGecko coin lista (id, szimbólum, név) + piaci rang lokális indexe.
+    A felhasználói bemenetet ("SOL", "solana", "Solana") hálózati hívás nélkül oldja fel:
+    pontos egyezés dict-ből, előtag bináris kereséssel, fuzzy a difflib-bel.
+    Azonos szimbólumnál (pl. több "ETH" token) a legjobb piaci rang nyer.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else settings.COIN_INDEX_PATH
+        self.updated_at: float = 0.0
+        self._coins: Dict[str, Dict[str, Any]] = {}
+        self._by_symbol: Dict[str, List[str]] = {}
+        self._by_name: Dict[str, List[str]] = {}
+        self._prefix_keys: List[str] = []     # Rendezett kulcsok (id / szimbólum / név, kisbetűs)
+        self._prefix_ids: List[str] = []
+        # Egyszerre egy frissítés (single-flight); sikertelen frissítés után COIN_INDEX_RETRY_BACKOFF szünet
+        self.failed_at: float = 0.0
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._refresh_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._background: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._coins)
+
+    # --- Felépítés / tárolás ---
+    def build(self, coin_list: Sequence[Dict[str, Any]], ranks: Optional[Dict[str, int]] = None,
+              updated_at: Optional[float] = None):
+        """Index felépítése a /coins/list válaszból és (opcionálisan) a /coins/markets rangokból."""
+        ranks = ranks or {}
+        self._coins = {
+            c['id']: {"id": c['id'], "symbol": (c.get('symbol') or "").lower(), "name": c.get('name') or c['id'],
+                      "rank": ranks.get(c['id'])}
+            for c in coin_list if c.get('id')
+        }
+        self.updated_at = updated_at or time.time()
+        self._reindex()
+
+    def _rank_key(self, coin_id: str) -> int:
+        return self._coins[coin_id]['rank'] or _NO_RANK
+
+    def _reindex(self):
+        self._by_symbol, self._by_name = {}, {}
+        pairs = []
+        for coin_id, coin in self._coins.items():
+            self._by_symbol.setdefault(coin['symbol'], []).append(coin_id)
+            self._by_name.setdefault(coin['name'].lower(), []).append(coin_id)
+            for key in {coin_id, coin['symbol'], coin['name'].lower()}:
+                if key:
+                    pairs.append((key, coin_id))
+        # Rang szerint rendezett jelöltlisták: az első elem a "legismertebb" coin
+        for bucket in (self._by_symbol, self._by_name):
+            for ids in bucket.values():
+                ids.sort(key=self._rank_key)
+        pairs.sort()
+        self._prefix_keys = [key for key, _ in pairs]
+        self._prefix_ids = [coin_id for _, coin_id in pairs]
+
+    def load(self) -> bool:
+        """A lemezen tárolt index betöltése (hálózat nélkül). False, ha nincs vagy sérült."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            self._coins = {c['id']: c for c in payload['coins']}
+            self.updated_at = float(payload.get('updated_at', 0))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if self.path.exists():
+                logger.warning(f"Coin index nem olvasható ({self.path}): {e}")
+            return False
+        self._reindex()
+        return True
+
+    def save(self):
+        """Atomi mentés (ideiglenes fájl + csere), így egy párhuzamos olvasó sosem lát félkész fájlt."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": self.updated_at, "coins": list(self._coins.values())}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def is_stale(self, max_age: Optional[float] = None) -> bool:
+        max_age = settings.COIN_INDEX_TTL if max_age is None else max_age
+        return not self._coins or time.time() - self.updated_at > max_age
+
+    async def refresh(self, cg_service, rank_universe: Optional[int] = None) -> bool:
+        """Új lista a /coins/list végpontról + rangok a toplistából; sikeres frissítés után mentés."""
+        rank_universe = settings.COIN_INDEX_RANKED if rank_universe is None else rank_universe
+        with tracer.span("coin_index.refresh") as span:
+            coin_list = await cg_service.get_coin_list()
+            if not coin_list:
+                self.failed_at = time.time()
+                logger.warning("A coin lista nem frissíthető, a meglévő index marad.")
+                return False
+            markets = await cg_service.get_top_markets(rank_universe) if rank_universe else []
+            ranks = {row['id']: row.get('market_cap_rank') for row in markets if row.get('market_cap_rank')}
+            self.build(coin_list, ranks)
+            span.set(coins=len(self._coins), ranked=len(ranks))
+        self.failed_at = 0.0
+        self.save()
+        logger.info(f"🗂️ Coin index frissítve: {len(self._coins)} coin ({len(ranks)} ranggal).")
+        return True
+
+    def backing_off(self) -> bool:
+        return bool(self.failed_at) and time.time() - self.failed_at < settings.COIN_INDEX_RETRY_BACKOFF
+
+    def _lock(self) -> asyncio.Lock:
+        """Eseményhurkonként egy lock (a CLI parancsok külön asyncio.run-ban futnak)."""
+        loop = asyncio.get_running_loop()
+        if self._refresh_lock is None or self._refresh_loop is not loop:
+            self._refresh_lock, self._refresh_loop = asyncio.Lock(), loop
+        return self._refresh_lock
+
+    async def _refresh_once(self, cg_service) -> bool:
+        """Single-flight frissítés: a lockra várók a már frissített (vagy épp kudarcot vallott) indexet kapják."""
+        async with self._lock():
+            if not self.is_stale() or self.backing_off():
+                return False
+            try:
+                return await self.refresh(cg_service)
+            except Exception as e:
+                self.failed_at = time.time()
+                logger.warning(f"Coin index frissítési hiba: {e}")
+                return False
+
+    async def ensure_fresh(self, cg_service) -> "CoinIndex":
+        """
+        Lemezről tölt; csak hiányzó vagy lejárt index esetén megy a hálózatra. Lejárt, de meglévő
+        indexnél nem várunk: abból oldunk fel, a frissítés a háttérben fut. Sikertelen frissítés
+        után COIN_INDEX_RETRY_BACKOFF másodpercig nem próbálkozunk újra.
+        """
+        if not self._coins:
+            self.load()
+        if not self.is_stale() or self.backing_off():
+            return self
+        if self._coins:
+            if self._background is None or self._background.done():
+                self._background = asyncio.create_task(self._refresh_once(cg_service))
+            return self
+        await self._refresh_once(cg_service)
+        return self
+
+    # --- Feloldás ---
+    def _match(self, ids: List[str], method: str) -> CoinMatch:
+        coin = self._coins[ids[0]]
+        return CoinMatch(coin['id'], coin['symbol'], coin['name'], coin['rank'], method, tuple(ids[1:]))
+
+    def _prefix(self, key: str, limit: int = 2000) -> List[str]:
+        start = bisect.bisect_left(self._prefix_keys, key)
+        ids = []
+        for i in range(start, min(start + limit, len(self._prefix_keys))):
+            if not self._prefix_keys[i].startswith(key):
+                break
+            ids.append(self._prefix_ids[i])
+        return sorted(dict.fromkeys(ids), key=self._rank_key)
+
+    def resolve(self, query: str, fuzzy_cutoff: float = 0.8) -> Optional[CoinMatch]:
+        """
+        Sorrend: pontos egyezés (id / szimbólum / név) -> előtag -> fuzzy.
+        Üres index mellett a bemenetet változatlanul továbbadjuk (passthrough).
+        """
+        key = (query or "").strip().lower()
+        if not key:
+            return None
+        if not self._coins:
+            return CoinMatch(key, "", key, None, "passthrough")
+        # Pontos egyezés bármelyik mezőn; ütközésnél a rang dönt (pl. egy "sol" id-jű ismeretlen
+        # token ne előzze meg a Solanát). Stabil rendezés: rang nélkül az id egyezés az első.
+        exact = list(dict.fromkeys(([key] if key in self._coins else [])
+                                   + self._by_symbol.get(key, []) + self._by_name.get(key, [])))
+        if exact:
+            exact.sort(key=self._rank_key)
+            winner = exact[0]
+            method = "id" if winner == key else ("symbol" if self._coins[winner]['symbol'] == key else "name")
+            return self._match(exact, method)
+        ids = self._prefix(key)
+        if ids:
+            return self._match(ids, "prefix")
+        # Fuzzy: csak az azonos kezdőbetűs kulcsok között (nagyságrenddel kevesebb összevetés)
+        lo = bisect.bisect_left(self._prefix_keys, key[0])
+        hi = bisect.bisect_left(self._prefix_keys, chr(ord(key[0]) + 1))
+        candidates = difflib.get_close_matches(key, self._prefix_keys[lo:hi], n=5, cutoff=fuzzy_cutoff)
+        ids = []
+        for candidate in candidates:
+            i = bisect.bisect_left(self._prefix_keys, candidate)
+            while i < len(self._prefix_keys) and self._prefix_keys[i] == candidate:
+                ids.append(self._prefix_ids[i])
+                i += 1
+        if ids:
+            return self._match(sorted(dict.fromkeys(ids), key=self._rank_key), "fuzzy")
+        return None
+
+    def resolve_many(self, queries: Sequence[str]) -> Dict[str, Optional[CoinMatch]]:
+        """Kötegelt feloldás (watchlist, --coins): bemenet -> találat (vagy None)."""
+        return {query: self.resolve(query) for query in dict.fromkeys(queries)}
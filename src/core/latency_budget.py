@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Union
+from loguru import logger
+from src.utils.telemetry import tracer
+
+
+class StageTimeout(Exception):
+    """Egy kötelező szakasz nem fért bele a keretébe."""
+
+
+class LatencyBudget:
+    """
+    Audit szintű határidő, szakaszonkénti (stage) kerettel.
+    Minden szakasz legfeljebb a saját részesedését kapja a teljes keretből, de soha
+    nem többet, mint ami a teljes határidőből még hátravan. A lejárt munkát megszakítjuk,
+    az opcionális bemeneteket pedig cache-ből pótoljuk vagy elhagyjuk, és ezt feljegyezzük.
+    A `reserve` szakaszok (pl. pdf) keretét előre félretesszük: a korábbi szakaszok
+    akkor sem élhetik fel, ha a saját részesedésüket teljesen kihasználják.
+    """
+
+    def __init__(self, total_s: float, shares: Dict[str, float], reserve: Iterable[str] = ()):
+        self.total_s = total_s
+        self.shares = shares
+        self.started = time.monotonic()
+        self.deadline = self.started + total_s
+        self.degraded: Dict[str, str] = {}
+        self._reserved = set(reserve)
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def stage_timeout(self, stage: str) -> float:
+        share = self.shares.get(stage, 1.0)
+        held = sum(self.total_s * self.shares.get(name, 0.0) for name in self._reserved if name != stage)
+        return max(0.0, min(self.total_s * share, self.remaining() - held))
+
+    def mark_degraded(self, stage: str, reason: str):
+        self.degraded[stage] = reason
+        logger.warning(f"⏱️ Degradált bemenet: {stage} ({reason})")
+
+    @staticmethod
+    def _discard(awaitable):
+        """El sem indított munka eldobása (ne maradjon 'never awaited' figyelmeztetés)."""
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        elif asyncio.isfuture(awaitable):
+            awaitable.cancel()
+
+    async def run(self, stage: str, coro: Awaitable, fallback: Union[Callable[[], Any], Any] = None,
+                  required: bool = False) -> Any:
+        """
+        Lefuttatja a szakaszt a keretén belül. Túllépéskor a munkát megszakítja (cancel);
+        kötelező szakasznál StageTimeout, opcionálisnál a fallback (cache vagy üres) érték jön vissza.
+        """
+        timeout = self.stage_timeout(stage)
+        self._reserved.discard(stage)
+        with tracer.span(f"stage.{stage}", budget_s=round(timeout, 3)) as span:
+            if timeout <= 0:
+                self._discard(coro)
+                reason = "budget exhausted"
+            else:
+                try:
+                    return await asyncio.wait_for(coro, timeout=timeout)
+                except asyncio.TimeoutError:
+                    reason = f"timeout {timeout:.1f}s"
+                except Exception as e:
+                    reason = f"error: {e}"
+
+            value = fallback() if callable(fallback) else fallback
+            span.set(degraded=reason, fallback="cache" if value else "dropped")
+            tracer.incr("stage_degraded_total", stage=stage)
+            if required and not value:
+                self.mark_degraded(stage, reason)
+                raise StageTimeout(f"{stage}: {reason}")
+            self.mark_degraded(stage, f"{reason}, {'cache' if value else 'dropped'}")
+            return value
@@ -1,33 +1,156 @@
+import asyncio
+import hashlib
+import time
 import ollama
-import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple, Type
 from loguru import logger
+from pydantic import BaseModel, ValidationError
 from config.settings import settings
+from src.core.llm_schemas import repair_json, response_format
+from src.utils.telemetry import tracer
+
+RETRY_INSTRUCTION = (
+    "Your previous reply could not be parsed. Reply with ONLY the JSON object "
+    "in the required structure, without code fences or extra text."
+)
 
 class LLMEngine:
     def __init__(self):
         self.model = settings.MODEL_NAME
         # Async kliens inicializálása
-        self.client = ollama.AsyncClient()
+        self.client = ollama.AsyncClient(host=settings.OLLAMA_HOST)
+        # Prompt előtagonként (rendszer prompt hash) az első, hideg prefill mérése:
+        # ebből becsüljük, mennyi prefill időt spórolt meg a KV cache a későbbi hívásokon
+        self._prefix_stats: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def route_models(route: str) -> List[str]:
+        """Egy parancs útvonalának modelljei sorrendben; a "small" / "large" álnevek a beállításokból jönnek."""
+        aliases = {"small": settings.SMALL_MODEL_NAME, "large": settings.MODEL_NAME}
+        models = [aliases.get(name, name) for name in settings.LLM_ROUTES.get(route, ["large"])]
+        return list(dict.fromkeys(models))
 
-    async def analyze_json(self, prompt: str, system_prompt: str) -> Dict[str, Any]:
+    async def analyze_routed(self, route: str, prompt: str, system_prompt: str, deadline: Optional[float] = None,
+                             **kwargs) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        LLM hívás a parancs saját útvonalán: a modelleket sorban próbáljuk, mindegyiket a route
+        időkorlátjával; időtúllépés vagy hiba esetén a következő modell jön.
+        deadline (time.monotonic() időpont, pl. az audit llm szakaszának vége): a hátralévő időt
+        egyenlően osztjuk a még hátralévő modellek között, így a tartalék modell is kap használható
+        keretet, és nem a külső szakasz időkorlátja szakítja meg.
+        (eredmény, a választ adó modell) párt ad; ha egyik sem sikerült, (hiba, None).
+        """
+        route_timeout = settings.LLM_ROUTE_TIMEOUTS.get(route)
+        result: Dict[str, Any] = {"error": f"no model configured for route '{route}'"}
+        models = self.route_models(route)
+        for i, model in enumerate(models):
+            timeout = route_timeout
+            if deadline is not None:
+                share = max(0.0, deadline - time.monotonic()) / (len(models) - i)
+                timeout = share if timeout is None else min(timeout, share)
+                if timeout <= 0:
+                    result = {"error": f"deadline exceeded before {model}"}
+                    break
+            try:
+                result = await asyncio.wait_for(self.analyze_json(prompt, system_prompt, model=model, **kwargs), timeout)
+            except asyncio.TimeoutError:
+                result = {"error": f"timeout after {timeout:.1f}s ({model})"}
+            if "error" not in result:
+                tracer.incr("llm_route_requests_total", route=route, model=model)
+                return result, model
+            if i + 1 < len(models):
+                logger.warning(f"LLM útvonal '{route}': {model} sikertelen ({result['error']}), váltás: {models[i + 1]}")
+                tracer.incr("llm_route_fallbacks_total", route=route, model=model)
+        return result, None
+
+    async def analyze_json(self, prompt: str, system_prompt: str, schema: Optional[Type[BaseModel]] = None,
+                           context: Optional[Dict[str, Any]] = None,
+                           retries: Optional[int] = None, model: Optional[str] = None) -> Dict[str, Any]:
         """
         Aszinkron LLM hívás JSON kimenettel.
+        A választ toleránsan javítjuk, és ha van séma, a mezőket pótoljuk / konvertáljuk;
+        új generálás csak akkor indul, ha semmi nem menthető (legfeljebb `retries` alkalommal).
         """
-        try:
-            logger.debug("Aszinkron LLM Elemzés indítása...")
-            response = await self.client.chat(
-                model=self.model,
-                format='json',
-                messages=[
-                    {'role': 'system', 'content': system_prompt},
-                    {'role': 'user', 'content': prompt}
-                ]
+        retries = settings.LLM_MAX_RETRIES if retries is None else retries
+        model = model or self.model
+        messages: List[Dict[str, str]] = [
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': prompt}
+        ]
+        problem = "empty response"
+        for attempt in range(retries + 1):
+            try:
+                logger.debug("Aszinkron LLM Elemzés indítása ({}/{})...", attempt + 1, retries + 1)
+                content = await self._chat(messages, response_format(schema, settings.LLM_STRUCTURED_OUTPUT), model)
+            except Exception as e:
+                logger.error(f"LLM Hiba: {type(e).__name__}: {e}")
+                return {"error": str(e)}
+
+            data = repair_json(content)
+            if data is None:
+                problem = "Invalid JSON response"
+            elif schema is None:
+                return data
+            else:
+                try:
+                    return schema.model_validate(data, context=context).model_dump()
+                except ValidationError as e:
+                    problem = f"Schema mismatch: {e.error_count()} error(s)"
+
+            # Kemény hiba: a javítás sem segített, újragenerálás a keret erejéig
+            logger.warning(f"Használhatatlan LLM válasz ({problem}), próba {attempt + 1}/{retries + 1}.")
+            tracer.incr("errors_total", service="llm", endpoint="invalid_json")
+            if attempt < retries:
+                tracer.incr("retries_total", service="llm", endpoint="chat")
+                messages = messages[:2] + [{'role': 'assistant', 'content': content[:2000]},
+                                           {'role': 'user', 'content': RETRY_INSTRUCTION}]
+
+        logger.error("Az LLM nem valid JSON-t küldött.")
+        return {"error": problem}
+
+    async def _chat(self, messages: List[Dict[str, str]], fmt: Any, model: Optional[str] = None) -> str:
+        model = model or self.model
+        prompt_chars = sum(len(m['content']) for m in messages)
+        with tracer.span("llm.chat", model=model, prompt_chars=prompt_chars) as span:
+            # keep_alive: a modell (és vele a prefix KV cache) betöltve marad a hívások között
+            response = await self.client.chat(model=model, format=fmt, messages=messages,
+                                              keep_alive=settings.LLM_KEEP_ALIVE)
+            content = response['message']['content'] or ""
+            # Az Ollama nanoszekundumban adja a prefill / generálás idejét
+            prompt_tokens = response.get('prompt_eval_count') or 0
+            prefill_ms = (response.get('prompt_eval_duration') or 0) / 1e6
+            span.set(
+                response_chars=len(content),
+                prompt_tokens=prompt_tokens,
+                output_tokens=response.get('eval_count'),
+                prefill_ms=prefill_ms,
+                generate_ms=(response.get('eval_duration') or 0) / 1e6,
             )
-            return json.loads(response['message']['content'])
-        except json.JSONDecodeError:
-            logger.error("Az LLM nem valid JSON-t küldött.")
-            return {"error": "Invalid JSON response"}
-        except Exception as e:
-            logger.exception(f"LLM Hiba: {e}")
-            return {"error": str(e)}
\ No newline at end of file
+            span.set(**self._prefix_reuse(model, messages[0]['content'], prompt_chars, prompt_tokens, prefill_ms))
+        return content
+
+    def _prefix_reuse(self, model: str, system_prompt: str, prompt_chars: int, prompt_tokens: int,
+                      prefill_ms: float) -> Dict[str, Any]:
+        """
+        Az Ollama a prompt_eval_count-ban csak a ténylegesen feldolgozott (nem cache-elt) tokeneket adja.
+        Az előtag első (hideg) hívásából token / karakter és ms / token arányt mérünk; később a várt
+        és a feldolgozott tokenek különbsége a megspórolt prefill.
+        """
+        key = hashlib.sha1(f"{model}\0{system_prompt}".encode()).hexdigest()[:12]
+        stats = self._prefix_stats.get(key)
+        if stats is None:
+            if prompt_tokens and prompt_chars:
+                self._prefix_stats[key] = {"tokens_per_char": prompt_tokens / prompt_chars,
+                                           "ms_per_token": prefill_ms / prompt_tokens}
+            tracer.incr("llm_prefix_requests_total", result="miss")
+            return {"prefix": key, "prefix_hit": False}
+
+        expected = prompt_chars * stats["tokens_per_char"]
+        saved_tokens = max(0.0, expected - prompt_tokens)
+        # Kis eltérés zaj; legalább a prompt negyede kell, hogy cache-ből jöjjön
+        hit = saved_tokens >= 0.25 * expected
+        saved_ms = saved_tokens * stats["ms_per_token"] if hit else 0.0
+        tracer.incr("llm_prefix_requests_total", result="hit" if hit else "miss")
+        if saved_ms:
+            tracer.incr("llm_prefill_saved_seconds_total", saved_ms / 1000)
+        return {"prefix": key, "prefix_hit": hit, "prefill_saved_ms": round(saved_ms, 1)}
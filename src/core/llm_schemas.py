@@ -0,0 +1,196 @@
+import ast
+import json
+import re
+from typing import Any, Dict, List, Literal, Optional, Type
+from pydantic import BaseModel, ValidationInfo, field_validator, model_validator
+
+# Az LLM válaszok parancsonkénti sémái + toleráns JSON javítás.
+# Cél: egy kissé hibás generálás (kódblokk, magyarázó szöveg, szimpla idézőjel,
+# hiányzó / rossz típusú mező) ne kerüljön egy teljes új LLM hívásba.
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_NUMBER_RE = re.compile(r"-?\d+(?:[.,]\d+)*")
+
+
+def _balanced_object(text: str) -> Optional[str]:
+    """Az első kiegyensúlyozott {...} blokk (idézőjeleken belüli zárójeleket kihagyva)."""
+    start = text.find("{")
+    if start < 0:
+        return None
+    depth, quote, escaped = 0, None, False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    # Csonka válasz (pl. max token): lezárjuk a nyitott objektumokat
+    return text[start:] + "}" * depth if depth > 0 and not quote else None
+
+
+def repair_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Toleráns JSON parse: előbb a gyors út (json.loads), utána kódblokk / körítő szöveg
+    levágása, záró vessző törlése, végül Python literál (szimpla idézőjel, True/None).
+    None, ha semmilyen objektum nem nyerhető ki.
+    """
+    if not text:
+        return None
+    try:
+        data = json.loads(text)
+        return data if isinstance(data, dict) else None
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    fence = _FENCE_RE.search(text)
+    candidate = _balanced_object(fence.group(1) if fence else text)
+    if candidate is None:
+        return None
+    candidate = _TRAILING_COMMA_RE.sub(r"\1", candidate)
+    try:
+        data = json.loads(candidate)
+    except json.JSONDecodeError:
+        try:
+            data = ast.literal_eval(re.sub(r"\btrue\b|\bfalse\b|\bnull\b",
+                                           lambda m: {"true": "True", "false": "False", "null": "None"}[m.group()],
+                                           candidate))
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            return None
+    return data if isinstance(data, dict) else None
+
+
+def _to_number(value: Any) -> Optional[float]:
+    """"85", "85/100", "$2,500", 85.0 -> szám; értelmezhetetlen -> None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _NUMBER_RE.search(value)
+        if match:
+            try:
+                return float(match.group().replace(",", ""))
+            except ValueError:
+                return None
+    return None
+
+
+def _to_str_list(value: Any) -> List[str]:
+    """Lista, egyetlen szöveg (soronként / felsorolásként) vagy dict -> szöveglista."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        items = [line.strip(" \t-*•") for line in re.split(r"\n|;", value)]
+        return [item for item in items if item]
+    if isinstance(value, dict):
+        return [f"{k}: {v}" for k, v in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if item not in (None, "")]
+    return [str(value)]
+
+
+_VERDICTS = {"safe": "Safe", "low risk": "Safe", "scam": "Scam", "high risk": "High Risk"}
+_VERDICT_RE = re.compile(r"\b(" + "|".join(sorted(_VERDICTS, key=len, reverse=True)) + r")\b")
+# Tagadás esetén ("Not safe", "Not a scam") nem találgatunk: a pontszám dönt
+_NEGATION_RE = re.compile(r"\b(not|no|non|never|isn't|isnt|without)\b")
+SAFE_SCORE_LIMIT = 40  # Ugyanaz a küszöb, mint a szabályalapú értékelésnél
+
+
+def _parse_verdict(value: Any) -> Optional[str]:
+    """
+    Egész szavas, tagadásmentes egyezés; ellentmondó vagy tagadott ítélet -> None.
+    Részszöveg egyezés itt veszélyes: "Unsafe" -> "Safe", "Low Risk" -> "High Risk".
+    """
+    text = re.sub(r"[^a-z' ]+", " ", str(value or "").lower()).strip()
+    if not text or _NEGATION_RE.search(text):
+        return None
+    found = {_VERDICTS[match] for match in _VERDICT_RE.findall(text)}
+    return found.pop() if len(found) == 1 else None
+
+
+def _score_band_verdict(score: int) -> str:
+    return "Safe" if score < SAFE_SCORE_LIMIT else "High Risk"
+
+
+class AuditAnalysis(BaseModel):
+    """Az audit LLM válasza; a hiányzó / hibás mezőket pótoljuk (a pontszámot az ML modellből)."""
+    verdict: Literal["Safe", "Scam", "High Risk"]
+    score: int
+    summary: str = ""
+    chart_analysis: str = ""
+    pros: List[str] = []
+    cons: List[str] = []
+
+    @model_validator(mode="before")
+    @classmethod
+    def _fill_missing(cls, data: Any, info: ValidationInfo) -> Any:
+        if not isinstance(data, dict):
+            return data
+        data = {str(k).strip().lower(): v for k, v in data.items()}
+        score = _to_number(data.get("score"))
+        verdict = _parse_verdict(data.get("verdict"))
+        if score is None and verdict is None:
+            raise ValueError("verdict és score is hiányzik")
+        if score is None:
+            score = (info.context or {}).get("score", 50)
+        score = int(round(min(max(score, 0), 100)))
+        data["score"] = score
+        # Kétértelmű vagy a pontszám sávjának ellentmondó ítélet helyett a pontszámból képzett
+        band = _score_band_verdict(score)
+        data["verdict"] = verdict if verdict and (verdict == "Safe") == (band == "Safe") else band
+        return data
+
+    @field_validator("summary", "chart_analysis", mode="before")
+    @classmethod
+    def _text(cls, value: Any) -> str:
+        if value is None:
+            return ""
+        return " ".join(_to_str_list(value)) if isinstance(value, (list, dict)) else str(value)
+
+    @field_validator("pros", "cons", mode="before")
+    @classmethod
+    def _items(cls, value: Any) -> List[str]:
+        return _to_str_list(value)
+
+
+class PortfolioPlan(BaseModel):
+    """A portfolio LLM válasza: eszköz -> USD összeg (pozitív számok)."""
+    allocation: Dict[str, float]
+    reasoning: str = ""
+
+    @field_validator("allocation", mode="before")
+    @classmethod
+    def _amounts(cls, value: Any) -> Dict[str, float]:
+        # [{"asset": "Bitcoin", "amount": 4000}, ...] formátum is előfordul
+        if isinstance(value, list):
+            value = {str(item.get("asset") or item.get("name")): item.get("amount") or item.get("amount_usd")
+                     for item in value if isinstance(item, dict)}
+        if not isinstance(value, dict):
+            raise ValueError("az allocation nem objektum")
+        amounts = {str(asset): _to_number(amount) for asset, amount in value.items()}
+        amounts = {asset: amount for asset, amount in amounts.items() if amount and amount > 0}
+        if not amounts:
+            raise ValueError("üres allocation")
+        return amounts
+
+    @field_validator("reasoning", mode="before")
+    @classmethod
+    def _text(cls, value: Any) -> str:
+        return "" if value is None else str(value)
+
+
+def response_format(schema: Optional[Type[BaseModel]], structured: bool) -> Any:
+    """Ollama `format` paraméter: JSON séma (kötött dekódolás) vagy sima 'json' mód."""
+    return schema.model_json_schema() if schema is not None and structured else "json"
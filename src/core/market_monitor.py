@@ -0,0 +1,104 @@
+import math
+import time
+import pandas as pd
+from typing import Dict, Any, List, Set, Tuple
+from loguru import logger
+from config.settings import settings
+from src.core.risk_engine import MARKET_SOURCE_COLUMNS
+
+# Nagyságrendi (pozitív) bemenetek: relatív lépésben kvantáljuk; a többi százalékos mező abszolút lépésben
+_RELATIVE_COLUMNS = {'current_price', 'market_cap', 'total_volume', 'high_24h', 'low_24h'}
+
+
+class MarketMonitor:
+    """
+    Hosszan futó piaci figyelő (élő dashboard, watch).
+    Minden frissítésnél kötegelten tölti le a watchlistet, de csak azokat a sorokat
+    pontozza újra, amelyek pontszámot befolyásoló bemenete érdemben (egy kvantálási lépésnél
+    többet) változott; kisebb ármozgásnál a sor a legutóbbi pontozás értékeit tartja.
+    Az állapot a watchlist méretével arányos (coinonként egy sor), így egész napos futásnál sem nő.
+    use_store=False: mindig élő pontozás, az előre kiszámolt tábla (RiskStore) kihagyásával.
+    """
+
+    def __init__(self, cg_service, risk_engine, coin_ids: List[str], use_store: bool = True):
+        self.cg_service = cg_service
+        self.risk_engine = risk_engine
+        self.use_store = use_store
+        # Sorrendtartó deduplikálás
+        self.coin_ids = list(dict.fromkeys(coin_ids))
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self._fingerprints: Dict[str, Tuple] = {}
+        self._model_version = None
+        self.last_refresh: float = 0.0
+        self.scored_last_tick = 0
+
+    @staticmethod
+    def _fingerprint(row: Dict[str, Any]) -> Tuple:
+        """
+        A pontozás bemeneteinek kvantált lenyomata: az ár szinte minden tickben változik, ezért
+        a nyers értékek helyett lépésekre kerekítünk (ár / forgalom relatívan, a %-os mezők abszolút).
+        """
+        rel_step = math.log1p(settings.MONITOR_REL_STEP_PCT / 100)
+        key = []
+        for col in MARKET_SOURCE_COLUMNS:
+            try:
+                value = float(row.get(col))
+            except (TypeError, ValueError):
+                key.append(None)
+                continue
+            if col == 'market_cap_rank':
+                key.append(value)
+            elif col in _RELATIVE_COLUMNS:
+                key.append(round(math.log(value) / rel_step) if value > 0 else None)
+            else:
+                key.append(round(value / settings.MONITOR_PCT_STEP))
+        return tuple(key)
+
+    async def refresh(self) -> Set[str]:
+        """Egy frissítési kör. A változott coinok azonosítóit adja vissza."""
+        market_rows = await self.cg_service.get_markets(self.coin_ids)
+        self.last_refresh = time.time()
+
+        # Modellcsere után mindent újrapontozunk, különben csak a változott bemenetűeket
+        model_changed = self.risk_engine.model_version != self._model_version
+        self._model_version = self.risk_engine.model_version
+
+        changed_rows = []
+        for row in market_rows:
+            coin_id = row.get('id')
+            if not coin_id:
+                continue
+            fingerprint = self._fingerprint(row)
+            if model_changed or self._fingerprints.get(coin_id) != fingerprint:
+                self._fingerprints[coin_id] = fingerprint
+                changed_rows.append(row)
+
+        self.scored_last_tick = len(changed_rows)
+        if not changed_rows:
+            return set()
+
+        frame = pd.DataFrame(changed_rows)
+        scored = self.risk_engine.score_market_frame(frame, use_store=self.use_store)
+        for row, score in zip(changed_rows, scored.to_dict('records')):
+            self.rows[row['id']] = {
+                "id": row['id'],
+                "name": row.get('name'),
+                "symbol": row.get('symbol'),
+                "market_cap_rank": row.get('market_cap_rank'),
+                "price": row.get('current_price') or 0,
+                "change_24h": row.get('price_change_percentage_24h') or 0,
+                "change_7d": float(score['price_change_percentage_7d_in_currency']),
+                "change_30d": float(score['price_change_percentage_30d_in_currency']),
+                "liquidity_ratio": float(score['liquidity_ratio']),
+                "volatility_24h_pct": float(score['volatility_24h_pct']),
+                "ath_drawdown_pct": float(score['ath_drawdown_pct']),
+                "risk_score": int(score['ml_score']),
+                "ml_active": bool(score['ml_active']),
+            }
+
+        logger.debug("Monitor frissítés: {} sor, {} újrapontozva.", len(market_rows), len(changed_rows))
+        return {row['id'] for row in changed_rows}
+
+    def sorted_rows(self) -> List[Dict[str, Any]]:
+        """Piaci kapitalizáció rang szerint (ismeretlen rang a végén)."""
+        return sorted(self.rows.values(), key=lambda r: r.get('market_cap_rank') or 10**9)
@@ -0,0 +1,116 @@
+import numpy as np
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+# A nyers piaci mezők: a nevük megegyezik a /coins/markets oszlopaival és a
+# risk_engine.MARKET_SOURCE_COLUMNS listájával, így a vektorizált feature számítás közös
+PRICE_FIELDS = (
+    'current_price', 'market_cap', 'total_volume', 'high_24h', 'low_24h',
+    'price_change_percentage_1h_in_currency', 'price_change_percentage_24h',
+    'price_change_percentage_7d_in_currency', 'price_change_percentage_30d_in_currency',
+    'ath_change_percentage',
+)
+# A radar ábra fejlesztői / közösségi dimenziói (csak a /coins/{id} válaszban)
+SOCIAL_FIELDS = ('dev_stars', 'twitter_followers')
+NUMERIC_FIELDS = ('market_cap_rank',) + PRICE_FIELDS + SOCIAL_FIELDS
+
+# Sok coin egy tömbben: 3 referencia + 14 float64 mező (~136 bájt / coin)
+SNAPSHOT_DTYPE = np.dtype(
+    [('id', object), ('name', object), ('symbol', object)] + [(name, np.float64) for name in NUMERIC_FIELDS]
+)
+
+
+def _num(value: Any) -> float:
+    """None / hiányzó / hibás érték -> 0.0 (ugyanaz az alapérték, mint a korábbi .get(..., 0) or 0 láncoknál)."""
+    try:
+        return float(value) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _usd(block: Dict[str, Any], key: str) -> float:
+    value = block.get(key)
+    return _num(value.get('usd') if isinstance(value, dict) else value)
+
+
+class MarketSnapshot:
+    """
+    Egy coin tömör, típusos pillanatképe: csak a kockázati, quant és riport kód által
+    használt mezők, plusz az angol leírás red flag összegzése (a leírás szövege nem marad meg).
+    A /coins/{id} teljes JSON dokumentuma (linkek, lokalizáció, teljes fejlesztői / közösségi blokk)
+    a feldolgozás után eldobható.
+    """
+
+    __slots__ = ('id', 'name', 'symbol', 'market_cap_rank', 'description_flags') + PRICE_FIELDS + SOCIAL_FIELDS
+
+    def __init__(self, id: Optional[str], name: Optional[str] = None, symbol: Optional[str] = None,
+                 market_cap_rank: Optional[int] = None, description_flags: Optional[Dict[str, Any]] = None,
+                 **values: float):
+        self.id = id
+        self.name = name
+        self.symbol = symbol
+        self.market_cap_rank = market_cap_rank
+        self.description_flags = description_flags
+        for field in PRICE_FIELDS + SOCIAL_FIELDS:
+            setattr(self, field, _num(values.get(field)))
+
+    def __repr__(self) -> str:
+        return f"MarketSnapshot(id={self.id!r}, rank={self.market_cap_rank}, price={self.current_price})"
+
+    @staticmethod
+    def _rank(value: Any) -> Optional[int]:
+        rank = _num(value)
+        return int(rank) if rank > 0 else None
+
+    @classmethod
+    def from_coin_payload(cls, payload: Dict[str, Any],
+                          scan: Optional[Callable[[Dict[str, str]], Dict[str, Any]]] = None) -> "MarketSnapshot":
+        """
+        A /coins/{id} válasz feldolgozása (a beágyazott blokkokat egyszer járjuk be).
+        A leírást itt, parse-kor vizsgáljuk (pl. RedFlagScanner.scan), és csak az összegzést tartjuk meg.
+        """
+        md = payload.get('market_data') or {}
+        description = (payload.get('description') or {}).get('en') or ""
+        return cls(
+            payload.get('id'), payload.get('name'), payload.get('symbol'), cls._rank(payload.get('market_cap_rank')),
+            description_flags=scan({"description": description}) if scan and description else None,
+            current_price=_usd(md, 'current_price'),
+            market_cap=_usd(md, 'market_cap'),
+            total_volume=_usd(md, 'total_volume'),
+            high_24h=_usd(md, 'high_24h'),
+            low_24h=_usd(md, 'low_24h'),
+            price_change_percentage_1h_in_currency=_usd(md, 'price_change_percentage_1h_in_currency'),
+            price_change_percentage_24h=_num(md.get('price_change_percentage_24h')),
+            price_change_percentage_7d_in_currency=_usd(md, 'price_change_percentage_7d_in_currency'),
+            price_change_percentage_30d_in_currency=_usd(md, 'price_change_percentage_30d_in_currency'),
+            ath_change_percentage=_usd(md, 'ath_change_percentage'),
+            dev_stars=_num((payload.get('developer_data') or {}).get('stars')),
+            twitter_followers=_num((payload.get('community_data') or {}).get('twitter_followers')),
+        )
+
+    @classmethod
+    def from_market_row(cls, row: Dict[str, Any]) -> "MarketSnapshot":
+        """Egy /coins/markets sor (lapos; fejlesztői / közösségi adat nélkül)."""
+        return cls(row.get('id'), row.get('name'), row.get('symbol'), cls._rank(row.get('market_cap_rank')),
+                   **{field: row.get(field) for field in PRICE_FIELDS})
+
+    @classmethod
+    def coerce(cls, data: Union["MarketSnapshot", Dict[str, Any]]) -> "MarketSnapshot":
+        """Snapshot változatlanul; dict esetén a formátum (részletes vagy markets sor) alapján parse-ol."""
+        if isinstance(data, MarketSnapshot):
+            return data
+        if any(key in data for key in ('market_data', 'developer_data', 'community_data')):
+            return cls.from_coin_payload(data)
+        return cls.from_market_row(data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+def to_structured(snapshots: Iterable[Union[MarketSnapshot, Dict[str, Any]]]) -> np.ndarray:
+    """Sok snapshot egyetlen NumPy structured array-ben (oszloponként vektorizálható)."""
+    items: List[MarketSnapshot] = [MarketSnapshot.coerce(s) for s in snapshots]
+    array = np.zeros(len(items), dtype=SNAPSHOT_DTYPE)
+    for i, snap in enumerate(items):
+        array[i] = (snap.id, snap.name, snap.symbol, snap.market_cap_rank or 0,
+                    *(getattr(snap, field) for field in PRICE_FIELDS + SOCIAL_FIELDS))
+    return array
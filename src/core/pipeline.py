@@ -0,0 +1,453 @@
+import asyncio
+import threading
+import time
+import pandas as pd
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from loguru import logger
+from config.settings import settings
+from src.utils.report_gen import ReportGenerator
+from src.core.latency_budget import LatencyBudget, StageTimeout
+from src.core.llm_schemas import AuditAnalysis, PortfolioPlan
+from src.core.screener import build_screen_frame
+from src.core.coin_index import CoinMatch
+from src.core.red_flags import RedFlagScanner
+from src.utils.telemetry import tracer
+
+# A dashboard alapértelmezett coinjai
+DEFAULT_DASHBOARD_COINS = ["bitcoin", "ethereum", "solana", "ripple", "pepe", "cardano"]
+PORTFOLIO_CANDIDATES = "Bitcoin, Ethereum, Solana, USDC, Pepe, Cardano, Polkadot, Chainlink"
+
+# Audit szintek: rules = nincs LLM, fast = kis modell, full = nagy modell, auto = döntés a bemenetek alapján
+AUDIT_TIERS = ("auto", "rules", "fast", "full")
+_TIER_ROUTES = {"fast": "audit_fast", "full": "audit_full"}
+
+# A matplotlib pyplot nem szálbiztos: egyszerre csak egy PDF renderelődik
+_PDF_RENDER_LOCK = threading.Lock()
+
+# Verziózott, stabil prompt előtag: rendszer prompt + kimeneti séma + tudásbázis.
+# Minden audit ugyanezzel kezdődik, így az Ollama a prefix KV cache-ét újra tudja használni;
+# az eszközspecifikus adatok a végén (user üzenet) jönnek. Tartalmi változáskor emeld a verziót.
+AUDIT_PROMPT_VERSION = "audit-v2"
+
+AUDIT_SYSTEM_PROMPT = (
+    "You are a Senior Quantitative Analyst at a top-tier Hedge Fund. "
+    "Write a highly professional institutional-grade risk report. "
+    "Use the provided Volatility, Max Drawdown, and Sharpe Ratio in your analysis. "
+    "Output STRICT JSON only."
+)
+
+AUDIT_OUTPUT_SPEC = (
+    "REQUIRED JSON OUTPUT STRUCTURE:\n"
+    "{\n"
+    '  "verdict": "Safe" or "Scam" or "High Risk",\n'
+    '  "score": (int 0-100),\n'
+    '  "summary": "Executive summary (Include mentions of Sharpe, Volatility and Drawdown)",\n'
+    '  "chart_analysis": "Technical analysis of volatility and momentum based on the quant metrics.",\n'
+    '  "pros": ["Institutional strength 1", "Strength 2"],\n'
+    '  "cons": ["Liquidity/Volatility Risk 1", "Risk 2"]\n'
+    "}"
+)
+
+
+class AnalysisPipeline:
+    """
+    A CLI parancsok és a lokális API szerver közös üzleti logikája.
+    A szolgáltatásokat kívülről kapja, így egy folyamaton belül (pl. serve módban)
+    a modell, a cache-ek és a connection poolok melegen maradnak a kérések között.
+    """
+
+    def __init__(self, cg_service, web_search, llm, rag, risk_engine, coin_index=None, red_flags=None):
+        self.cg_service = cg_service
+        self.web_search = web_search
+        self.llm = llm
+        self.rag = rag
+        self.risk_engine = risk_engine
+        # Opcionális lokális coin index (CoinIndex): szimbólum / név -> id hálózati hívás nélkül
+        self.coin_index = coin_index
+        # Determinisztikus red flag előszűrő a hírekre (LLM nélkül is fut); a leírást a CoinGeckoService
+        # már parse-kor vizsgálta, alapértelmezésben ugyanazzal az automatával
+        self.red_flags = red_flags or getattr(cg_service, "red_flags", None) or RedFlagScanner()
+
+    # --- Azonosító feloldás ---
+    async def resolve_coins(self, queries: List[str]) -> Dict[str, Optional[CoinMatch]]:
+        """
+        Felhasználói bemenetek ("SOL", "Solana", "solana") feloldása CoinGecko id-re.
+        Index nélkül a bemenet változatlanul megy tovább (a régi viselkedés).
+        """
+        if self.coin_index is None:
+            return {q: CoinMatch(q, "", q, None, "passthrough") for q in dict.fromkeys(queries)}
+        with tracer.span("coin_index.resolve", queries=len(queries)):
+            await self.coin_index.ensure_fresh(self.cg_service)
+            return self.coin_index.resolve_many(queries)
+
+    # --- Dashboard ---
+    async def market_overview(self, coins: Optional[List[str]] = None, concurrency: int = 2,
+                              on_progress: Optional[Callable[[], None]] = None) -> List[Dict[str, Any]]:
+        """Párhuzamos letöltés + ML pontozás; a megjelenítéshez szükséges sorokat adja vissza."""
+        coins = coins or DEFAULT_DASHBOARD_COINS
+        sem = asyncio.Semaphore(concurrency)
+
+        async def fetch_coin(coin: str):
+            async with sem:
+                # A Rate Limit védelmet a CoinGeckoService közös kerete adja
+                data = await self.cg_service.get_snapshot(coin)
+                if on_progress:
+                    on_progress()
+                return data
+
+        with tracer.span("dashboard.fetch", coins=len(coins)):
+            results = await asyncio.gather(*[fetch_coin(coin) for coin in coins])
+        market_data = [res for res in results if res is not None]
+        with tracer.span("dashboard.risk_scoring", coins=len(market_data)):
+            scores = self.risk_engine.calculate_risk_batch(market_data)
+
+        rows = []
+        for data, metrics in zip(market_data, scores):
+            rows.append({
+                "id": data.id,
+                "name": data.name,
+                "market_cap_rank": data.market_cap_rank,
+                "price": data.current_price,
+                "change_24h": data.price_change_percentage_24h,
+                "risk_score": metrics['quantitative_score'],
+                "ml_active": metrics.get('ml_active', False),
+            })
+        return rows
+
+    # --- Screener ---
+    async def market_screen(self, universe: Optional[int] = None):
+        """A piac első `universe` coinja, egy vektorizált pontozási lépéssel (DataFrame)."""
+        universe = universe or settings.SCREEN_UNIVERSE
+        with tracer.span("screen.fetch", universe=universe) as span:
+            rows = await self.cg_service.get_top_markets(universe)
+            span.set(coins=len(rows))
+        return build_screen_frame(rows, self.risk_engine)
+
+    # --- Előre kiszámolt kockázati tábla ---
+    async def precompute_risk(self, store, universe: Optional[int] = None) -> Dict[str, Any]:
+        """A toplista élő (store nélküli) pontozása és beírása a RiskStore-ba."""
+        universe = universe or settings.PRECOMPUTE_UNIVERSE
+        with tracer.span("precompute.fetch", universe=universe):
+            rows = await self.cg_service.get_top_markets(universe)
+        if not rows:
+            return {"coins": 0, "written": 0, "model_version": None}
+
+        frame = pd.DataFrame(rows)
+        with tracer.span("precompute.score", coins=len(frame)):
+            scored = self.risk_engine.score_market_frame(frame, use_store=False)
+        version = scored['model_version'].iloc[0]
+        if version is None:
+            # A régi matek olcsó, nincs mit előre kiszámolni
+            logger.warning("Nincs aktív ML modell, a precompute kimarad.")
+            return {"coins": len(frame), "written": 0, "model_version": None}
+
+        records = pd.DataFrame({
+            'id': frame['id'], 'risk_score': scored['ml_score'], 'liquidity_ratio': scored['liquidity_ratio'],
+            'volatility_24h_pct': scored['volatility_24h_pct'], 'ath_drawdown_pct': scored['ath_drawdown_pct'],
+        }).to_dict('records')
+        with tracer.span("precompute.write", rows=len(records)):
+            written = await asyncio.to_thread(store.write_batch, records, version)
+            await asyncio.to_thread(store.prune)
+        return {"coins": len(frame), "written": written, "model_version": version}
+
+    # --- Egyedi pontozás ---
+    async def score(self, coin_id: str) -> Optional[Dict[str, Any]]:
+        """Egy coin ML kockázati pontszáma és dimenziói (LLM nélkül)."""
+        match = (await self.resolve_coins([coin_id]))[coin_id]
+        if match is None:
+            return None
+        data = await self.cg_service.get_snapshot(match.id)
+        if not data:
+            return None
+        metrics = self.risk_engine.calculate_risk_metrics(data)
+        return {"id": data.id, "name": data.name, **metrics}
+
+    # --- Deep Audit ---
+    async def audit(self, token: str, render_pdf: bool = True,
+                    on_stage: Optional[Callable[[str], None]] = None,
+                    deadline: Optional[float] = None, tier: Optional[str] = None,
+                    days: Optional[int] = None, interval: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Az audit egy trace alatt fut; a trace_id-val a --profile szakaszonként bontja az időt.
+        A days / interval az ártörténet ablaka és felbontása (üres = HISTORY_DAYS / HISTORY_INTERVAL).
+        """
+        tier = tier or settings.AUDIT_DEFAULT_TIER
+        if tier not in AUDIT_TIERS:
+            raise ValueError(f"Ismeretlen audit szint: '{tier}' (elérhető: {', '.join(AUDIT_TIERS)})")
+        window = self.cg_service.history_window(days, interval)
+        with tracer.span("audit", token=token) as span:
+            result = await self._audit(token, render_pdf, on_stage, deadline, tier, window)
+            span.set(degraded=sorted(result.get("degraded") or {}), error=result.get("error"))
+        result["trace_id"] = span.trace_id
+        return result
+
+    async def _audit(self, token: str, render_pdf: bool, on_stage: Optional[Callable[[str], None]],
+                     deadline: Optional[float], requested_tier: str = "auto",
+                     window: Optional[Tuple[int, str]] = None) -> Dict[str, Any]:
+        """
+        Teljes audit: API adatok, ML + Quant metrikák, RAG + hírek, LLM elemzés, PDF.
+        Minden szakasz a teljes határidőből kapott keretén belül fut; az opcionális
+        bemeneteket (történelmi árak, hírek, tudásbázis) lejáratkor cache-ből pótoljuk
+        vagy elhagyjuk, és a "degraded" mezőben jelezzük. Az on_stage callback a CLI progress kijelzőjét frissíti.
+        """
+        stage = on_stage or (lambda _: None)
+        # A PDF keretét előre félretesszük: egy időtúllépő LLM után is legyen riport
+        budget = LatencyBudget(deadline or settings.AUDIT_DEADLINE, settings.AUDIT_STAGE_BUDGETS,
+                               reserve=("pdf",) if render_pdf else ())
+
+        # 0. AZONOSÍTÓ FELOLDÁS (lokális index; ismeretlen tokenre nincs API hívás)
+        match = (await self.resolve_coins([token]))[token]
+        if match is None:
+            return {"token": token, "error": "not_found", "degraded": budget.degraded}
+        resolution = {"id": match.id, "method": match.method, "alternatives": list(match.alternatives)}
+        coin_id = match.id
+
+        # 1. API ADATOK LETÖLTÉSE
+        stage("[cyan]1/4 API adatok és Történelmi árak letöltése...")
+        try:
+            data = await budget.run("coin_data", self.cg_service.get_snapshot(coin_id),
+                                    fallback=lambda: self.cg_service.get_cached_snapshot(coin_id), required=True)
+        except StageTimeout:
+            return {"token": token, "resolved": resolution, "error": "timeout", "degraded": budget.degraded}
+        if not data:
+            return {"token": token, "resolved": resolution, "error": "not_found", "degraded": budget.degraded}
+
+        # Történelmi árak, tudásbázis és hírek párhuzamosan, mind a saját keretével.
+        # Taskként azonnal elindulnak (és a keretük is most indul), az ML pontozás alatt is futnak.
+        days, interval = window or self.cg_service.history_window(None, None)
+        tasks = [
+            asyncio.create_task(budget.run(
+                "history", self.cg_service.get_historical_prices(data.id, days, interval),
+                fallback=lambda: self.cg_service.get_cached_history(data.id, days, interval))),
+            asyncio.create_task(budget.run("context", asyncio.to_thread(self.rag.load_context), fallback="")),
+            asyncio.create_task(budget.run("news", self.web_search.search_news(data.name), fallback="News unavailable.")),
+        ]
+
+        # 2. KVANTITATÍV ÉS ML ELEMZÉS (a letöltésekkel átfedésben)
+        stage("[blue]2/4 Machine Learning és Kvantitatív Pénzügyi metrikák...")
+
+        try:
+            # Machine Learning Kockázati Dimenziók (worker szálon, így az event loop közben a letöltéseket viszi)
+            with tracer.span("stage.risk_scoring"):
+                risk_data = await asyncio.to_thread(self.risk_engine.calculate_risk_metrics, data)
+
+            # Párhuzamos Történelmi árak, RAG (Tudásbázis) és Hírek (Web Search) bevárása
+            historical_prices, context, latest_news = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        # Red flag előszűrő: a leírás összegzése a snapshotból (parse-kor vizsgálva) + a hírek
+        # (csökkentett súllyal); az eredmény a kockázati pontszámba épül
+        red_flags = RedFlagScanner.merge(data.description_flags, self.red_flags.scan({"news": latest_news}))
+        risk_data = self.risk_engine.apply_red_flags(risk_data, red_flags)
+
+        # Kvantitatív (Quant Finance) Metrikák
+        with tracer.span("stage.quant_metrics", points=len(historical_prices or [])):
+            quant_metrics = self.risk_engine.get_quant_finance_metrics(historical_prices)
+
+        # 3. AI MOTOR (LLM) - szint: egyértelmű esetben nincs LLM / kis modell, határesetben nagy modell
+        if requested_tier == "auto":
+            tier, reason = self.choose_audit_tier(risk_data, quant_metrics)
+        else:
+            tier, reason = requested_tier, "requested"
+        tier_info = {"tier": tier, "requested": requested_tier, "reason": reason,
+                     "route": _TIER_ROUTES.get(tier), "model": None}
+        tracer.incr("audit_tier_total", tier=tier)
+
+        analysis = None
+        if tier != "rules":
+            models = self.llm.route_models(tier_info["route"])
+            stage(f"[magenta]3/4 AI Hedge Fund Elemzés ({tier}: {models[0]})...")
+            user_prompt = self.build_audit_prompt(data, risk_data, quant_metrics, latest_news)
+            # A modellenkénti időkorlát a szakasz hátralévő keretéből jön (a tartalék modell is kap időt)
+            analysis, tier_info["model"] = await budget.run("llm", self.llm.analyze_routed(
+                tier_info["route"], user_prompt, self.build_audit_system_prompt(context), schema=AuditAnalysis,
+                deadline=time.monotonic() + budget.stage_timeout("llm"),
+                context={"score": risk_data['quantitative_score']}), fallback=(None, None))
+        if analysis and "error" in analysis:
+            budget.mark_degraded("llm", f"error: {analysis['error']}")
+            analysis = None
+        if not analysis:
+            # Az LLM nélkül is készül riport: determinisztikus, ML + Quant alapú értékelés
+            analysis = self.rule_based_analysis(risk_data, quant_metrics)
+
+        # 4. RIPORT KÉSZÍTÉS (PDF + Képek)
+        stage("[green]4/4 PDF Riport és Bollinger Szalagok renderelése...")
+        pdf_path = None
+        if render_pdf:
+            pdf_path = await budget.run("pdf", asyncio.to_thread(
+                self._render_pdf,
+                time.monotonic() + budget.stage_timeout("pdf"),
+                data=analysis,
+                token_name=token,
+                historical_prices=historical_prices,
+                risk_dimensions=risk_data['dimensions'],
+                degraded=dict(budget.degraded),
+                red_flags=red_flags
+            ))
+
+        return {
+            "token": token,
+            "resolved": resolution,
+            "coin": {
+                "id": data.id,
+                "name": data.name,
+                "symbol": data.symbol,
+                "market_cap_rank": data.market_cap_rank,
+            },
+            "risk": risk_data,
+            "quant": quant_metrics,
+            "news": latest_news,
+            "analysis": analysis,
+            "tier": tier_info,
+            "pdf_path": str(pdf_path) if pdf_path else None,
+            "degraded": budget.degraded,
+            "elapsed_s": round(budget.elapsed(), 2),
+        }
+
+    @staticmethod
+    def quant_view(quant_metrics: Dict[str, Any]) -> str:
+        """A quant metrikák önálló ítélete: calm | risky | mixed | unknown (nincs elég idősor)."""
+        if quant_metrics.get('trend_status') == "Insufficient Data":
+            return "unknown"
+        volatility, drawdown = quant_metrics['annualized_volatility_pct'], quant_metrics['max_drawdown_pct']
+        if volatility >= settings.AUDIT_TIER_RISKY_VOLATILITY or drawdown <= settings.AUDIT_TIER_RISKY_DRAWDOWN:
+            return "risky"
+        if volatility <= settings.AUDIT_TIER_CALM_VOLATILITY and drawdown >= settings.AUDIT_TIER_CALM_DRAWDOWN:
+            return "calm"
+        return "mixed"
+
+    @classmethod
+    def choose_audit_tier(cls, risk_data: Dict[str, Any], quant_metrics: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Szintválasztás: ha az ML pontszám messze van a határtól és a quant metrikák ugyanazt mondják,
+        az LLM kimarad; közepesen biztos esetben a kis modell dolgozik; határesetben, ellentmondásnál
+        (pl. alacsony ML kockázat, de kritikus red flag) vagy ML modell nélkül a nagy modell.
+        """
+        score = risk_data['quantitative_score']
+        if not risk_data.get('ml_active'):
+            return "full", "no ML model (fallback scoring)"
+        view = cls.quant_view(quant_metrics)
+        low_risk = score < 50
+        critical_flags = (risk_data.get('red_flags') or {}).get('critical', 0)
+        if (low_risk and (view == "risky" or critical_flags)) or (not low_risk and view == "calm"):
+            return "full", f"ML score {score} contradicts quant ({view}) / red flags ({critical_flags} critical)"
+        margin = abs(score - 50)
+        if margin >= settings.AUDIT_TIER_SKIP_MARGIN and view == ("calm" if low_risk else "risky"):
+            return "rules", f"decisive ML score {score}, quant agrees ({view})"
+        if margin >= settings.AUDIT_TIER_FAST_MARGIN:
+            return "fast", f"confident ML score {score}, quant {view}"
+        return "full", f"borderline ML score {score}"
+
+    @staticmethod
+    def rule_based_analysis(risk_data: Dict[str, Any], quant_metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """Determinisztikus értékelés az ML pontszámból és a quant metrikákból (LLM nélkül)."""
+        score = risk_data['quantitative_score']
+        verdict = "Safe" if score < 40 else "High Risk"
+        dimensions = risk_data.get('dimensions', {})
+
+        pros = [f"{name}: {value}/10" for name, value in dimensions.items() if value >= 7]
+        cons = [f"{name}: {value}/10" for name, value in dimensions.items() if value <= 3]
+        if quant_metrics['max_drawdown_pct'] <= -30:
+            cons.append(f"Deep drawdown: {quant_metrics['max_drawdown_pct']}%")
+        if quant_metrics['annualized_volatility_pct'] >= 100:
+            cons.append(f"Extreme volatility: {quant_metrics['annualized_volatility_pct']}% annualized")
+        if quant_metrics['sharpe_ratio'] > 1:
+            pros.append(f"Positive risk-adjusted return (Sharpe {quant_metrics['sharpe_ratio']})")
+        for hit in (risk_data.get('red_flags') or {}).get('hits', []):
+            cons.append(f"Red flag ({hit['category'].replace('_', ' ')}): \"{hit['pattern']}\" in {hit['source']}")
+
+        return {
+            "verdict": verdict,
+            "score": score,
+            "summary": (
+                f"Rule-based assessment (no LLM analysis). ML risk score {score}/100, "
+                f"annualized volatility {quant_metrics['annualized_volatility_pct']}%, "
+                f"max drawdown {quant_metrics['max_drawdown_pct']}%, Sharpe {quant_metrics['sharpe_ratio']}, "
+                f"trend: {quant_metrics['trend_status']}."
+            ),
+            "chart_analysis": f"Trend: {quant_metrics['trend_status']}. Quantitative metrics only.",
+            "pros": pros,
+            "cons": cons,
+        }
+
+    @staticmethod
+    def _render_pdf(deadline: float, **kwargs):
+        """
+        PDF renderelés a közös zár alatt, a szakasz határidejéig. A lejárt (megszakított) audit
+        szála nem állítható le, a már futó renderelés végigér és addig fogja a zárat; a többi audit
+        viszont legfeljebb a saját határidejéig vár rá, és a határidő után már el sem kezd renderelni.
+        """
+        with tracer.span("pdf.lock_wait") as span:
+            acquired = _PDF_RENDER_LOCK.acquire(timeout=max(0.0, deadline - time.monotonic()))
+            span.set(acquired=acquired)
+        if not acquired:
+            raise TimeoutError("a PDF renderelő zár foglalt a határidőig")
+        try:
+            if time.monotonic() >= deadline:
+                raise TimeoutError("a határidő lejárt a zárra várva")
+            with tracer.span("pdf.render"):
+                return ReportGenerator.create_pdf(**kwargs)
+        finally:
+            _PDF_RENDER_LOCK.release()
+
+    @staticmethod
+    def build_audit_system_prompt(context: str) -> str:
+        """A stabil előtag: azonos tudásbázis mellett minden auditnál bájtra azonos."""
+        return (
+            f"[PROMPT {AUDIT_PROMPT_VERSION}]\n{AUDIT_SYSTEM_PROMPT}\n\n{AUDIT_OUTPUT_SPEC}\n\n"
+            f"RULES:\n{context or 'No external knowledge base available.'}"
+        )
+
+    @staticmethod
+    def build_audit_prompt(data: Dict[str, Any], risk_data: Dict[str, Any], quant_metrics: Dict[str, Any],
+                           latest_news: str) -> str:
+        """Az eszközspecifikus rész (a prompt vége, ezt az Ollama minden auditnál újra feldolgozza)."""
+        dimensions = risk_data['dimensions']
+        return (
+            f"ASSET: {data.name}\n"
+            f"ML RISK SCORE (Random Forest Model): {risk_data['quantitative_score']}/100\n"
+            f"--- QUANT METRICS ---\n"
+            f"Annualized Volatility: {quant_metrics['annualized_volatility_pct']}%\n"
+            f"Maximum Drawdown ({quant_metrics.get('window_days', 30):g}d): {quant_metrics['max_drawdown_pct']}%\n"
+            f"Sharpe Ratio Proxy: {quant_metrics['sharpe_ratio']}\n"
+            f"Liquidity Score (0-10): {dimensions.get('Liquidity Strength', 0)}\n"
+            f"Trend Status: {quant_metrics['trend_status']}\n"
+            f"Red Flags (deterministic keyword scan): {AnalysisPipeline._format_red_flags(risk_data.get('red_flags'))}\n"
+            f"---------------------\n"
+            f"NEWS: {latest_news}\n\n"
+            "Apply the RULES and answer in the REQUIRED JSON OUTPUT STRUCTURE."
+        )
+
+    @staticmethod
+    def _format_red_flags(red_flags: Optional[Dict[str, Any]]) -> str:
+        hits = (red_flags or {}).get('hits') or []
+        if not hits:
+            return "none detected"
+        return "; ".join(f"{hit['category']}: '{hit['pattern']}' ({hit['source']}, {hit['severity']})" for hit in hits[:8])
+
+    # --- Portfólió ---
+    async def portfolio(self, budget: int, strategy: str) -> Dict[str, Any]:
+        # Stabil előtag (jelöltek + séma), a kérésfüggő paraméterek a végén
+        system_prompt = (
+            "You are a Portfolio Manager. Output JSON only.\n"
+            f"Candidates available: {PORTFOLIO_CANDIDATES}\n\n"
+            "REQUIRED JSON OUTPUT STRUCTURE:\n"
+            "{\n"
+            '  "allocation": {"Asset Name": Amount_USD (int)},\n'
+            '  "reasoning": "Why you chose this distribution"\n'
+            "}"
+        )
+        user_prompt = (
+            f"Create a portfolio allocation for ${budget} USD.\n"
+            f"Strategy: {strategy} (Safe/Balanced/Risky)."
+        )
+        plan, _ = await self.llm.analyze_routed("portfolio", user_prompt, system_prompt, schema=PortfolioPlan)
+        return plan
+
+    async def close(self):
+        """Hálózati erőforrások elengedése."""
+        await self.cg_service.close()
+        logger.debug("Pipeline erőforrások lezárva.")
@@ -0,0 +1,64 @@
+import numpy as np
+from typing import Any, Dict, Iterator
+
+_MS_PER_DAY = 86_400_000.0
+_DAYS_PER_YEAR = 365.0
+
+
+class PriceSeries:
+    """
+    Egy coin ár idősora teljes felbontásban (időbélyeg ms + ár, két float64 tömb).
+    Listaként viselkedik (len, indexelés, bejárás), így a régi, árlistát váró kód változatlan;
+    a mintavételi sűrűségből (periods_per_year) évesít a quant számítás.
+    """
+
+    __slots__ = ('timestamps', 'prices', 'interval')
+
+    def __init__(self, timestamps: Any = (), prices: Any = (), interval: str = "daily"):
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.interval = interval
+
+    @classmethod
+    def from_market_chart(cls, payload: Dict[str, Any], interval: str = "daily") -> "PriceSeries":
+        """A /market_chart válasz [[timestamp_ms, ár], ...] listájából; a hiányzó árakat kihagyja."""
+        pairs = [p for p in (payload.get('prices') or []) if p and len(p) >= 2 and p[1] is not None]
+        if not pairs:
+            return cls(interval=interval)
+        array = np.asarray(pairs, dtype=np.float64)
+        return cls(array[:, 0], array[:, 1], interval)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PriceSeries(self.timestamps[index], self.prices[index], self.interval)
+        return float(self.prices[index])
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.prices.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        return self.prices if dtype is None else self.prices.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"PriceSeries(points={len(self)}, interval={self.interval!r}, span_days={self.span_days:.1f})"
+
+    @property
+    def span_days(self) -> float:
+        if len(self.timestamps) < 2:
+            return 0.0
+        return float(self.timestamps[-1] - self.timestamps[0]) / _MS_PER_DAY
+
+    @property
+    def periods_per_year(self) -> float:
+        """Évi megfigyelésszám a tényleges (medián) mintavételi lépésből: napi 365, óránkénti ~8760."""
+        if len(self.timestamps) < 2:
+            return _DAYS_PER_YEAR
+        step = float(np.median(np.diff(self.timestamps)))
+        return _DAYS_PER_YEAR * _MS_PER_DAY / step if step > 0 else _DAYS_PER_YEAR
+
+    def tolist(self) -> list:
+        return self.prices.tolist()
+
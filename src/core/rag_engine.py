@@ -2,10 +2,14 @@ import os
 from pathlib import Path
 from loguru import logger
 from config.settings import settings
+from src.utils.telemetry import tracer
 
 class RAGEngine:
     def __init__(self):
         self.kb_path = settings.KNOWLEDGE_BASE_DIR
+        # (fájlnév, mtime) aláírás -> összefűzött kontextus; csak változáskor olvasunk újra
+        self._cache_signature = None
+        self._cache_text = None
 
     def load_context(self) -> str:
         """
@@ -18,18 +22,27 @@ class RAGEngine:
                 logger.warning(f"Tudásbázis mappa nem található: {self.kb_path}")
                 return "No external knowledge base available."
 
-            files = list(self.kb_path.glob("*.txt"))
+            files = sorted(self.kb_path.glob("*.txt"))
             if not files:
                 logger.warning("A tudásbázis mappa üres.")
                 return "No external knowledge base available."
 
+            signature = tuple((f.name, f.stat().st_mtime_ns) for f in files)
+            if signature == self._cache_signature:
+                tracer.incr("cache_requests_total", cache="rag", result="hit")
+                return self._cache_text
+            tracer.incr("cache_requests_total", cache="rag", result="miss")
+
             logger.info(f"{len(files)} tudásbázis fájl beolvasása...")
             
-            for file_path in files:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                    context_text += f"\n--- KNOWLEDGE SOURCE: {file_path.name} ---\n{content}\n"
+            with tracer.span("rag.load", files=len(files)) as span:
+                for file_path in files:
+                    with open(file_path, "r", encoding="utf-8") as f:
+                        content = f.read()
+                        context_text += f"\n--- KNOWLEDGE SOURCE: {file_path.name} ---\n{content}\n"
+                span.set(chars=len(context_text))
             
+            self._cache_signature, self._cache_text = signature, context_text
             return context_text
 
         except Exception as e:
@@ -0,0 +1,259 @@
+import re
+import tomllib
+from bisect import bisect_right
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Literal, NamedTuple, Optional, Sequence, Tuple
+from pydantic import BaseModel, Field
+from loguru import logger
+from config.settings import settings
+from src.utils.telemetry import tracer
+
+SEVERITY_WEIGHTS = {"low": 5, "medium": 10, "high": 20, "critical": 35}
+Severity = Literal["low", "medium", "high", "critical"]
+
+# Tudásbázis szerkezet: "1. HONEYPOT SCAM:" szekciócím, alatta "- High Risk: ..." / "* ..." sorok
+_SECTION_RE = re.compile(r"^\s*\d+\.\s+(.+?):\s*$")
+_QUOTED_RE = re.compile(r'"([^"\n]{3,60})"')
+# Sor eleji jelölő -> súlyosság; a "Safe" / "Healthy" / "Gold Standard" sorok nem red flagek
+_LINE_SEVERITY = [
+    ("immediate red flag", "critical"), ("critical risk", "critical"), ("high risk", "high"),
+    ("red flag", "high"), ("suspicious", "high"), ("medium risk", "medium"), ("danger", "medium"), ("risk:", "medium"),
+]
+_SNIPPET_CHARS = 40
+
+
+class SignatureGroup(BaseModel):
+    """Egy kategória azonos súlyosságú kifejezései (a red_flags.toml [[signatures]] blokkja)."""
+    category: str
+    severity: Severity = "high"
+    weight: Optional[int] = None  # Üres = a súlyosság alapértéke
+    patterns: List[str]
+
+
+class ExtractConfig(BaseModel):
+    knowledge_base: bool = True
+    exclude: List[str] = Field(default_factory=list)
+
+
+class Signature(NamedTuple):
+    pattern: str      # Normalizált (kisbetűs, egyszeres szóközös) kifejezés
+    category: str
+    severity: str
+    weight: int
+    source: str       # "declared" vagy a tudásbázis fájl neve
+
+
+def normalize(text: str) -> str:
+    """Kisbetűs, egyszeres szóközös alak (a kifejezések és a szöveg ugyanígy készül)."""
+    return " ".join(str(text).lower().split())
+
+
+def _slug(title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", title.lower()).strip("_")
+
+
+def extract_kb_signatures(kb_dir: Path, exclude: Sequence[str] = ()) -> List[Signature]:
+    """
+    Kifejezések a tudásbázisból: a kockázatot jelölő sorok (indikátor felsorolás, "High Risk:",
+    "Red Flag:" stb.) idézőjeles részei, a szekciócímből képzett kategóriával.
+    """
+    excluded = {normalize(e) for e in exclude}
+    signatures: List[Signature] = []
+    for path in sorted(Path(kb_dir).glob("*.txt")):
+        category = _slug(path.stem)
+        for line in path.read_text(encoding="utf-8").splitlines():
+            section = _SECTION_RE.match(line)
+            if section:
+                category = _slug(section.group(1))
+                continue
+            stripped = line.strip().lstrip("-").strip().lower()
+            severity = next((sev for marker, sev in _LINE_SEVERITY if marker in stripped), None)
+            if severity is None and stripped.startswith("*"):
+                severity = "high"  # Indikátor felsorolás egy csalási minta alatt
+            if severity is None:
+                continue
+            for phrase in _QUOTED_RE.findall(line):
+                pattern = normalize(phrase)
+                if pattern and pattern not in excluded:
+                    signatures.append(Signature(pattern, category, severity, SEVERITY_WEIGHTS[severity], path.name))
+    return signatures
+
+
+def load_signatures(path: Optional[Path] = None, kb_dir: Optional[Path] = None) -> List[Signature]:
+    """A deklarált (TOML) és a tudásbázisból kinyert szignatúrák; azonos kifejezésnél a deklarált nyer."""
+    path = Path(path) if path else settings.RED_FLAG_SIGNATURES
+    kb_dir = Path(kb_dir) if kb_dir else settings.KNOWLEDGE_BASE_DIR
+    raw: Dict[str, Any] = {}
+    if path.exists():
+        with open(path, "rb") as f:
+            raw = tomllib.load(f)
+    extract = ExtractConfig(**raw.get("extract", {}))
+
+    declared = []
+    for group in (SignatureGroup(**g) for g in raw.get("signatures", [])):
+        weight = group.weight if group.weight is not None else SEVERITY_WEIGHTS[group.severity]
+        declared += [Signature(normalize(p), group.category, group.severity, weight, "declared")
+                     for p in group.patterns if normalize(p)]
+    extracted = extract_kb_signatures(kb_dir, extract.exclude) if extract.knowledge_base and kb_dir.exists() else []
+
+    unique: Dict[str, Signature] = {}
+    for signature in declared + extracted:
+        unique.setdefault(signature.pattern, signature)
+    return list(unique.values())
+
+
+class AhoCorasick:
+    """
+    Klasszikus Aho-Corasick automata: az összes kifejezés egy trie-ban, hibalinkekkel,
+    így a szöveg egyetlen lineáris menetben kerül összevetésre az összes mintával.
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for idx, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append(idx)
+
+        # Hibalinkek szélességi bejárással; a kimenetek öröklődnek a hibalink mentén
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if state else 0
+                outputs[nxt] += outputs[fail[nxt]]
+
+        self._goto, self._fail = goto, fail
+        self._outputs = [tuple(out) for out in outputs]
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(vég pozíció, minta index) párok; a vég pozíció kizáró."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for idx in outputs[state]:
+                yield i + 1, idx
+
+
+class RedFlagScanner:
+    """
+    Determinisztikus red flag előszűrő: a szignatúrák (red_flags.toml + tudásbázis) egy
+    automatává fordítva, a coin leírása és a hírek egyetlen menetben. LLM nélkül is működik;
+    a szignatúra fájlok változásakor (mtime) újrafordít, mint a RAGEngine.
+    """
+
+    def __init__(self, path: Optional[Path] = None, kb_dir: Optional[Path] = None):
+        self.path = Path(path) if path else settings.RED_FLAG_SIGNATURES
+        self.kb_dir = Path(kb_dir) if kb_dir else settings.KNOWLEDGE_BASE_DIR
+        self._cache_signature = None
+        self.signatures: List[Signature] = []
+        self._automaton: Optional[AhoCorasick] = None
+
+    def _files_signature(self) -> Tuple:
+        files = [self.path] + (sorted(self.kb_dir.glob("*.txt")) if self.kb_dir.exists() else [])
+        return tuple((str(f), f.stat().st_mtime_ns) for f in files if f.exists())
+
+    def compile(self) -> AhoCorasick:
+        signature = self._files_signature()
+        if self._automaton is not None and signature == self._cache_signature:
+            return self._automaton
+        with tracer.span("red_flags.compile") as span:
+            self.signatures = load_signatures(self.path, self.kb_dir)
+            self._automaton = AhoCorasick([s.pattern for s in self.signatures])
+            span.set(signatures=len(self.signatures), states=len(self._automaton))
+        self._cache_signature = signature
+        logger.debug("Red flag automata: {} szignatúra, {} állapot.", len(self.signatures), len(self._automaton))
+        return self._automaton
+
+    def scan(self, texts: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """
+        Forrásonkénti szövegek (pl. description, news) -> strukturált red flag összegzés.
+        A források egy szövegbe fűzve (\\x00 határolóval) egy menetben futnak; a találat
+        forrását a kezdőpozíciók bináris keresése adja. Csak teljes szavas egyezés számít.
+        A találat súlyát a forrás súlya (RED_FLAG_SOURCE_WEIGHTS) skálázza.
+        """
+        automaton = self.compile()
+        source_weights = settings.RED_FLAG_SOURCE_WEIGHTS
+        names, starts, parts, offset = [], [], [], 0
+        for name, text in texts.items():
+            if not text:
+                continue
+            part = normalize(text)
+            names.append(name)
+            starts.append(offset)
+            parts.append(part)
+            offset += len(part) + 1
+        combined = "\x00".join(parts)
+
+        hits: Dict[int, Dict[str, Any]] = {}
+        with tracer.span("red_flags.scan", chars=len(combined)) as span:
+            for end, idx in automaton.iter_matches(combined):
+                signature = self.signatures[idx]
+                start = end - len(signature.pattern)
+                if (signature.pattern[0].isalnum() and start > 0 and combined[start - 1].isalnum()) or \
+                        (signature.pattern[-1].isalnum() and end < len(combined) and combined[end].isalnum()):
+                    continue  # Szórész ("team" a "steam"-ben)
+                hit = hits.get(idx)
+                if hit is None:
+                    source_no = bisect_right(starts, start) - 1
+                    lo = max(starts[source_no], start - _SNIPPET_CHARS)
+                    snippet = combined[lo:end + _SNIPPET_CHARS].split("\x00", 1)[0]
+                    hits[idx] = {
+                        "pattern": signature.pattern, "category": signature.category,
+                        "severity": signature.severity,
+                        "weight": round(signature.weight * source_weights.get(names[source_no], 1.0)),
+                        "source": names[source_no], "origin": signature.source,
+                        "count": 1, "snippet": snippet,
+                    }
+                else:
+                    hit["count"] += 1
+            span.set(hits=len(hits))
+
+        for hit in hits.values():
+            tracer.incr("red_flag_hits_total", category=hit["category"])
+        return self.summarize(hits.values())
+
+    @staticmethod
+    def summarize(hits: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Találatok -> összegzés. Kritikusnak (ami az audit szintet eszkalálja) csak a teljes
+        súlyú forrás (a coin saját leírása) kritikus találata számít, a hírekben szereplő nem.
+        """
+        ordered = sorted(hits, key=lambda h: (-h["weight"], h["pattern"]))
+        categories: Dict[str, int] = {}
+        for hit in ordered:
+            categories[hit["category"]] = categories.get(hit["category"], 0) + hit["count"]
+        return {
+            "score": min(100, sum(hit["weight"] for hit in ordered)),
+            "count": len(ordered),
+            "critical": sum(hit["severity"] == "critical"
+                            and settings.RED_FLAG_SOURCE_WEIGHTS.get(hit["source"], 1.0) >= 1.0 for hit in ordered),
+            "categories": categories,
+            "hits": ordered,
+        }
+
+    @classmethod
+    def merge(cls, *reports: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Külön futott vizsgálatok (pl. a parse-kor vizsgált leírás + a hírek) közös összegzése."""
+        return cls.summarize(hit for report in reports if report for hit in report.get("hits", []))
@@ -1,114 +1,357 @@
 import os
+import json
+import threading
 import joblib
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from pathlib import Path
+from typing import Dict, Any, List, NamedTuple, Optional, Sequence, Tuple, Union
 from loguru import logger
+from config.settings import settings
+from src.ml_engine.model_registry import LEGACY_MODEL_FILE, LEGACY_SCALER_FILE, POINTER_FILE
+from src.core.market_snapshot import MarketSnapshot, to_structured
+from src.core.price_series import PriceSeries
+from src.utils.telemetry import tracer
+
+# A modell által tanult feature-ök, pontosan a tanítási sorrendben
+FEATURE_COLUMNS = [
+    'market_cap_rank', 'current_price', 'market_cap', 'total_volume', 'liquidity_ratio',
+    'volatility_24h_pct', 'price_change_percentage_1h_in_currency', 'price_change_percentage_24h',
+    'price_change_percentage_7d_in_currency', 'price_change_percentage_30d_in_currency', 'ath_drawdown_pct'
+]
+
+# A /coins/markets sorok (és a snapshot CSV-k) nyers oszlopai, amikből a feature-ök számolódnak
+MARKET_SOURCE_COLUMNS = [
+    'market_cap_rank', 'current_price', 'market_cap', 'total_volume', 'high_24h', 'low_24h',
+    'price_change_percentage_1h_in_currency', 'price_change_percentage_24h',
+    'price_change_percentage_7d_in_currency', 'price_change_percentage_30d_in_currency', 'ath_change_percentage'
+]
+
+# Füstteszt (smoke batch): egy új modell csak akkor élesedik, ha ezekre értelmes valószínűséget ad
+SMOKE_BATCH = pd.DataFrame([
+    # Nagy, likvid coin
+    [1, 65000.0, 1.3e12, 3.6e10, 0.028, 3.5, -0.4, -1.7, -2.8, -27.0, -47.0],
+    # Közepes altcoin
+    [150, 0.85, 4.0e8, 2.5e7, 0.062, 8.0, 0.3, 4.2, 12.0, -5.0, -80.0],
+    # Halott / pump & dump gyanús token
+    [950, 0.0004, 1.2e6, 9.0e3, 0.0075, 45.0, -3.0, -25.0, -40.0, -70.0, -99.0],
+], columns=FEATURE_COLUMNS)
+
+
+class ModelBundle(NamedTuple):
+    """Egy betöltött modell verzió. Változatlan, így egy batch végig ugyanazt látja."""
+    model: Any
+    scaler: Any
+    version: str
+    signature: Tuple
+
 
 class RiskEngine:
-    def __init__(self):
+    def __init__(self, model_dir: Optional[Path] = None, store=None):
+        # Opcionális előre kiszámolt pontszám tábla (RiskStore); friss bejegyzésnél nincs inferencia
+        self.store = store
         # 1. Betöltjük a betanított Machine Learning modellt és a skálázót
-        self.model_path = "data/models/rf_risk_model.pkl"
-        self.scaler_path = "data/models/scaler.pkl"
-        self.ml_enabled = False
-        self.model = None
-        self.scaler = None
-        
-        if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
+        # (a registry CURRENT mutatója alapján, ha van; különben a régi fix útvonalakról)
+        self.model_dir = Path(model_dir) if model_dir else settings.MODEL_DIR
+        self.model_path = self.model_dir / LEGACY_MODEL_FILE
+        self.scaler_path = self.model_dir / LEGACY_SCALER_FILE
+        self._bundle: Optional[ModelBundle] = None
+        # Az utoljára elutasított verzió aláírása: ugyanazt a hibás fájlt nem töltjük újra minden körben
+        self._rejected_signature: Optional[Tuple] = None
+        self._reload_lock = threading.Lock()
+        self._watch_stop = threading.Event()
+        self._watch_thread: Optional[threading.Thread] = None
+
+        source = self._resolve_source()
+        if source is None:
+            logger.warning("ML modell nem található. Visszatérés a statikus algoritmushoz.")
+            return
+        try:
+            # Induláskor is ugyanaz a füstteszt fut, mint hot reloadnál
+            bundle = self._load_bundle()
+            self._validate_bundle(bundle)
+            self._bundle = bundle
+            logger.info(f"🤖 Machine Learning Modell sikeresen csatlakoztatva a Risk Engine-hez! ({self._bundle.version})")
+        except Exception as e:
+            self._rejected_signature = source[3]
+            logger.error(f"Hiba az ML modell betöltésekor, statikus algoritmus marad: {e}")
+
+    # --- A régi attribútumok, most az aktuális bundle-ből ---
+    @property
+    def ml_enabled(self) -> bool:
+        return self._bundle is not None
+
+    @property
+    def model(self):
+        return self._bundle.model if self._bundle else None
+
+    @property
+    def scaler(self):
+        return self._bundle.scaler if self._bundle else None
+
+    @property
+    def model_version(self) -> Optional[str]:
+        return self._bundle.version if self._bundle else None
+
+    # --- Hot reload ---
+    def _resolve_source(self) -> Optional[Tuple[Path, Path, str, Tuple]]:
+        """
+        Megmondja, honnan kell a modellt tölteni, és ad egy olcsó aláírást (mtime/méret),
+        amiből a watcher látja, hogy változott-e valami. Ha van CURRENT mutató, csak azon
+        keresztül töltünk: a régi útvonalakra a registry két külön lépésben másol, ott egy
+        pillanatra új skálázó állhat a régi modell mellett.
+        """
+        pointer_path = self.model_dir / POINTER_FILE
+        if pointer_path.exists():
             try:
-                self.model = joblib.load(self.model_path)
-                self.scaler = joblib.load(self.scaler_path)
-                self.ml_enabled = True
-                logger.info("🤖 Machine Learning Modell sikeresen csatlakoztatva a Risk Engine-hez!")
+                with open(pointer_path, "r", encoding="utf-8") as f:
+                    version = json.load(f)["version"]
+                version_dir = self.model_dir / "registry" / version
+                model_path, scaler_path = version_dir / LEGACY_MODEL_FILE, version_dir / LEGACY_SCALER_FILE
+                if model_path.exists() and scaler_path.exists():
+                    return model_path, scaler_path, version, ("registry", version)
+                logger.warning(f"A CURRENT mutató hiányos verzióra mutat: {version}")
             except Exception as e:
-                logger.error(f"Hiba az ML modell betöltésekor: {e}")
-        else:
-            logger.warning("ML modell nem található. Visszatérés a statikus algoritmushoz.")
+                logger.warning(f"A registry mutató nem olvasható: {e}")
+            return None
+
+        if self.model_path.exists() and self.scaler_path.exists():
+            m, s = self.model_path.stat(), self.scaler_path.stat()
+            signature = ("legacy", m.st_mtime_ns, m.st_size, s.st_mtime_ns, s.st_size)
+            return self.model_path, self.scaler_path, "legacy", signature
+        return None
+
+    def _load_bundle(self) -> ModelBundle:
+        model_path, scaler_path, version, signature = self._resolve_source()
+        return ModelBundle(joblib.load(model_path), joblib.load(scaler_path), version, signature)
+
+    @staticmethod
+    def _validate_bundle(bundle: ModelBundle):
+        """Füstteszt: a feature séma egyezik, és a kimenet véges valószínűség."""
+        expected = getattr(bundle.scaler, "feature_names_in_", None)
+        if expected is not None and list(expected) != FEATURE_COLUMNS:
+            raise ValueError(f"Eltérő feature séma: {list(expected)}")
+        probabilities = bundle.model.predict_proba(bundle.scaler.transform(SMOKE_BATCH))
+        if probabilities.shape != (len(SMOKE_BATCH), 2):
+            raise ValueError(f"Váratlan predict_proba alak: {probabilities.shape}")
+        if not np.all(np.isfinite(probabilities)) or probabilities.min() < 0 or probabilities.max() > 1:
+            raise ValueError("A modell érvénytelen valószínűségeket ad a füstteszten.")
+
+    def reload_if_changed(self) -> bool:
+        """
+        Ha a modell fájlok / a registry mutató változott, betölti és validálja az új verziót,
+        majd egyetlen referencia cserével élesíti. A futó pontozás közben sem áll meg.
+        """
+        with self._reload_lock:
+            source = self._resolve_source()
+            if source is None:
+                return False
+            current = self._bundle.signature if self._bundle else None
+            if source[3] in (current, self._rejected_signature):
+                return False
+            try:
+                candidate = self._load_bundle()
+                self._validate_bundle(candidate)
+            except Exception as e:
+                self._rejected_signature = source[3]
+                logger.error(f"Az új modell verzió elutasítva, marad a régi ({self.model_version}): {e}")
+                return False
+
+            previous = self.model_version
+            self._bundle = candidate  # Atomikus referencia csere
+            logger.success(f"🔄 ML modell frissítve: {previous} -> {candidate.version}")
+            return True
+
+    def start_watching(self, interval: Optional[float] = None):
+        """Háttérszálon figyeli a modell artefaktumokat (hosszan futó folyamatokhoz)."""
+        if self._watch_thread and self._watch_thread.is_alive():
+            return
+        interval = interval or settings.MODEL_RELOAD_INTERVAL
+        self._watch_stop.clear()
+
+        def _watch_loop():
+            while not self._watch_stop.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    logger.error(f"Hiba a modell figyelése közben: {e}")
+
+        self._watch_thread = threading.Thread(target=_watch_loop, name="risk-model-watcher", daemon=True)
+        self._watch_thread.start()
+        logger.info(f"👀 Modell figyelés elindítva ({interval}s)")
 
-    def calculate_risk_metrics(self, market_data: Dict[str, Any]) -> Dict[str, Any]:
+    def stop_watching(self):
+        self._watch_stop.set()
+        if self._watch_thread:
+            self._watch_thread.join(timeout=5)
+            self._watch_thread = None
+
+    # --- Pontozás ---
+    @staticmethod
+    def _predict_scores(bundle: ModelBundle, features: pd.DataFrame) -> np.ndarray:
+        """Vektorizált predikció: egy skálázás + egy predict_proba az egész batch-re."""
+        # Skálázás (Normalizálás)
+        X_scaled = bundle.scaler.transform(features[FEATURE_COLUMNS])
+        # Predikció: A predict_proba megmondja a valószínűségeket [Safe %, Scam/Risk %]
+        scam_probability = bundle.model.predict_proba(X_scaled)[:, 1]  # A 2. oszlop a Scam/Risk esélye
+        # Konvertáljuk 0-100-as skálára
+        return np.clip((scam_probability * 100).astype(int), 0, 100)
+
+    def calculate_risk_metrics(self, market_data: Union[MarketSnapshot, Dict[str, Any]]) -> Dict[str, Any]:
         """Komplex, többdimenziós kockázatelemzés Machine Learning predikcióval."""
-        try:
-            # --- 1. Alapadatok és régi dimenziók (A Radar Chart-hoz) ---
-            price_change = market_data.get('market_data', {}).get('price_change_percentage_24h', 0) or 0
-            mcap_rank = market_data.get('market_cap_rank', 1000) or 1000
-            dev_stars = market_data.get('developer_data', {}).get('stars', 0) or 0
-            twitter_followers = market_data.get('community_data', {}).get('twitter_followers', 0) or 0
-            
-            volume = market_data.get('market_data', {}).get('total_volume', {}).get('usd', 0) or 0
-            mcap = market_data.get('market_data', {}).get('market_cap', {}).get('usd', 1) or 1
-            liquidity_ratio = volume / mcap if mcap > 0 else 0
-
-            # Dimenziók pontozása (0-10) a pókháló ábrához
-            volatility_score = max(0, 10 - (abs(price_change) / 2))
-            liquidity_score = min(10, (liquidity_ratio * 100))
-            market_score = 10 if mcap_rank <= 10 else max(0, 10 - (mcap_rank / 50))
-            dev_score = min(10, dev_stars / 500)
-            community_score = min(10, twitter_followers / 50000)
-
-            dimensions = {
-                "Volatility Safety": round(volatility_score, 1),
-                "Liquidity Strength": round(liquidity_score, 1),
-                "Market Position": round(market_score, 1),
-                "Development": round(dev_score, 1),
-                "Community": round(community_score, 1)
-            }
+        return self.calculate_risk_batch([market_data])[0]
 
-            # --- 2. MACHINE LEARNING PREDIKCIÓ ---
-            ml_risk_score = 50 # Alapértelmezett érték, ha nincs ML
-
-            if self.ml_enabled:
-                # Feature-ök kinyerése pontosan olyan sorrendben, ahogy a modell tanulta!
-                high_24h = market_data.get('market_data', {}).get('high_24h', {}).get('usd', 0) or 0
-                low_24h = market_data.get('market_data', {}).get('low_24h', {}).get('usd', 0) or 0
-                current_price = market_data.get('market_data', {}).get('current_price', {}).get('usd', 0) or 0
-                
-                volatility_24h_pct = ((high_24h - low_24h) / current_price * 100) if current_price > 0 else 0
-                
-                features = {
-                    'market_cap_rank': mcap_rank,
-                    'current_price': current_price,
-                    'market_cap': mcap,
-                    'total_volume': volume,
-                    'liquidity_ratio': liquidity_ratio,
-                    'volatility_24h_pct': volatility_24h_pct,
-                    'price_change_percentage_1h_in_currency': market_data.get('market_data', {}).get('price_change_percentage_1h_in_currency', {}).get('usd', 0) or 0,
-                    'price_change_percentage_24h': price_change,
-                    'price_change_percentage_7d_in_currency': market_data.get('market_data', {}).get('price_change_percentage_7d_in_currency', {}).get('usd', 0) or 0,
-                    'price_change_percentage_30d_in_currency': market_data.get('market_data', {}).get('price_change_percentage_30d_in_currency', {}).get('usd', 0) or 0,
-                    'ath_drawdown_pct': market_data.get('market_data', {}).get('ath_change_percentage', {}).get('usd', 0) or 0
-                }
-                
-                # Konvertálás táblázattá (DataFrame) a skálázónak
-                df_features = pd.DataFrame([features])
-                
-                # Skálázás (Normalizálás)
-                X_scaled = self.scaler.transform(df_features)
-                
-                # Predikció: A predict_proba megmondja a valószínűségeket [Safe %, Scam/Risk %]
-                probabilities = self.model.predict_proba(X_scaled)[0]
-                scam_probability = probabilities[1] # A 2. elem a Scam/Risk esélye
-                
-                # Konvertáljuk 0-100-as skálára
-                ml_risk_score = int(scam_probability * 100)
-            else:
-                # Fallback: Régi matek, ha valamiért nem töltődött be a modell
-                overall_safety = (volatility_score * 0.3) + (liquidity_score * 0.3) + (market_score * 0.2) + (dev_score * 0.1) + (community_score * 0.1)
-                ml_risk_score = int(100 - (overall_safety * 10))
+    @staticmethod
+    def apply_red_flags(risk_data: Dict[str, Any], red_flags: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        A determinisztikus red flag összegzés (RedFlagScanner.scan) ráépítése az ML pontszámra:
+        a red flag pontszám arányában legfeljebb RED_FLAG_MAX_PENALTY ponttal emel.
+        A modell kimenete az "ml_score" mezőben változatlanul megmarad.
+        """
+        base = risk_data.get('ml_score', risk_data['quantitative_score'])
+        penalty = round(red_flags.get('score', 0) * settings.RED_FLAG_MAX_PENALTY / 100)
+        return {
+            **risk_data,
+            "quantitative_score": int(min(100, base + penalty)),
+            "ml_score": base,
+            "red_flag_penalty": penalty,
+            "red_flags": red_flags,
+        }
 
-            return {
-                "quantitative_score": max(0, min(100, ml_risk_score)),
-                "dimensions": dimensions,
-                "ml_active": self.ml_enabled
+    @staticmethod
+    def _dimension_scores(features: pd.DataFrame, dev_stars=0.0, twitter_followers=0.0) -> Dict[str, np.ndarray]:
+        """A radar ábra dimenziói (0-10) vektorizáltan; a fejlesztői / közösségi adat opcionális."""
+        rank = features['market_cap_rank'].to_numpy()
+        return {
+            "Volatility Safety": np.clip(10 - np.abs(features['price_change_percentage_24h'].to_numpy()) / 2, 0, None),
+            "Liquidity Strength": np.minimum(10, features['liquidity_ratio'].to_numpy() * 100),
+            "Market Position": np.where(rank <= 10, 10, np.clip(10 - rank / 50, 0, None)),
+            "Development": np.minimum(10, np.asarray(dev_stars, dtype=float) / 500),
+            "Community": np.minimum(10, np.asarray(twitter_followers, dtype=float) / 50000),
+        }
+
+    @staticmethod
+    def _fallback_scores(dims: Dict[str, np.ndarray]) -> np.ndarray:
+        """Régi matek, ha valamiért nem töltődött be a modell."""
+        overall_safety = (dims["Volatility Safety"] * 0.3 + dims["Liquidity Strength"] * 0.3
+                          + dims["Market Position"] * 0.2 + dims["Development"] * 0.1 + dims["Community"] * 0.1)
+        return np.clip((100 - overall_safety * 10).astype(int), 0, 100)
+
+    def calculate_risk_batch(self, market_data_list: Sequence[Union[MarketSnapshot, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Több coin pontozása egyetlen ML hívással. A bemenet (snapshot vagy nyers API dict)
+        egy structured array-be kerül, a feature-ök és dimenziók oszloponként számolódnak.
+        A modell referenciát egyszer olvassuk ki, így egy batch-en belül hot reload
+        mellett sem keveredhetnek a verziók.
+        """
+        bundle = self._bundle
+        if not market_data_list:
+            return []
+
+        snapshots = to_structured(market_data_list)
+        features = self.build_market_features(pd.DataFrame({col: snapshots[col] for col in MARKET_SOURCE_COLUMNS}))
+        dims = self._dimension_scores(features, snapshots['dev_stars'], snapshots['twitter_followers'])
+
+        # --- MACHINE LEARNING PREDIKCIÓ (egy lépésben a teljes batch-re) ---
+        scores, version = self.score_features(features, dims, ids=snapshots['id'], bundle=bundle)
+        ml_active = version is not None
+
+        # Python round(): a korábbi kimenettel bitre azonos kerekítés (np.round a .x5 határon eltérhet)
+        dim_lists = {name: values.tolist() for name, values in dims.items()}
+        return [
+            {
+                "quantitative_score": int(scores[i]),
+                "dimensions": {name: round(values[i], 1) for name, values in dim_lists.items()},
+                "ml_active": ml_active,
+                "model_version": version,
             }
+            for i in range(len(snapshots))
+        ]
 
-        except Exception as e:
-            logger.error(f"Hiba a komplex kockázati számításban: {e}")
-            return {"quantitative_score": 50, "dimensions": {}, "ml_active": False}
+    @staticmethod
+    def build_market_features(frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Vektorizált feature számítás lapos piaci sorokra (/coins/markets formátum),
+        ugyanazokkal az alapértékekkel, mint az egyedi coin útvonal.
+        """
+        raw = frame.reindex(columns=MARKET_SOURCE_COLUMNS).apply(pd.to_numeric, errors='coerce').fillna(0)
+        rank = raw['market_cap_rank'].replace(0, 1000)
+        mcap = raw['market_cap'].replace(0, 1)
+        price = raw['current_price']
+
+        features = pd.DataFrame({
+            'market_cap_rank': rank,
+            'current_price': price,
+            'market_cap': mcap,
+            'total_volume': raw['total_volume'],
+            'liquidity_ratio': np.where(mcap > 0, raw['total_volume'] / mcap, 0.0),
+            'volatility_24h_pct': np.where(price > 0, (raw['high_24h'] - raw['low_24h']) / price.where(price > 0, 1) * 100, 0.0),
+            'price_change_percentage_1h_in_currency': raw['price_change_percentage_1h_in_currency'],
+            'price_change_percentage_24h': raw['price_change_percentage_24h'],
+            'price_change_percentage_7d_in_currency': raw['price_change_percentage_7d_in_currency'],
+            'price_change_percentage_30d_in_currency': raw['price_change_percentage_30d_in_currency'],
+            'ath_drawdown_pct': raw['ath_change_percentage'],
+        }, index=frame.index)
+        return features[FEATURE_COLUMNS]
 
-    def get_quant_finance_metrics(self, historical_prices: list) -> Dict[str, Any]:
+    def score_market_frame(self, frame: pd.DataFrame, use_store: bool = True) -> pd.DataFrame:
+        """
+        Sok coin pontozása egyetlen vektorizált lépésben (dashboard, watch, screener).
+        A bemenet /coins/markets sorok DataFrame-je; a kimenet a feature-ök mellett
+        az ML pontszámot és a radar dimenziókat tartalmazza (fejlesztői/közösségi adat nélkül).
+        """
+        features = self.build_market_features(frame)
+        dims = self._dimension_scores(features)
+        ids = frame['id'].to_numpy() if use_store and 'id' in frame else None
+
+        result = features.copy()
+        result['volatility_safety'] = np.round(dims["Volatility Safety"], 1)
+        result['liquidity_strength'] = np.round(dims["Liquidity Strength"], 1)
+        result['market_position'] = np.round(dims["Market Position"], 1)
+
+        scores, version = self.score_features(features, dims, ids=ids)
+        result['ml_score'] = scores
+        result['ml_active'] = version is not None
+        result['model_version'] = version
+        return result
+
+    def score_features(self, features: pd.DataFrame, dims: Optional[Dict[str, np.ndarray]] = None,
+                       ids: Optional[Sequence[str]] = None, bundle: Optional[ModelBundle] = None
+                       ) -> Tuple[np.ndarray, Optional[str]]:
+        """
+        Kész feature mátrix (FEATURE_COLUMNS) pontozása: (pontszámok, modell verzió).
+        Ha van RiskStore és coin id, a friss, azonos modell verziójú előre kiszámolt pontszámokat
+        használjuk, és csak a hiányzó sorokra fut inferencia.
+        Modell nélkül vagy predikciós hibánál a régi matek fut, a verzió ekkor None.
+        """
+        bundle = bundle or self._bundle
+        if bundle is not None and len(features):
+            try:
+                scores = np.zeros(len(features), dtype=int)
+                missing = np.ones(len(features), dtype=bool)
+                if self.store is not None and ids is not None:
+                    stored = self.store.lookup(list(ids), bundle.version)
+                    for i, coin_id in enumerate(ids):
+                        if coin_id in stored:
+                            scores[i], missing[i] = stored[coin_id], False
+                    hits = int((~missing).sum())
+                    tracer.incr("cache_requests_total", hits, cache="risk_table", result="hit")
+                    tracer.incr("cache_requests_total", len(features) - hits, cache="risk_table", result="miss")
+                if missing.any():
+                    scores[missing] = self._predict_scores(bundle, features[missing])
+                return scores, bundle.version
+            except Exception as e:
+                logger.error(f"Hiba az ML predikció során: {e}")
+        # Fallback: Régi matek (fejlesztői/közösségi dimenzió itt 0)
+        return self._fallback_scores(dims if dims is not None else self._dimension_scores(features)), None
+
+    def get_quant_finance_metrics(self, historical_prices: Union[PriceSeries, list],
+                                  periods_per_year: Optional[float] = None) -> Dict[str, Any]:
         """
         Professzionális intézményi kockázati mutatók számítása (Quant Finance).
         Ezek a metrikák (Sharpe, MDD, Volatilitás) bekerülnek az AI promptba és a PDF-be.
+        A teljes felbontású sorozatból számolunk; az évesítés a mintavételi sűrűséget követi
+        (PriceSeries: mért lépésköz, sima lista: napi adat, 365 periódus / év).
         """
         if not historical_prices or len(historical_prices) < 7:
             return {
@@ -118,16 +361,19 @@ class RiskEngine:
                 "trend_status": "Insufficient Data"
             }
 
+        if periods_per_year is None:
+            periods_per_year = historical_prices.periods_per_year if isinstance(historical_prices, PriceSeries) else 365.0
+
         try:
-            prices = np.array(historical_prices)
-            # Napi hozamok (Daily Returns) kiszámítása
-            # Pl: ha tegnap 100 volt, ma 110, akkor (110-100)/100 = 0.1 (10%)
+            prices = np.asarray(historical_prices, dtype=np.float64)
+            # Periódusonkénti hozamok (napi / óránkénti / 5 perces)
+            # Pl: ha az előző pont 100 volt, a mostani 110, akkor (110-100)/100 = 0.1 (10%)
             returns = np.diff(prices) / prices[:-1]
             
             # 1. Évesített Volatilitás (Annualized Volatility)
-            # A napi szórás felszorozva a kereskedési napok gyökével (kriptóban 365 nap)
-            daily_volatility = np.std(returns)
-            ann_volatility = daily_volatility * np.sqrt(365) * 100
+            # A periódusonkénti szórás felszorozva az évi periódusszám gyökével (kriptóban 365 nap, 8760 óra)
+            period_volatility = np.std(returns)
+            ann_volatility = period_volatility * np.sqrt(periods_per_year) * 100
 
             # 2. Maximum Drawdown (MDD)
             # A legnagyobb történelmi esés a csúcstól a mélypontig a vizsgált időszakon belül
@@ -136,19 +382,22 @@ class RiskEngine:
             max_drawdown = np.min(drawdowns) * 100
 
             # 3. Sharpe-ráta (Sharpe Ratio Proxy)
-            # Hozam/Kockázat arány. A napi volatilitás nem lehet nulla (osztás nullával hiba elkerülése).
+            # Hozam/Kockázat arány. A volatilitás nem lehet nulla (osztás nullával hiba elkerülése).
             mean_return = np.mean(returns)
-            annualized_return = mean_return * 365
-            sharpe_ratio = annualized_return / (daily_volatility * np.sqrt(365)) if daily_volatility > 0 else 0
+            annualized_return = mean_return * periods_per_year
+            sharpe_ratio = annualized_return / (period_volatility * np.sqrt(periods_per_year)) if period_volatility > 0 else 0
 
             # 4. Egyszerű trend meghatározás
             trend_status = "Bullish (Uptrend)" if prices[-1] > prices[0] else "Bearish (Downtrend)"
 
             return {
-                "annualized_volatility_pct": round(ann_volatility, 2),
-                "max_drawdown_pct": round(max_drawdown, 2),
-                "sharpe_ratio": round(sharpe_ratio, 2),
-                "trend_status": trend_status
+                "annualized_volatility_pct": round(float(ann_volatility), 2),
+                "max_drawdown_pct": round(float(max_drawdown), 2),
+                "sharpe_ratio": round(float(sharpe_ratio), 2),
+                "trend_status": trend_status,
+                "observations": int(len(prices)),
+                "window_days": round(historical_prices.span_days if isinstance(historical_prices, PriceSeries)
+                                     else (len(prices) - 1) * 365.0 / periods_per_year, 1),
             }
         except Exception as e:
             logger.error(f"Hiba a Quant mutatók számításakor: {e}")
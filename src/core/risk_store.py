@@ -0,0 +1,101 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from loguru import logger
+from config.settings import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS risk_scores (
+    coin_id            TEXT    NOT NULL,
+    computed_at        REAL    NOT NULL,
+    model_version      TEXT    NOT NULL,
+    risk_score         INTEGER NOT NULL,
+    liquidity_ratio    REAL,
+    volatility_24h_pct REAL,
+    ath_drawdown_pct   REAL,
+    PRIMARY KEY (coin_id, computed_at)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_risk_scores_computed_at ON risk_scores (computed_at);
+"""
+
+# Régebbi SQLite buildek 999 paramétert engednek egy lekérdezésben
+_LOOKUP_CHUNK = 500
+
+
+class RiskStore:
+    """
+    Előre kiszámolt ML kockázati pontszámok (coin, időpont, modell verzió) SQLite táblában.
+    A precompute parancs írja, a RiskEngine olvassa: friss bejegyzésnél nincs modell inferencia.
+    WAL módban a háttérben futó precompute írás közben is olvasható.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else settings.RISK_DB_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def write_batch(self, rows: Iterable[Dict[str, Any]], model_version: str,
+                    computed_at: Optional[float] = None) -> int:
+        """Egy precompute kör eredménye egy tranzakcióban; a beírt sorok számát adja vissza."""
+        computed_at = computed_at or time.time()
+        records = [
+            (row['id'], computed_at, model_version, int(row['risk_score']),
+             row.get('liquidity_ratio'), row.get('volatility_24h_pct'), row.get('ath_drawdown_pct'))
+            for row in rows if row.get('id')
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO risk_scores VALUES (?, ?, ?, ?, ?, ?, ?)", records
+            )
+        return len(records)
+
+    def lookup(self, coin_ids: Sequence[str], model_version: str,
+               max_age: Optional[float] = None) -> Dict[str, int]:
+        """A legfrissebb, még érvényes pontszám coinonként (csak az adott modell verzióból)."""
+        max_age = settings.RISK_TABLE_MAX_AGE if max_age is None else max_age
+        oldest = time.time() - max_age
+        ids = [cid for cid in dict.fromkeys(coin_ids) if cid]
+        found: Dict[str, int] = {}
+        with self._lock:
+            for start in range(0, len(ids), _LOOKUP_CHUNK):
+                chunk = ids[start:start + _LOOKUP_CHUNK]
+                # SQLite: MAX() mellett a többi oszlop a maximumot adó sorból jön
+                query = (
+                    "SELECT coin_id, risk_score, MAX(computed_at) FROM risk_scores "
+                    f"WHERE coin_id IN ({','.join('?' * len(chunk))}) AND model_version = ? AND computed_at >= ? "
+                    "GROUP BY coin_id"
+                )
+                for coin_id, score, _ in self._conn.execute(query, (*chunk, model_version, oldest)):
+                    found[coin_id] = score
+        return found
+
+    def history(self, coin_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Egy coin pontszám idősora (legújabb elöl)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT computed_at, model_version, risk_score FROM risk_scores "
+                "WHERE coin_id = ? ORDER BY computed_at DESC LIMIT ?", (coin_id, limit)
+            )
+            return [{"computed_at": at, "model_version": version, "risk_score": score}
+                    for at, version, score in cursor]
+
+    def prune(self, retention_days: Optional[float] = None) -> int:
+        """A megőrzési időnél régebbi sorok törlése."""
+        retention_days = settings.RISK_TABLE_RETENTION_DAYS if retention_days is None else retention_days
+        with self._lock, self._conn:
+            deleted = self._conn.execute(
+                "DELETE FROM risk_scores WHERE computed_at < ?", (time.time() - retention_days * 86400,)
+            ).rowcount
+        if deleted:
+            logger.info(f"🧹 {deleted} régi kockázati bejegyzés törölve.")
+        return deleted
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
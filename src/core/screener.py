@@ -0,0 +1,116 @@
+import re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+from src.utils.telemetry import tracer
+
+# A szűrő / rendező kifejezésekben használható oszlopok (a watch szabályokkal azonos nevek)
+SCREEN_COLUMNS = [
+    "market_cap_rank", "price", "market_cap", "total_volume",
+    "liquidity_ratio", "volatility_24h_pct", "ath_drawdown_pct",
+    "change_1h", "change_24h", "change_7d", "change_30d",
+    "risk_score", "volatility_safety", "liquidity_strength", "market_position",
+]
+_SORT_TERM_RE = re.compile(r"^\s*(-)?\s*([A-Za-z_][A-Za-z0-9_]*)\s*(asc|desc)?\s*$", re.IGNORECASE)
+
+
+class ScreenError(ValueError):
+    """Hibás szűrő vagy rendezési kifejezés (a CLI ezt felhasználói hibaként jeleníti meg)."""
+
+
+def build_screen_frame(rows: List[Dict[str, Any]], risk_engine) -> pd.DataFrame:
+    """
+    /coins/markets sorokból egy oszlopos táblázat: azonosítók + feature-ök + ML pontszám,
+    egyetlen vektorizált RiskEngine.score_market_frame hívással.
+    """
+    market = pd.DataFrame(rows)
+    if market.empty:
+        return pd.DataFrame(columns=["id", "name", "symbol", *SCREEN_COLUMNS, "ml_active"])
+
+    with tracer.span("screen.score", coins=len(market)):
+        scored = risk_engine.score_market_frame(market)
+
+    return pd.DataFrame({
+        "id": market["id"],
+        "name": market.get("name"),
+        "symbol": market.get("symbol", pd.Series(index=market.index, dtype=object)).str.upper(),
+        # A rang nélküli coinok a lista végére kerülnek (ugyanaz, mint a feature számításnál)
+        "market_cap_rank": scored["market_cap_rank"].astype(int),
+        "price": scored["current_price"],
+        "market_cap": scored["market_cap"],
+        "total_volume": scored["total_volume"],
+        "liquidity_ratio": scored["liquidity_ratio"],
+        "volatility_24h_pct": scored["volatility_24h_pct"],
+        "ath_drawdown_pct": scored["ath_drawdown_pct"],
+        "change_1h": scored["price_change_percentage_1h_in_currency"],
+        "change_24h": scored["price_change_percentage_24h"],
+        "change_7d": scored["price_change_percentage_7d_in_currency"],
+        "change_30d": scored["price_change_percentage_30d_in_currency"],
+        "risk_score": scored["ml_score"].astype(int),
+        "volatility_safety": scored["volatility_safety"],
+        "liquidity_strength": scored["liquidity_strength"],
+        "market_position": scored["market_position"],
+        "ml_active": scored["ml_active"].astype(bool),
+    }, index=market.index).reset_index(drop=True)
+
+
+def parse_sort(expr: Optional[str]) -> Tuple[List[str], List[bool]]:
+    """"risk_score desc, market_cap_rank" vagy "-risk_score" -> (oszlopok, növekvő-e)."""
+    columns, ascending = [], []
+    for term in (expr or "").split(","):
+        if not term.strip():
+            continue
+        match = _SORT_TERM_RE.match(term)
+        if not match:
+            raise ScreenError(f"Értelmezhetetlen rendezés: '{term.strip()}'")
+        minus, column, direction = match.groups()
+        if column not in SCREEN_COLUMNS:
+            raise ScreenError(f"Ismeretlen oszlop a rendezésben: '{column}' (elérhető: {', '.join(SCREEN_COLUMNS)})")
+        columns.append(column)
+        ascending.append(not minus and (direction or "asc").lower() == "asc")
+    return columns, ascending
+
+
+def apply_screen(frame: pd.DataFrame, where: Optional[str] = None, sort: Optional[str] = "-risk_score",
+                 limit: Optional[int] = None) -> pd.DataFrame:
+    """
+    Oszlopos szűrés (pandas query, pl. "market_cap_rank <= 500 and liquidity_ratio < 0.01")
+    és többkulcsos rendezés. A kifejezés csak a táblázat oszlopait látja.
+    """
+    result = frame
+    if where and where.strip():
+        try:
+            mask = frame.eval(where, local_dict={}, global_dict={})
+        except Exception as e:
+            raise ScreenError(f"Hibás szűrő kifejezés: {type(e).__name__}: {e}") from None
+        if not isinstance(mask, pd.Series) or mask.dtype != bool:
+            raise ScreenError("A szűrő kifejezésnek logikai (igaz/hamis) értéket kell adnia, pl. risk_score >= 70")
+        result = frame[mask]
+
+    columns, ascending = parse_sort(sort)
+    if columns:
+        # Stabil rendezés; döntetlennél a rang dönt
+        result = result.sort_values(columns + ["market_cap_rank"], ascending=ascending + [True], kind="mergesort")
+    return result.head(limit) if limit else result
+
+
+def export_screen(frame: pd.DataFrame, path: Path, chunk_rows: int = 5000) -> Path:
+    """A teljes táblázat CSV-be, darabonként írva (nagy univerzumnál sem épül egy óriás string)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    frame.to_csv(path, index=False, chunksize=chunk_rows, float_format="%.6g")
+    logger.info(f"Screener export: {len(frame)} sor -> {path}")
+    return path
+
+
+def screen_summary(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Rövid összegzés a kiírás alá."""
+    if frame.empty:
+        return {"coins": 0, "median_risk": 0.0, "high_risk": 0}
+    return {
+        "coins": int(len(frame)),
+        "median_risk": float(np.median(frame["risk_score"])),
+        "high_risk": int((frame["risk_score"] >= 70).sum()),
+    }
@@ -1,21 +1,32 @@
 import typer
 import asyncio
+import time
 from rich.console import Console
+from rich.live import Live
 from rich.table import Table
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from loguru import logger
 
 # --- SAJÁT MODULOK IMPORTÁLÁSA ---
-from src.services.coingecko import CoinGeckoService
+from src.services.coingecko import CoinGeckoService, HISTORY_INTERVALS
 from src.services.web_search import WebSearchService
 from src.core.llm_engine import LLMEngine
 from src.core.rag_engine import RAGEngine
 from src.core.risk_engine import RiskEngine
+from src.core.risk_store import RiskStore
+from src.core.coin_index import CoinIndex
+from src.core.pipeline import AnalysisPipeline, AUDIT_TIERS, DEFAULT_DASHBOARD_COINS
+from src.core.market_monitor import MarketMonitor
+from src.core.alert_engine import AlertEngine, load_watch_config, build_sink
+from src.core.screener import ScreenError, apply_screen, export_screen, screen_summary
 from src.utils.report_gen import ReportGenerator
+from src.utils.telemetry import tracer
+from src.utils.logging_setup import setup_logging
 from config.settings import settings
 
 # --- INICIALIZÁLÁS ---
+setup_logging()
 app = typer.Typer()
 console = Console()
 
@@ -25,159 +36,301 @@ web_search = WebSearchService()
 llm = LLMEngine()
 rag = RAGEngine()
 risk_engine = RiskEngine()
+coin_index = CoinIndex()
+pipeline = AnalysisPipeline(cg_service, web_search, llm, rag, risk_engine, coin_index=coin_index)
+
+def _open_risk_store() -> RiskStore:
+    """
+    Az előre kiszámolt pontszám tábla lusta megnyitása, csak az ezt használó parancsokban
+    (így pl. a --help nem hoz létre SQLite fájlt). A RiskEngine-hez is bekötjük.
+    """
+    if risk_engine.store is None:
+        risk_engine.store = RiskStore()
+    return risk_engine.store
+
+def _attach_risk_store(create: bool = True):
+    """create=False: csak egy már létező (precompute által írt) táblát köt be, újat nem hoz létre."""
+    if settings.RISK_TABLE_ENABLED and (create or settings.RISK_DB_PATH.exists()):
+        _open_risk_store()
+
+# Globális CLI kapcsolók (a parancs előtt: python -m src.main --profile audit bitcoin)
+cli_state = {"profile": False}
+
+@app.callback()
+def cli_options(profile: bool = typer.Option(False, "--profile", help="Szakaszonkénti időbontás a parancs végén")):
+    cli_state["profile"] = profile
+
+def _print_profile():
+    """A mért span-ek összesítése (összidő szerint csökkenő sorrendben)."""
+    rows = tracer.breakdown()
+    if not rows:
+        return
+    table = Table(title="⏱️ PROFILE (per stage)", border_style="blue")
+    table.add_column("Stage / Call", style="cyan")
+    table.add_column("Count", justify="right")
+    table.add_column("Total (ms)", justify="right", style="green")
+    table.add_column("Max (ms)", justify="right")
+    for row in rows:
+        table.add_row(row["name"], str(row["count"]), f"{row['total_ms']:,.1f}", f"{row['max_ms']:,.1f}")
+    console.print(table)
+    hits = tracer.counter("cache_requests_total", cache="coingecko_coin", result="hit")
+    misses = tracer.counter("cache_requests_total", cache="coingecko_coin", result="miss")
+    http_429 = sum(tracer.counter("http_429_total", service="coingecko", endpoint=e) for e in ("coin", "history", "markets"))
+    table_hits = tracer.counter("cache_requests_total", cache="risk_table", result="hit")
+    table_misses = tracer.counter("cache_requests_total", cache="risk_table", result="miss")
+    if table_hits or table_misses:
+        console.print(f"[dim]Kockázati tábla: {table_hits:g} találat / {table_misses:g} élő pontozás[/dim]")
+    tiers = {tier: tracer.counter("audit_tier_total", tier=tier) for tier in AUDIT_TIERS[1:]}
+    if any(tiers.values()):
+        console.print("[dim]Audit szintek: " + ", ".join(f"{tier} {count:g}" for tier, count in tiers.items()) + "[/dim]")
+    prefix_hits = tracer.counter("llm_prefix_requests_total", result="hit")
+    if prefix_hits:
+        console.print(f"[dim]LLM prompt előtag cache: {prefix_hits:g} találat, "
+                      f"~{tracer.counter('llm_prefill_saved_seconds_total'):.2f}s megspórolt prefill[/dim]")
+    console.print(f"[dim]CoinGecko cache: {hits:g} találat / {misses:g} hiány | 429 válaszok: {http_429:g} | "
+                  f"export: {settings.LOG_DIR / 'traces.jsonl'}, {settings.LOG_DIR / 'metrics.prom'}[/dim]")
+
+def _run(coro):
+    """Lefuttatja a parancs aszinkron részét, majd lezárja a HTTP connection poolt és kiírja a telemetriát."""
+    async def _wrapped():
+        try:
+            return await coro
+        finally:
+            await pipeline.close()
+    try:
+        return asyncio.run(_wrapped())
+    finally:
+        tracer.export()
+        if cli_state["profile"]:
+            _print_profile()
+
+def _dashboard_cells(coin: dict) -> tuple:
+    """Egy dashboard sor formázott cellái (élő módban coinonként cache-elve)."""
+    price = coin['price']
+    change = coin['change_24h']
+    score = coin['risk_score']
+    is_ml = "🤖 " if coin.get('ml_active') else ""
+    
+    c_style = "green" if change > 0 else "red"
+    r_style = "green" if score < 40 else ("yellow" if score < 70 else "red")
+    
+    return (
+        str(coin.get('market_cap_rank') or 'N/A'), 
+        coin.get('name'), 
+        f"${price:,.2f}", 
+        f"[{c_style}]{change:.2f}%[/{c_style}]", 
+        f"{is_ml}[{r_style}]{score:.0f}/100[/{r_style}]"
+    )
+
+def _dashboard_table(rows: list, caption: str = None) -> Table:
+    # Táblázat felépítése
+    table = Table(title="🔥 LIVE MARKET DATA & ML RISK ANALYSIS 🔥", border_style="green", caption=caption)
+    table.add_column("Rank", justify="center", style="cyan")
+    table.add_column("Name", style="magenta")
+    table.add_column("Price (USD)", justify="right", style="green")
+    table.add_column("24h Change", justify="right")
+    table.add_column("ML Risk Score", justify="center")
+    for cells in rows:
+        table.add_row(*cells)
+    return table
+
+def _load_coin_list(coins: str = None, watchlist: str = None) -> list:
+    """Coin lista a --coins (vesszővel elválasztva) és/vagy a --watchlist fájl (soronként egy id) alapján."""
+    ids = [c.strip() for c in (coins or "").split(",") if c.strip()]
+    if watchlist:
+        with open(watchlist, "r", encoding="utf-8") as f:
+            ids += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return ids or list(DEFAULT_DASHBOARD_COINS)
+
+async def _resolve_coin_list(queries: list) -> list:
+    """Szimbólumok / nevek kötegelt feloldása id-re a lokális indexből; az ismeretleneket jelezzük."""
+    matches = await pipeline.resolve_coins(queries)
+    unresolved = [query for query, match in matches.items() if match is None]
+    if unresolved:
+        console.print(f"[yellow]⚠️ Ismeretlen coinok (kihagyva): {', '.join(unresolved)}[/yellow]")
+    for query, match in matches.items():
+        if match and match.method not in ("id", "passthrough"):
+            logger.debug("Coin feloldás: {} -> {} ({})", query, match.id, match.method)
+    return list(dict.fromkeys(match.id for match in matches.values() if match))
 
 @app.command()
-def dashboard():
+def dashboard(
+    live: bool = typer.Option(False, "--live", help="Folyamatosan frissülő műszerfal"),
+    interval: int = typer.Option(settings.LIVE_REFRESH_INTERVAL, "--interval", help="Frissítési időköz (mp) élő módban"),
+    coins: str = typer.Option(None, "--coins", help="Coin id-k vesszővel elválasztva"),
+    watchlist: str = typer.Option(None, "--watchlist", help="Fájl, soronként egy coin id"),
+):
     """
     📈 Élő Piaci Műszerfal aszinkron párhuzamosítással és ML Risk integrációval.
     """
+    _attach_risk_store()
     console.clear()
     console.rule(f"[bold blue]{settings.APP_NAME} - INSTITUTIONAL MARKET DASHBOARD[/bold blue]")
-
-    async def fetch_coin(coin: str, sem: asyncio.Semaphore, progress: Progress, task_id):
-        async with sem:
-            await asyncio.sleep(1.0) # Rate Limit védelem
-            data = await cg_service.get_coin_data(coin)
-            progress.update(task_id, advance=1)
-            
-            if data:
-                metrics = risk_engine.calculate_risk_metrics(data)
-                data['risk_score'] = metrics['quantitative_score']
-                data['ml_active'] = metrics.get('ml_active', False)
-            return data
+    target_coins = _load_coin_list(coins, watchlist)
 
     async def show_market():
-        target_coins = ["bitcoin", "ethereum", "solana", "ripple", "pepe", "cardano"]
-        semaphore = asyncio.Semaphore(2)
-        
+        resolved = await _resolve_coin_list(target_coins)
         with Progress(SpinnerColumn(), TextColumn("[cyan]Piaci adatok letöltése és ML elemzés párhuzamosan..."), transient=True) as progress:
-            task = progress.add_task("", total=len(target_coins))
-            tasks = [fetch_coin(coin, semaphore, progress, task) for coin in target_coins]
-            results = await asyncio.gather(*tasks)
-
-        market_data = [res for res in results if res is not None]
-
-        # Táblázat felépítése
-        table = Table(title="🔥 LIVE MARKET DATA & ML RISK ANALYSIS 🔥", border_style="green")
-        table.add_column("Rank", justify="center", style="cyan")
-        table.add_column("Name", style="magenta")
-        table.add_column("Price (USD)", justify="right", style="green")
-        table.add_column("24h Change", justify="right")
-        table.add_column("ML Risk Score", justify="center")
-
-        for coin in market_data:
-            price = coin.get('market_data', {}).get('current_price', {}).get('usd', 0)
-            change = coin.get('market_data', {}).get('price_change_percentage_24h', 0)
-            score = coin.get('risk_score', 50)
-            is_ml = "🤖 " if coin.get('ml_active') else ""
-            
-            c_style = "green" if change > 0 else "red"
-            r_style = "green" if score < 40 else ("yellow" if score < 70 else "red")
-            
+            task = progress.add_task("", total=len(resolved))
+            market_data = await pipeline.market_overview(
+                resolved, on_progress=lambda: progress.update(task, advance=1)
+            )
+
+        console.print(_dashboard_table([_dashboard_cells(coin) for coin in market_data]))
+        console.print("\n[dim]Tipp: Részletes intézményi elemzéshez használd: python -m src.main audit [token_neve][/dim]")
+
+    async def live_market():
+        monitor = MarketMonitor(cg_service, risk_engine, await _resolve_coin_list(target_coins))
+        risk_engine.start_watching()
+        cells = {}  # coin id -> formázott cellák; csak a változott sorokat formázzuk újra
+
+        # auto_refresh=False: csak akkor rajzolunk, ha tényleg változott valami
+        with Live(console=console, auto_refresh=False, transient=False) as live_view:
+            while True:
+                changed = await monitor.refresh()
+                for coin_id in changed:
+                    cells[coin_id] = _dashboard_cells(monitor.rows[coin_id])
+                if changed or not monitor.rows:
+                    caption = (f"{len(monitor.rows)} coin | {len(changed)} újrapontozva | "
+                               f"frissítve: {time.strftime('%H:%M:%S')} | {interval}s")
+                    rows = [cells[row['id']] for row in monitor.sorted_rows()]
+                    live_view.update(_dashboard_table(rows, caption=caption), refresh=True)
+                await asyncio.sleep(interval)
+
+    if not live:
+        _run(show_market())
+        return
+    try:
+        _run(live_market())
+    except KeyboardInterrupt:
+        console.print("\n[dim]Élő dashboard leállítva.[/dim]")
+    finally:
+        risk_engine.stop_watching()
+
+@app.command()
+def screen(
+    universe: int = typer.Option(settings.SCREEN_UNIVERSE, "--universe", help="Ennyi coin kapitalizáció szerint"),
+    where: str = typer.Option(None, "--where", help='Szűrő, pl. "market_cap_rank <= 500 and liquidity_ratio < 0.01"'),
+    sort: str = typer.Option(settings.SCREEN_DEFAULT_SORT, "--sort", help='Rendezés, pl. "-risk_score, volatility_24h_pct desc"'),
+    limit: int = typer.Option(25, "--limit", help="Kiírt sorok száma"),
+    output: str = typer.Option(None, "--output", help="A teljes (szűrt, rendezett) táblázat CSV-be"),
+):
+    """
+    🔎 Piaci screener: a toplista egy vektorizált ML pontozással, oszlopos szűréssel és rendezéssel.
+    Használat: python -m src.main screen --where "risk_score >= 70 and market_cap_rank <= 1000" --limit 20
+    """
+    _attach_risk_store()
+    console.rule(f"[bold blue]{settings.APP_NAME} - MARKET SCREENER[/bold blue]")
+
+    async def run_screen():
+        with Progress(SpinnerColumn(), TextColumn(f"[cyan]Top {universe} coin letöltése és pontozása..."), transient=True) as progress:
+            progress.add_task("", total=None)
+            frame = await pipeline.market_screen(universe)
+        try:
+            result = apply_screen(frame, where, sort)
+        except ScreenError as e:
+            console.print(f"[red]{e}[/red]")
+            raise typer.Exit(code=2)
+
+        table = Table(title=f"Screener: {len(result)} / {len(frame)} coin", border_style="blue")
+        for column, justify in (("#", "right"), ("Coin", "left"), ("Price ($)", "right"), ("24h %", "right"),
+                                ("Liquidity", "right"), ("Vol 24h %", "right"), ("ATH %", "right"), ("Risk", "right")):
+            table.add_column(column, justify=justify)
+        for row in result.head(limit).itertuples(index=False):
+            r_style = "green" if row.risk_score < 40 else ("yellow" if row.risk_score < 70 else "red")
             table.add_row(
-                str(coin.get('market_cap_rank', 'N/A')), 
-                coin.get('name'), 
-                f"${price:,.2f}", 
-                f"[{c_style}]{change:.2f}%[/{c_style}]", 
-                f"{is_ml}[{r_style}]{score:.0f}/100[/{r_style}]"
+                str(row.market_cap_rank), f"{row.name} ({row.symbol})", f"{row.price:,.6g}", f"{row.change_24h:.2f}",
+                f"{row.liquidity_ratio:.4f}", f"{row.volatility_24h_pct:.1f}", f"{row.ath_drawdown_pct:.1f}",
+                f"[{r_style}]{row.risk_score}[/{r_style}]",
             )
-            
         console.print(table)
-        console.print("\n[dim]Tipp: Részletes intézményi elemzéshez használd: python -m src.main audit [token_neve][/dim]")
+        summary = screen_summary(result)
+        console.print(f"[dim]Medián kockázat: {summary['median_risk']:.0f} | "
+                      f"magas kockázatú (>= 70): {summary['high_risk']}[/dim]")
+        if output:
+            console.print(f"[cyan]📄 CSV exportálva: {export_screen(result, output)}[/cyan]")
+
+    _run(run_screen())
+
+@app.command()
+def precompute(
+    universe: int = typer.Option(settings.PRECOMPUTE_UNIVERSE, "--universe", help="Ennyi coin kapitalizáció szerint"),
+    loop: bool = typer.Option(False, "--loop", help="Ütemezett futás (Ctrl+C a leállításhoz)"),
+    interval: int = typer.Option(settings.PRECOMPUTE_INTERVAL, "--interval", help="Futások közti idő (mp) --loop módban"),
+):
+    """
+    🗄️ Kockázati pontszámok előre kiszámolása a SQLite táblába (dashboard / screen / audit ebből olvas).
+    Használat: python -m src.main precompute --universe 3000 --loop --interval 900
+    """
+    store = _open_risk_store() if settings.RISK_TABLE_ENABLED else RiskStore()
+    console.rule(f"[bold blue]{settings.APP_NAME} - RISK PRECOMPUTE[/bold blue]")
+
+    async def run_precompute():
+        while True:
+            started = time.perf_counter()
+            summary = await pipeline.precompute_risk(store, universe)
+            console.print(
+                f"[green]✔ {time.strftime('%H:%M:%S')} {summary['written']} / {summary['coins']} coin beírva "
+                f"(modell: {summary['model_version']}, {time.perf_counter() - started:.1f}s) -> {store.path}[/green]"
+            )
+            if not loop:
+                return
+            risk_engine.reload_if_changed()
+            await asyncio.sleep(interval)
 
-    asyncio.run(show_market())
+    try:
+        _run(run_precompute())
+    except KeyboardInterrupt:
+        console.print("\n[dim]Precompute leállítva.[/dim]")
 
 @app.command()
-def audit(token: str):
+def audit(
+    token: str,
+    tier: str = typer.Option(settings.AUDIT_DEFAULT_TIER, "--tier",
+                             help="auto | rules (nincs LLM) | fast (kis modell) | full (nagy modell)"),
+    days: int = typer.Option(settings.HISTORY_DAYS, "--days", min=1,
+                             help="Ártörténet ablaka napokban (a felbontás korlátaihoz igazítva)"),
+    interval: str = typer.Option(settings.HISTORY_INTERVAL, "--interval",
+                                 help="Ártörténet felbontása: daily | hourly (2-90 nap) | 5m (1 nap)"),
+):
     """
     🛡️ Enterprise Deep Audit: AI, ML, Kvantitatív (Quant) elemzés, Hírek és Generatív PDF.
     """
+    if tier not in AUDIT_TIERS:
+        raise typer.BadParameter(f"Ismeretlen szint: {tier} (elérhető: {', '.join(AUDIT_TIERS)})", param_hint="--tier")
+    if interval not in HISTORY_INTERVALS:
+        raise typer.BadParameter(f"Ismeretlen felbontás: {interval} (elérhető: {', '.join(HISTORY_INTERVALS)})",
+                                 param_hint="--interval")
+    # A precompute által írt táblát olvassuk, ha van; az audit maga nem hoz létre SQLite fájlt
+    _attach_risk_store(create=False)
+
     async def run_audit():
         console.rule(f"[bold red]QUANTITATIVE DEEP AUDIT: {token.upper()}[/bold red]")
         
         with Progress(SpinnerColumn(), TextColumn("{task.description}"), transient=True) as progress:
-            
-            # 1. API ADATOK LETÖLTÉSE
-            progress.add_task("[cyan]1/4 API adatok és Történelmi árak letöltése...", total=None)
-            data = await cg_service.get_coin_data(token)
-            
-            if not data:
-                console.print(f"[bold red]❌ A '{token}' token nem található, vagy API hiba történt![/bold red]")
-                return
-                
-            historical_prices = await cg_service.get_historical_prices(data['id'], days=30)
-
-            # 2. KVANTITATÍV ÉS ML ELEMZÉS
-            progress.add_task("[blue]2/4 Machine Learning és Kvantitatív Pénzügyi metrikák...", total=None)
-            
-            # Machine Learning Kockázati Dimenziók
-            risk_data = risk_engine.calculate_risk_metrics(data)
-            math_score = risk_data['quantitative_score']
-            dimensions = risk_data['dimensions']
-            
-            # Kvantitatív (Quant Finance) Metrikák
-            quant_metrics = risk_engine.get_quant_finance_metrics(historical_prices)
-            ann_vol = quant_metrics['annualized_volatility_pct']
-            mdd = quant_metrics['max_drawdown_pct']
-            sharpe = quant_metrics['sharpe_ratio']
-            trend_status = quant_metrics['trend_status']
-            
-            # Párhuzamos RAG (Tudásbázis) és Hírek (Web Search) futtatása
-            rag_task = asyncio.to_thread(rag.load_context)
-            news_task = web_search.search_news(data['name'])
-            context, latest_news = await asyncio.gather(rag_task, news_task)
-
-            # 3. AI MOTOR (LLM)
-            progress.add_task(f"[magenta]3/4 AI Hedge Fund Elemzés ({settings.MODEL_NAME})...", total=None)
+            result = await pipeline.audit(token, on_stage=lambda desc: progress.add_task(desc, total=None), tier=tier,
+                                         days=days, interval=interval)
 
-            desc = data.get('description', {}).get('en', '')[:1000]
+        if result.get("error") == "not_found":
+            console.print(f"[bold red]❌ A '{token}' token nem található, vagy API hiba történt![/bold red]")
+            return
+        resolved = result.get("resolved") or {}
+        if resolved.get("method") not in (None, "id", "passthrough"):
+            others = resolved.get("alternatives") or []
+            note = f" [dim](további találatok: {', '.join(others[:3])})[/dim]" if others else ""
+            console.print(f"[cyan]🔎 {token} → {resolved['id']}[/cyan] [dim]({resolved['method']})[/dim]{note}")
+        if result.get("error") == "timeout":
+            console.print(f"[bold red]⏱️ A '{token}' alapadatai nem érkeztek meg a határidőn belül, és cache sincs.[/bold red]")
+            return
 
-            system_prompt = (
-                "You are a Senior Quantitative Analyst at a top-tier Hedge Fund. "
-                "Write a highly professional institutional-grade risk report. "
-                "Use the provided Volatility, Max Drawdown, and Sharpe Ratio in your analysis. "
-                "Output STRICT JSON only."
-            )
-            
-            user_prompt = (
-                f"ASSET: {data['name']}\n"
-                f"ML RISK SCORE (Random Forest Model): {math_score}/100\n"
-                f"--- QUANT METRICS ---\n"
-                f"Annualized Volatility: {ann_vol}%\n"
-                f"Maximum Drawdown (30d): {mdd}%\n"
-                f"Sharpe Ratio Proxy: {sharpe}\n"
-                f"Liquidity Score (0-10): {dimensions['Liquidity Strength']}\n"
-                f"Trend Status: {trend_status}\n"
-                f"---------------------\n"
-                f"NEWS: {latest_news}\nRULES: {context}\n\n"
-                "REQUIRED JSON OUTPUT STRUCTURE:\n"
-                "{\n"
-                '  "verdict": "Safe" or "Scam" or "High Risk",\n'
-                '  "score": (int 0-100),\n'
-                '  "summary": "Executive summary (Include mentions of Sharpe, Volatility and Drawdown)",\n'
-                '  "chart_analysis": "Technical analysis of volatility and momentum based on the quant metrics.",\n'
-                '  "pros": ["Institutional strength 1", "Strength 2"],\n'
-                '  "cons": ["Liquidity/Volatility Risk 1", "Risk 2"]\n'
-                "}"
-            )
-            
-            analysis = await llm.analyze_json(user_prompt, system_prompt)
-
-            # 4. RIPORT KÉSZÍTÉS (PDF + Képek)
-            progress.add_task("[green]4/4 PDF Riport és Bollinger Szalagok renderelése...", total=None)
-            
-            pdf_path = None
-            if analysis and "error" not in analysis:
-                pdf_path = ReportGenerator.create_pdf(
-                    data=analysis, 
-                    token_name=token, 
-                    historical_prices=historical_prices, 
-                    risk_dimensions=dimensions
-                )
+        analysis = result["analysis"]
+        math_score = result["risk"]["quantitative_score"]
+        quant_metrics = result["quant"]
+        pdf_path = result["pdf_path"]
 
         # --- EREDMÉNY MEGJELENÍTÉSE KIVÁLÓ MINŐSÉGBEN ---
         if not analysis or "error" in analysis:
-            console.print(f"[red]Hiba az AI elemzésben: {analysis.get('error', 'Unknown')}[/red]")
+            console.print(f"[red]Hiba az AI elemzésben: {(analysis or {}).get('error', 'Unknown')}[/red]")
         else:
             verdict = analysis.get('verdict', 'Unknown')
             color = "green" if verdict == "Safe" else "red"
@@ -186,10 +339,11 @@ def audit(token: str):
                 f"[bold]Verdict: [{color}]{verdict}[/{color}][/bold]\n"
                 f"Final AI Risk Score: {analysis.get('score')}/100 (ML Base: {math_score}/100)\n\n"
                 f"[bold cyan]--- QUANTITATIVE METRICS ---[/bold cyan]\n"
-                f"• Sharpe Ratio: {sharpe}\n"
-                f"• Max Drawdown: {mdd}%\n"
-                f"• Annual Volatility: {ann_vol}%\n"
-                f"• Trend: {trend_status}\n\n"
+                f"• Sharpe Ratio: {quant_metrics['sharpe_ratio']}\n"
+                f"• Max Drawdown: {quant_metrics['max_drawdown_pct']}%\n"
+                f"• Annual Volatility: {quant_metrics['annualized_volatility_pct']}%\n"
+                f"• Trend: {quant_metrics['trend_status']}\n"
+                f"• Idősor: {quant_metrics.get('observations', 0)} pont, {quant_metrics.get('window_days', 0)} nap ({interval})\n\n"
                 f"[italic]{analysis.get('summary')}[/italic]",
                 title=f"INSTITUTIONAL AUDIT: {token.upper()}", border_style=color
             ))
@@ -198,7 +352,22 @@ def audit(token: str):
                 console.print(f"\n[bold green]✅ ENTERPRISE PDF RIPORT ELKÉSZÜLT:[/bold green] {pdf_path}")
                 console.print("[dim]A riport tartalmazza a Bollinger Szalagokat (Volatility Bands) és a Radar ábrát.[/dim]")
 
-    asyncio.run(run_audit())
+        tier_info = result.get("tier") or {}
+        console.print(f"[dim]Audit szint: {tier_info.get('tier')} ({tier_info.get('reason')})"
+                      f"{' | modell: ' + tier_info['model'] if tier_info.get('model') else ''}[/dim]")
+        red_flags = result["risk"].get("red_flags") or {}
+        if red_flags.get("hits"):
+            flags = ", ".join(f"{hit['pattern']} ({hit['category']})" for hit in red_flags["hits"][:5])
+            console.print(f"[bold red]🚩 Red flagek ({red_flags['count']}, +{result['risk']['red_flag_penalty']} pont): "
+                          f"{flags}[/bold red]")
+
+        degraded = result.get("degraded") or {}
+        if degraded:
+            notes = ", ".join(f"{stage_name} ({reason})" for stage_name, reason in degraded.items())
+            console.print(f"[yellow]⚠️ Degradált bemenetek: {notes}[/yellow]")
+        console.print(f"[dim]Audit idő: {result.get('elapsed_s')}s / {settings.AUDIT_DEADLINE}s keret[/dim]")
+
+    _run(run_audit())
 
 @app.command()
 def portfolio(budget: int = 10000, strategy: str = "balanced"):
@@ -211,22 +380,7 @@ def portfolio(budget: int = 10000, strategy: str = "balanced"):
         
         with Progress(SpinnerColumn(), TextColumn("[magenta]Portfólió stratégia generálása..."), transient=True) as progress:
             progress.add_task("", total=None)
-            
-            candidates = "Bitcoin, Ethereum, Solana, USDC, Pepe, Cardano, Polkadot, Chainlink"
-            
-            system_prompt = "You are a Portfolio Manager. Output JSON only."
-            user_prompt = (
-                f"Create a portfolio allocation for ${budget} USD.\n"
-                f"Strategy: {strategy} (Safe/Balanced/Risky).\n"
-                f"Candidates available: {candidates}\n\n"
-                "REQUIRED JSON OUTPUT STRUCTURE:\n"
-                "{\n"
-                '  "allocation": {"Asset Name": Amount_USD (int)},\n'
-                '  "reasoning": "Why you chose this distribution"\n'
-                "}"
-            )
-            
-            plan = await llm.analyze_json(user_prompt, system_prompt)
+            plan = await pipeline.portfolio(budget, strategy)
 
         if not plan or "error" in plan:
             console.print("[red]Hiba a generáláskor.[/red]")
@@ -255,7 +409,91 @@ def portfolio(budget: int = 10000, strategy: str = "balanced"):
             if excel_path:
                 console.print(f"\n[cyan]📊 Excel exportálva: {excel_path}[/cyan]")
 
-    asyncio.run(run_portfolio())
+    _run(run_portfolio())
+
+@app.command()
+def watch(rules: str = typer.Option("config/watch_rules.toml", "--rules", help="Szabály konfiguráció (TOML/JSON)")):
+    """
+    🚨 Watchlist riasztások: deklaratív szabályok vektorizált kiértékelése minden tickben.
+    """
+    # Az előre kiszámolt táblát itt szándékosan nem használjuk: a riasztás többi metrikája élő,
+    # egy akár RISK_TABLE_MAX_AGE régi pontszám ezekkel keverve félrevezető jelzést adna
+    config = load_watch_config(rules)
+    target_coins = _load_coin_list(",".join(config.coins), config.watchlist)
+    console.rule(f"[bold red]WATCH: {len(target_coins)} coin x {len(config.rules)} szabály[/bold red]")
+
+    async def run_watch():
+        resolved = await _resolve_coin_list(target_coins)
+        monitor = MarketMonitor(cg_service, risk_engine, resolved, use_store=False)
+        engine = AlertEngine(config.rules, resolved, coin_index=coin_index)
+        sink = build_sink(config)
+        risk_engine.start_watching()
+        try:
+            while True:
+                changed = await monitor.refresh()
+                engine.update(monitor.rows, changed)
+                events = engine.evaluate()
+                await sink.emit(events)
+                for event in events:
+                    style = "bold red" if event['severity'] == "critical" else "yellow"
+                    console.print(
+                        f"[{style}]🚨 {time.strftime('%H:%M:%S')} {event['coin']}: {event['rule']} "
+                        f"({event['metric']} {event['op']} {event['threshold']}, érték: {event['value']:.4g})[/{style}]"
+                    )
+                logger.debug("Watch tick: {} frissült coin, {} riasztás.", len(changed), len(events))
+                await asyncio.sleep(config.interval)
+        finally:
+            await sink.close()
+
+    try:
+        _run(run_watch())
+    except KeyboardInterrupt:
+        console.print("\n[dim]Watch leállítva.[/dim]")
+    finally:
+        risk_engine.stop_watching()
+
+@app.command()
+def coins(
+    queries: list[str] = typer.Argument(None, help="Feloldandó szimbólumok / nevek / id-k"),
+    refresh: bool = typer.Option(False, "--refresh", help="A coin index frissítése a /coins/list végpontról"),
+):
+    """
+    🗂️ Lokális coin index: szimbólum / név -> CoinGecko id feloldás (hálózati hívás nélkül).
+    """
+    async def run_coins():
+        if refresh:
+            if not await coin_index.refresh(cg_service):
+                console.print("[bold red]❌ A coin lista nem frissíthető.[/bold red]")
+                return
+        matches = await pipeline.resolve_coins(queries or [])
+        table = Table(title=f"🗂️ Coin index ({len(coin_index)} coin)", border_style="blue")
+        for column in ("Bemenet", "Id", "Név", "Rang", "Mód", "Alternatívák"):
+            table.add_column(column)
+        for query, match in matches.items():
+            if match is None:
+                table.add_row(query, "[red]—[/red]", "", "", "[red]nincs találat[/red]", "")
+                continue
+            table.add_row(query, match.id, match.name, str(match.rank or "-"), match.method,
+                          ", ".join(match.alternatives[:3]))
+        if matches:
+            console.print(table)
+        elif not refresh:
+            console.print(f"[dim]{len(coin_index)} coin az indexben ({settings.COIN_INDEX_PATH}).[/dim]")
+
+    _run(run_coins())
+
+@app.command()
+def serve(host: str = settings.SERVER_HOST, port: int = settings.SERVER_PORT):
+    """
+    🌐 Lokális HTTP/JSON API meleg állapottal (modell, cache, connection pool).
+    Végpontok: GET /health, GET /metrics, GET /dashboard, GET /score/{coin}, POST /audit, POST /portfolio
+    """
+    from src.api.server import run_server
+
+    _attach_risk_store()
+    console.rule(f"[bold blue]{settings.APP_NAME} - LOCAL API[/bold blue]")
+    console.print(f"[cyan]Figyelés: http://{host}:{port}[/cyan]  [dim](Ctrl+C a leállításhoz)[/dim]")
+    run_server(pipeline, host=host, port=port)
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -0,0 +1,306 @@
+"""
+Vektorizált visszatesztelés: a RiskEngine ML pontszáma és a quant volatilitás a múltbeli
+snapshot partíciókon, előre tekintő hozamokkal és drawdownokkal összevetve.
+Használat:
+    python -m src.ml_engine.backtest --horizon 7 --crash-pct 30 --thresholds 50,70,90 --period M
+"""
+import json
+import time
+import numpy as np
+import pandas as pd
+import typer
+from pathlib import Path
+from typing import Dict, Any, List, NamedTuple, Optional, Sequence, Set, Tuple
+from loguru import logger
+from rich.console import Console
+from rich.table import Table
+from config.settings import settings
+from src.core.risk_engine import FEATURE_COLUMNS, RiskEngine
+from src.ml_engine.model_registry import ModelRegistry
+from src.ml_engine.train_model import list_snapshot_partitions
+from src.utils.logging_setup import setup_logging
+
+app = typer.Typer()
+console = Console()
+
+# Ennyi sor (coin-nap) megy egy predict_proba hívásba; ez korlátozza a csúcs memóriát
+DEFAULT_CHUNK_ROWS = 250_000
+QUANT_WINDOW = 30  # A quant volatilitás ablaka (napok), mint az auditban
+
+
+class PricePanel(NamedTuple):
+    """Napi ármátrix: sorok = naptári napok (hézagok NaN-nal), oszlopok = coinok."""
+    dates: pd.DatetimeIndex
+    coins: pd.Index
+    prices: np.ndarray  # float64 (napok x coinok)
+
+
+def _partition_date(path: Path, frame: pd.DataFrame) -> pd.Series:
+    """A snapshot_date oszlop, vagy régi partícióknál a fájlnévből (snapshot_YYYYMMDD_HHMMSS.csv)."""
+    if 'snapshot_date' in frame:
+        return pd.to_datetime(frame['snapshot_date']).dt.normalize()
+    return pd.Series(pd.Timestamp(path.stem.split("_")[1]), index=frame.index)
+
+
+def load_price_panel(paths: Sequence[Path], prices_csv: Optional[Path] = None) -> PricePanel:
+    """
+    Első menet: csak az id / dátum / ár oszlopok (usecols), így a memória a ármátrix méretével arányos.
+    Opcionális külső árfolyam fájl (id, date, price) sűríti a snapshotok közti napokat.
+    """
+    parts = []
+    for path in paths:
+        frame = pd.read_csv(path, usecols=lambda c: c in ('id', 'current_price', 'snapshot_date'))
+        parts.append(pd.DataFrame({'id': frame['id'], 'date': _partition_date(path, frame),
+                                   'price': frame['current_price']}))
+    if prices_csv:
+        extra = pd.read_csv(prices_csv, usecols=['id', 'date', 'price'])
+        extra['date'] = pd.to_datetime(extra['date']).dt.normalize()
+        parts.append(extra)
+    if not parts:
+        return PricePanel(pd.DatetimeIndex([]), pd.Index([]), np.empty((0, 0)))
+
+    long = pd.concat(parts, ignore_index=True)
+    # Egy napon több snapshot: az utolsó érvényes ár marad
+    long = long[long['price'] > 0].drop_duplicates(['date', 'id'], keep='last')
+    wide = long.pivot(index='date', columns='id', values='price')
+    dates = pd.date_range(wide.index.min(), wide.index.max(), freq='D')
+    wide = wide.reindex(dates)
+    return PricePanel(dates, wide.columns, wide.to_numpy(dtype=np.float64))
+
+
+def forward_outcomes(prices: np.ndarray, horizon: int) -> Dict[str, np.ndarray]:
+    """
+    Előre tekintő hozam (t -> t+h) és a legmélyebb esés a belépési árhoz képest (t+1..t+h),
+    az egész mátrixra (coinonkénti ciklus nélkül). A horizont végén hiányzó ár esetén NaN.
+    """
+    n_days = prices.shape[0]
+    fwd_return = np.full_like(prices, np.nan)
+    fwd_drawdown = np.full_like(prices, np.nan)
+    if n_days <= horizon:
+        return {"fwd_return": fwd_return, "fwd_drawdown": fwd_drawdown}
+
+    entry = prices[:-horizon]
+    fwd_return[:-horizon] = prices[horizon:] / entry - 1
+    # Gördülő minimum h eltolt szelettel: h vektorizált lépés, a memória a mátrix méretével arányos
+    # (egy (napok x coinok x h) ablak nézet a NaN kezelés miatt teljes másolatot igényelne)
+    window_min = prices[1:n_days - horizon + 1].copy()
+    for k in range(2, horizon + 1):
+        np.fmin(window_min, prices[k:n_days - horizon + k], out=window_min)
+    with np.errstate(invalid='ignore'):
+        fwd_drawdown[:-horizon] = np.minimum(window_min / entry - 1, 0)
+    fwd_drawdown[np.isnan(fwd_return)] = np.nan
+    return {"fwd_return": fwd_return, "fwd_drawdown": fwd_drawdown}
+
+
+def trailing_volatility(prices: np.ndarray, window: int = QUANT_WINDOW) -> np.ndarray:
+    """Évesített volatilitás (%) a get_quant_finance_metrics képletével, gördülő ablakban."""
+    returns = pd.DataFrame(prices).pct_change(fill_method=None)
+    daily = returns.rolling(window, min_periods=7).std(ddof=0)
+    return daily.to_numpy() * np.sqrt(365) * 100
+
+
+def trained_partitions(risk_engine: RiskEngine) -> Optional[List[str]]:
+    """
+    Az aktív modell tanító partíciói a registry metaadatából. None, ha nem ismert
+    (régi, registry nélküli modell vagy hiányzó meta): ekkor a szivárgás nem zárható ki.
+    """
+    version = getattr(risk_engine, "model_version", None)
+    if version in (None, "legacy"):
+        return None
+    try:
+        return list(ModelRegistry(getattr(risk_engine, "model_dir", None)).get_meta(version).get("trained_partitions", []))
+    except Exception as e:
+        logger.warning(f"A(z) {version} modell metaadata nem olvasható: {e}")
+        return None
+
+
+def score_partitions(paths: Sequence[Path], panel: PricePanel, risk_engine: RiskEngine,
+                     chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Tuple[pd.DataFrame, Set[Optional[str]]]:
+    """
+    Második menet: a feature-ök partíciónként beolvasva, `chunk_rows` soronként egy pontozási
+    hívással. Kimenet: (nap index, coin index, ml_score) tömör táblázat és a ténylegesen
+    használt modell verziók (None = statikus heurisztika, nem ML).
+    """
+    date_pos = pd.Series(np.arange(len(panel.dates)), index=panel.dates)
+    coin_pos = pd.Series(np.arange(len(panel.coins)), index=panel.coins)
+    out: List[pd.DataFrame] = []
+    buffer: List[pd.DataFrame] = []
+    buffered = 0
+    versions: Set[Optional[str]] = set()
+
+    def flush():
+        nonlocal buffered
+        batch = pd.concat(buffer, ignore_index=True)
+        scores, version = risk_engine.score_features(batch[FEATURE_COLUMNS])
+        versions.add(version)
+        out.append(pd.DataFrame({'d': batch['d'].to_numpy(), 'c': batch['c'].to_numpy(),
+                                 'ml_score': scores.astype(np.int16)}))
+        buffer.clear()
+        buffered = 0
+
+    for path in paths:
+        frame = pd.read_csv(path, usecols=lambda c: c in FEATURE_COLUMNS or c in ('id', 'snapshot_date'))
+        frame = frame.assign(d=_partition_date(path, frame).map(date_pos), c=frame['id'].map(coin_pos))
+        frame = frame.dropna(subset=['d', 'c'])
+        frame[FEATURE_COLUMNS] = frame[FEATURE_COLUMNS].apply(pd.to_numeric, errors='coerce').fillna(0)
+        buffer.append(frame.astype({'d': np.int32, 'c': np.int32}))
+        buffered += len(frame)
+        if buffered >= chunk_rows:
+            flush()
+    if buffered:
+        flush()
+    if not out:
+        empty = pd.DataFrame({'d': np.array([], np.int32), 'c': np.array([], np.int32), 'ml_score': np.array([], np.int16)})
+        return empty, versions
+    # Egy napon több snapshot: az utolsó pontszám marad
+    return pd.concat(out, ignore_index=True).drop_duplicates(['d', 'c'], keep='last'), versions
+
+
+def evaluate_thresholds(events: pd.DataFrame, signals: Dict[str, Sequence[float]],
+                        period: str = "M") -> pd.DataFrame:
+    """
+    Küszöbönként és időszakonként: megjelölt coin-napok, hit rate (recall), precision,
+    lift (precision / alap arány) és a megjelölt / többi átlagos előre tekintő hozama.
+    """
+    events = events.assign(period=events['date'].dt.to_period(period).astype(str) if period != "all" else "all")
+    rows = []
+    for signal, thresholds in signals.items():
+        valid = events.dropna(subset=[signal])
+        for threshold in thresholds:
+            flagged = valid[signal] >= threshold
+            frame = pd.DataFrame({
+                'period': valid['period'], 'crash': valid['crash'], 'flagged': flagged,
+                'hit': flagged & valid['crash'], 'ret_flagged': valid['fwd_return'].where(flagged),
+                'ret_other': valid['fwd_return'].where(~flagged),
+            })
+            grouped = frame.groupby('period').agg(
+                coin_days=('crash', 'size'), crashes=('crash', 'sum'), flagged=('flagged', 'sum'),
+                hits=('hit', 'sum'), ret_flagged=('ret_flagged', 'mean'), ret_other=('ret_other', 'mean'),
+            )
+            grouped.insert(0, 'threshold', threshold)
+            grouped.insert(0, 'signal', signal)
+            rows.append(grouped.reset_index())
+    if not rows:
+        return pd.DataFrame()
+
+    report = pd.concat(rows, ignore_index=True)
+    base_rate = report['crashes'] / report['coin_days']
+    report['precision'] = (report['hits'] / report['flagged'].where(report['flagged'] > 0)).round(4)
+    report['hit_rate'] = (report['hits'] / report['crashes'].where(report['crashes'] > 0)).round(4)
+    report['lift'] = (report['precision'] / base_rate.where(base_rate > 0)).round(3)
+    report['base_rate'] = base_rate.round(4)
+    report[['ret_flagged', 'ret_other']] = (report[['ret_flagged', 'ret_other']] * 100).round(2)
+    return report
+
+
+def run_backtest(snapshot_dir: Path = settings.SNAPSHOT_DIR, horizon: int = 7, crash_pct: float = 30.0,
+                 thresholds: Sequence[float] = (50, 70, 90), vol_thresholds: Sequence[float] = (100, 150),
+                 period: str = "M", prices_csv: Optional[Path] = None, risk_engine: Optional[RiskEngine] = None,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS, include_trained: bool = False) -> Dict[str, Any]:
+    """
+    A teljes visszateszt: ármátrix -> előre tekintő kimenetek -> kötegelt pontozás -> kiértékelés.
+    Az aktív modell tanító partíciói (registry: trained_partitions) alapból nem kerülnek pontozásra
+    (in-sample szivárgás); az áraik a kimenetekhez továbbra is kellenek.
+    """
+    started = time.perf_counter()
+    risk_engine = risk_engine or RiskEngine()
+    paths = [Path(snapshot_dir) / name for name in list_snapshot_partitions(str(snapshot_dir))]
+    panel = load_price_panel(paths, prices_csv)
+    logger.info(f"Backtest: {len(paths)} partíció, {len(panel.dates)} nap x {len(panel.coins)} coin")
+
+    trained = trained_partitions(risk_engine)
+    in_sample = sorted(set(trained or []) & {path.name for path in paths})
+    score_paths = paths if include_trained else [path for path in paths if path.name not in in_sample]
+    if trained is None:
+        logger.warning("Az aktív modell tanító partíciói ismeretlenek; az eredmény in-sample napokat is tartalmazhat.")
+    elif in_sample:
+        logger.info(f"{len(in_sample)} tanító partíció {'benne marad (in-sample)' if include_trained else 'kihagyva'}.")
+
+    outcomes = forward_outcomes(panel.prices, horizon)
+    volatility = trailing_volatility(panel.prices)
+    scored, versions = score_partitions(score_paths, panel, risk_engine, chunk_rows)
+    heuristic = None in versions
+    if heuristic:
+        logger.warning("A pontozás (részben) a statikus heurisztikával futott, nem ML modellel.")
+
+    d, c = scored['d'].to_numpy(), scored['c'].to_numpy()
+    events = pd.DataFrame({
+        'date': panel.dates[d],
+        'ml_score': scored['ml_score'].to_numpy(),
+        'quant_volatility': volatility[d, c] if len(d) else np.array([]),
+        'fwd_return': outcomes['fwd_return'][d, c] if len(d) else np.array([]),
+        'fwd_drawdown': outcomes['fwd_drawdown'][d, c] if len(d) else np.array([]),
+    })
+    # Csak a lezárult horizontú coin-napok értékelhetők
+    events = events.dropna(subset=['fwd_return'])
+    events['crash'] = events['fwd_drawdown'] <= -crash_pct / 100
+
+    report = evaluate_thresholds(events, {'ml_score': thresholds, 'quant_volatility': vol_thresholds}, period)
+    return {
+        "partitions": len(paths),
+        "scored_partitions": len(score_paths),
+        "model_versions": sorted(v for v in versions if v is not None),
+        "heuristic_fallback": heuristic,
+        "in_sample_partitions": in_sample if trained is not None else "unknown",
+        "in_sample_included": bool(include_trained and in_sample),
+        "coin_days": int(len(scored)),
+        "evaluated": int(len(events)),
+        "crash_rate": round(float(events['crash'].mean()), 4) if len(events) else 0.0,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+        "report": report,
+    }
+
+
+def _floats(text: str) -> List[float]:
+    return [float(x) for x in text.split(",") if x.strip()]
+
+
+@app.command()
+def main(
+    snapshot_dir: Path = typer.Option(settings.SNAPSHOT_DIR, "--snapshot-dir", help="A napi snapshot partíciók mappája"),
+    horizon: int = typer.Option(7, "--horizon", help="Előre tekintő ablak (nap)"),
+    crash_pct: float = typer.Option(30.0, "--crash-pct", help="Ennyi %-os esés a horizonton belül = crash"),
+    thresholds: str = typer.Option("50,70,90", "--thresholds", help="ML pontszám küszöbök"),
+    vol_thresholds: str = typer.Option("100,150", "--vol-thresholds", help="Évesített volatilitás küszöbök (%)"),
+    period: str = typer.Option("M", "--period", help="Időszak: M (hónap), W (hét), Q vagy all"),
+    prices: Path = typer.Option(None, "--prices", help="Opcionális napi árfolyam CSV (id,date,price)"),
+    chunk_rows: int = typer.Option(DEFAULT_CHUNK_ROWS, "--chunk-rows", help="Sorok pontozási hívásonként"),
+    output: Path = typer.Option(None, "--output", help="A teljes riport CSV-be"),
+    include_trained: bool = typer.Option(False, "--include-trained",
+                                         help="Az aktív modell tanító partícióit is pontozza (in-sample)"),
+):
+    """Az ML pontszám és a quant volatilitás visszatesztelése a tárolt snapshotokon."""
+    result = run_backtest(snapshot_dir, horizon, crash_pct, _floats(thresholds), _floats(vol_thresholds),
+                          period, prices, chunk_rows=chunk_rows, include_trained=include_trained)
+    report = result.pop("report")
+    if result["heuristic_fallback"]:
+        console.print("[bold yellow]⚠️ Nincs (érvényes) ML modell: az 'ml_score' sorok a statikus heurisztikát mérik.[/bold yellow]")
+    if result["in_sample_included"] or result["in_sample_partitions"] == "unknown":
+        console.print("[yellow]⚠️ Az eredmény a modell tanító napjait is tartalmazhatja (in-sample).[/yellow]")
+    if report.empty:
+        console.print("[yellow]Nincs kiértékelhető coin-nap (kevés snapshot a horizonthoz?).[/yellow]")
+        return
+
+    # Összesítés küszöbönként a teljes időszakra
+    totals = report.groupby(['signal', 'threshold'], sort=False)[['coin_days', 'crashes', 'flagged', 'hits']].sum()
+    table = Table(title=f"🧪 Backtest ({horizon} napos horizont, crash <= -{crash_pct:g}%)", border_style="magenta")
+    for column in ("Signal", ">=", "Flagged", "Precision", "Hit rate", "Lift"):
+        table.add_column(column, justify="left" if column == "Signal" else "right")
+    for (signal, threshold), row in totals.iterrows():
+        precision = row['hits'] / row['flagged'] if row['flagged'] else float('nan')
+        hit_rate = row['hits'] / row['crashes'] if row['crashes'] else float('nan')
+        base = row['crashes'] / row['coin_days'] if row['coin_days'] else float('nan')
+        lift = precision / base if base else float('nan')
+        table.add_row(signal, f"{threshold:g}", f"{int(row['flagged']):,}", f"{precision:.3f}",
+                      f"{hit_rate:.3f}", f"{lift:.2f}")
+    console.print(table)
+    console.print(f"[dim]{json.dumps(result)}[/dim]")
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        report.to_csv(output, index=False)
+        console.print(f"[cyan]📄 Időszakos riport: {output}[/cyan]")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    app()
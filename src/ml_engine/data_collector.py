@@ -4,12 +4,15 @@ import time
 import os
 from loguru import logger
 from pathlib import Path
+from datetime import datetime
+from config.settings import settings
 
 # Beállítások
 PAGES_TO_FETCH = 4        # Hány oldalt töltsünk le? (1 oldal = 250 coin) -> 4 * 250 = 1000 coin
 COINS_PER_PAGE = 250
 SLEEP_BETWEEN_PAGES = 10  # Másodperc várakozás, hogy ne tiltsanak ki (429 Rate Limit)
-OUTPUT_FILE = "data/dataset/crypto_ml_dataset.csv"
+OUTPUT_FILE = settings.DATASET_DIR / "crypto_ml_dataset.csv"
+SNAPSHOT_DIR = settings.SNAPSHOT_DIR  # Napi partíciók az inkrementális tanításhoz
 
 def fetch_market_data():
     logger.info(f"🚀 Adatgyűjtés indítása... Cél: {PAGES_TO_FETCH * COINS_PER_PAGE} token.")
@@ -112,6 +115,13 @@ def process_and_save_data(raw_data):
     ml_df.to_csv(OUTPUT_FILE, index=False)
     
     logger.success(f"💾 Adathalmaz elmentve: {OUTPUT_FILE}")
+
+    # Időbélyeges snapshot (partíció) is készül, ebből tanul az inkrementális mód
+    snapshot_time = datetime.now()
+    snapshot_path = os.path.join(SNAPSHOT_DIR, f"snapshot_{snapshot_time.strftime('%Y%m%d_%H%M%S')}.csv")
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    ml_df.assign(snapshot_date=snapshot_time.strftime('%Y-%m-%d')).to_csv(snapshot_path, index=False)
+    logger.info(f"🗂️ Snapshot partíció elmentve: {snapshot_path}")
     logger.info(f"📊 Adatok eloszlása a TARGET_RISK oszlopban:\n{ml_df['TARGET_RISK'].value_counts()}")
 
 if __name__ == "__main__":
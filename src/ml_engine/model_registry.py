@@ -0,0 +1,197 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import joblib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from loguru import logger
+from config.settings import settings
+
+# A RiskEngine ezeket a fájlneveket ismeri (visszafelé kompatibilitás)
+LEGACY_MODEL_FILE = "rf_risk_model.pkl"
+LEGACY_SCALER_FILE = "scaler.pkl"
+
+POINTER_FILE = "CURRENT"
+MAX_POINTER_HISTORY = 50
+
+
+def feature_schema_hash(columns: List[str], dtypes: Optional[List[str]] = None) -> str:
+    """A feature-ök neve + sorrendje (+ típusa) alapján számolt ujjlenyomat."""
+    schema = [[col, dtypes[i] if dtypes else ""] for i, col in enumerate(columns)]
+    return hashlib.sha256(json.dumps(schema).encode("utf-8")).hexdigest()[:16]
+
+
+def _atomic_write_bytes(target: Path, payload: bytes):
+    """Ideiglenes fájlba ír, majd os.replace-szel cseréli (egy lépésben látható)."""
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, target)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _atomic_copy(source: Path, target: Path):
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ModelRegistry:
+    """
+    Verziózott modell tár a data/models alatt.
+    Minden betanítás saját mappát kap (modell, skálázó, meta.json),
+    a CURRENT fájl pedig atomikusan mutat az éppen aktív verzióra.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else settings.MODEL_DIR
+        self.versions_dir = self.root / "registry"
+        self.pointer_path = self.root / POINTER_FILE
+
+    # --- Írás ---
+    def register(
+        self,
+        model,
+        scaler,
+        metrics: Dict[str, Any],
+        feature_columns: List[str],
+        training_time_s: float,
+        params: Optional[Dict[str, Any]] = None,
+        feature_dtypes: Optional[List[str]] = None,
+        extra: Optional[Dict[str, Any]] = None,
+        activate: bool = True,
+    ) -> str:
+        """Elmenti a modellt egy új verzióként és (alapból) aktívvá teszi."""
+        schema_hash = feature_schema_hash(feature_columns, feature_dtypes)
+        created_at = datetime.now()
+        version_id = f"v{created_at.strftime('%Y%m%d_%H%M%S_%f')}_{schema_hash[:6]}"
+
+        version_dir = self.versions_dir / version_id
+        version_dir.mkdir(parents=True, exist_ok=False)
+        joblib.dump(model, version_dir / LEGACY_MODEL_FILE)
+        joblib.dump(scaler, version_dir / LEGACY_SCALER_FILE)
+
+        meta = {
+            "version": version_id,
+            "created_at": created_at.isoformat(timespec="seconds"),
+            "model_family": type(model).__name__,
+            "params": params or {},
+            "metrics": metrics,
+            "training_time_s": round(training_time_s, 3),
+            "feature_columns": list(feature_columns),
+            "feature_schema_hash": schema_hash,
+        }
+        if extra:
+            meta.update(extra)
+        _atomic_write_bytes(version_dir / "meta.json", json.dumps(meta, indent=2, default=str).encode("utf-8"))
+        logger.info(f"📦 Modell regisztrálva: {version_id} ({meta['model_family']})")
+
+        if activate:
+            self.activate(version_id)
+        return version_id
+
+    def activate(self, version_id: str, push_current: bool = True):
+        """Atomikusan átállítja a CURRENT mutatót a megadott verzióra."""
+        version_dir = self.versions_dir / version_id
+        if not (version_dir / "meta.json").exists():
+            raise ValueError(f"Ismeretlen modell verzió: {version_id}")
+
+        pointer = self._read_pointer()
+        history = [v for v in pointer.get("history", []) if v != version_id]
+        if push_current and pointer.get("version") and pointer["version"] != version_id:
+            history.append(pointer["version"])
+
+        new_pointer = {
+            "version": version_id,
+            "activated_at": datetime.now().isoformat(timespec="seconds"),
+            "history": history[-MAX_POINTER_HISTORY:],
+        }
+
+        # A verzió mappa változatlan, így a mutató cseréje egyetlen lépésben élesíti a párost.
+        # A régi útvonalakra csak kompatibilitási másolat megy (lásd _publish_legacy).
+        self._publish_legacy(version_dir)
+        _atomic_write_bytes(self.pointer_path, json.dumps(new_pointer, indent=2).encode("utf-8"))
+        logger.success(f"✅ Aktív modell: {version_id}")
+
+    def rollback(self, version_id: Optional[str] = None) -> str:
+        """
+        Visszaállás egy korábbi modellre. Verzió nélkül az előzőleg aktív verzióra lép vissza.
+        A lecserélt verzió nem kerül vissza a history-ba, így az ismételt rollback tovább lép hátra.
+        """
+        if version_id is None:
+            history = self._read_pointer().get("history", [])
+            if not history:
+                raise ValueError("Nincs korábbi modell verzió, amire vissza lehetne állni.")
+            version_id = history[-1]
+
+        logger.warning(f"↩️ Rollback a következő verzióra: {version_id}")
+        self.activate(version_id, push_current=False)
+        return version_id
+
+    # --- Olvasás ---
+    def current_version(self) -> Optional[str]:
+        return self._read_pointer().get("version")
+
+    def get_meta(self, version_id: str) -> Dict[str, Any]:
+        with open(self.versions_dir / version_id / "meta.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """Az összes regisztrált verzió metaadata, létrehozás szerint rendezve."""
+        if not self.versions_dir.exists():
+            return []
+        metas = []
+        for meta_path in self.versions_dir.glob("*/meta.json"):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    metas.append(json.load(f))
+            except Exception as e:
+                logger.warning(f"Sérült meta fájl kihagyva ({meta_path}): {e}")
+        # A verzió azonosító mikroszekundumos időbélyeggel kezdődik, így időrendben rendezhető
+        return sorted(metas, key=lambda m: m.get("version", ""))
+
+    def load(self, version_id: Optional[str] = None) -> Tuple[Any, Any, Dict[str, Any]]:
+        """Betölti a (modell, skálázó, meta) hármast. Verzió nélkül az aktívat."""
+        version_id = version_id or self.current_version()
+        if not version_id:
+            raise FileNotFoundError("Nincs aktív modell a registry-ben.")
+        version_dir = self.versions_dir / version_id
+        model = joblib.load(version_dir / LEGACY_MODEL_FILE)
+        scaler = joblib.load(version_dir / LEGACY_SCALER_FILE)
+        return model, scaler, self.get_meta(version_id)
+
+    # --- Belső segédek ---
+    def _read_pointer(self) -> Dict[str, Any]:
+        if not self.pointer_path.exists():
+            return {}
+        try:
+            with open(self.pointer_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"A CURRENT mutató nem olvasható: {e}")
+            return {}
+
+    def _publish_legacy(self, version_dir: Path):
+        """
+        Az aktív verziót a régi (rf_risk_model.pkl / scaler.pkl) útvonalakra is kimásolja,
+        külső eszközöknek. A két fájl cseréje nem egy lépés, ezért ezeket csak CURRENT nélkül
+        szabad olvasni; a RiskEngine mutató esetén mindig a verzió mappából tölt.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        _atomic_copy(version_dir / LEGACY_SCALER_FILE, self.root / LEGACY_SCALER_FILE)
+        _atomic_copy(version_dir / LEGACY_MODEL_FILE, self.root / LEGACY_MODEL_FILE)
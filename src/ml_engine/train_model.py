@@ -1,61 +1,261 @@
 import pandas as pd
 import numpy as np
 import os
-import joblib
+import copy
+import time
+import warnings
+import typer
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Union
 from loguru import logger
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split, StratifiedKFold, GridSearchCV, RandomizedSearchCV
+from sklearn.pipeline import Pipeline
+from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.utils.class_weight import compute_sample_weight
+from sklearn.metrics import (
+    classification_report, confusion_matrix, roc_auc_score,
+    average_precision_score, f1_score, precision_score, recall_score
+)
+from config.settings import settings
+from src.ml_engine.model_registry import LEGACY_MODEL_FILE, LEGACY_SCALER_FILE, ModelRegistry
+from src.utils.logging_setup import setup_logging
 
-# Útvonalak
-DATASET_PATH = "data/dataset/crypto_ml_dataset.csv"
-MODEL_DIR = "data/models"
-MODEL_PATH = f"{MODEL_DIR}/rf_risk_model.pkl"
-SCALER_PATH = f"{MODEL_DIR}/scaler.pkl"
+# Útvonalak (a beállításokból, így felülírt adatkönyvtárnál a registry, a RiskEngine és a tanítás egyezik)
+DATASET_PATH = settings.DATASET_DIR / "crypto_ml_dataset.csv"
+MODEL_DIR = settings.MODEL_DIR
+MODEL_PATH = MODEL_DIR / LEGACY_MODEL_FILE
+SCALER_PATH = MODEL_DIR / LEGACY_SCALER_FILE
+SNAPSHOT_DIR = settings.SNAPSHOT_DIR
 
-def train_and_evaluate():
-    logger.info("🧠 Machine Learning betanítás indítása...")
+# Ezeket az oszlopokat nem kapja meg a modell (azonosítók, snapshot dátum és a címke)
+DROP_COLUMNS = ['id', 'symbol', 'name', 'snapshot_date', 'TARGET_RISK']
+
+# Jelölt modell családok és a hozzájuk tartozó keresési tér.
+# A belső n_jobs=1, mert a párhuzamosítást a CV keresés végzi (különben túlterhelnénk a magokat).
+CANDIDATE_FAMILIES: Dict[str, Dict[str, Any]] = {
+    "random_forest": {
+        "estimator": RandomForestClassifier(random_state=42, class_weight='balanced', n_jobs=1),
+        "grid": {
+            "clf__n_estimators": [100, 300],
+            "clf__max_depth": [6, 10, None],
+            "clf__min_samples_leaf": [1, 3],
+        },
+    },
+    "extra_trees": {
+        "estimator": ExtraTreesClassifier(random_state=42, class_weight='balanced', n_jobs=1),
+        "grid": {
+            "clf__n_estimators": [200, 400],
+            "clf__max_depth": [8, None],
+            "clf__min_samples_leaf": [1, 3],
+        },
+    },
+    "hist_gradient_boosting": {
+        "estimator": HistGradientBoostingClassifier(random_state=42, class_weight='balanced'),
+        "grid": {
+            "clf__learning_rate": [0.05, 0.1],
+            "clf__max_depth": [None, 6],
+            "clf__max_iter": [200],
+        },
+    },
+    # partial_fit-képes család: ezt az inkrementális mód fák nélkül is tudja frissíteni
+    "sgd_logistic": {
+        "estimator": SGDClassifier(loss='log_loss', class_weight='balanced', random_state=42),
+        "grid": {
+            "clf__alpha": [1e-4, 1e-3, 1e-2],
+            "clf__penalty": ['l2', 'elasticnet'],
+        },
+    },
+    "logistic_regression": {
+        "estimator": LogisticRegression(max_iter=2000, class_weight='balanced'),
+        "grid": {
+            "clf__C": [0.1, 1.0, 10.0],
+        },
+    },
+}
+
+app = typer.Typer()
 
-    # 1. Adatok betöltése
-    if not os.path.exists(DATASET_PATH):
-        logger.error(f"Nem található az adathalmaz: {DATASET_PATH}")
-        return
 
-    df = pd.read_csv(DATASET_PATH)
+def load_dataset(dataset_path: Optional[Union[str, Path]] = DATASET_PATH, partition_paths: Optional[List[Path]] = None):
+    """
+    Betölti az adathalmazt (és opcionálisan a snapshot partíciókat) és szétválasztja
+    a bemeneti (X) és cél (y) változókat.
+    """
+    frames = [pd.read_csv(dataset_path)] if dataset_path and os.path.exists(dataset_path) else []
+    frames += [pd.read_csv(path) for path in partition_paths or []]
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
     logger.info(f"📊 Adatok betöltve. Méret: {df.shape[0]} sor, {df.shape[1]} oszlop.")
+    X = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+    y = df['TARGET_RISK']
+    return X, y
+
+
+def build_search(families: List[str], mode: str, n_iter: int, cv_folds: int, n_jobs: int, minority_count: int):
+    """
+    Keresztvalidált hiperparaméter keresés az összes jelölt modell családon egyszerre.
+    A skálázó a Pipeline része, így a CV foldok között nincs adatszivárgás.
+    """
+    unknown = [f for f in families if f not in CANDIDATE_FAMILIES]
+    if unknown:
+        raise ValueError(f"Ismeretlen modell család(ok): {unknown}")
+
+    param_grid = []
+    for family in families:
+        spec = CANDIDATE_FAMILIES[family]
+        param_grid.append({"clf": [spec["estimator"]], **{k: v for k, v in spec["grid"].items()}})
+
+    pipeline = Pipeline([("scaler", StandardScaler()), ("clf", CANDIDATE_FAMILIES[families[0]]["estimator"])])
+
+    # Ritka pozitív osztálynál nem lehet több fold, mint ahány pozitív minta van
+    folds = max(2, min(cv_folds, minority_count))
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    scoring = {"average_precision": "average_precision", "roc_auc": "roc_auc", "f1": "f1"}
+
+    if mode == "grid":
+        return GridSearchCV(pipeline, param_grid, scoring=scoring, refit="average_precision",
+                            cv=cv, n_jobs=n_jobs, error_score=np.nan)
+    if mode == "random":
+        total = sum(int(np.prod([len(v) for k, v in g.items() if k != "clf"])) for g in param_grid)
+        return RandomizedSearchCV(pipeline, param_grid, n_iter=min(n_iter, total), scoring=scoring,
+                                  refit="average_precision", cv=cv, n_jobs=n_jobs,
+                                  random_state=42, error_score=np.nan)
+    raise ValueError(f"Ismeretlen keresési mód: {mode} (grid / random)")
+
+
+def evaluate_model(model, X_test_scaled, y_test) -> Dict[str, float]:
+    """Holdout metrikák, amiket a registry a verzió mellé elment."""
+    y_pred = model.predict(X_test_scaled)
+    y_proba = model.predict_proba(X_test_scaled)[:, 1]
+    metrics = {
+        "f1": f1_score(y_test, y_pred, zero_division=0),
+        "precision": precision_score(y_test, y_pred, zero_division=0),
+        "recall": recall_score(y_test, y_pred, zero_division=0),
+    }
+    if len(np.unique(y_test)) > 1:
+        metrics["roc_auc"] = roc_auc_score(y_test, y_proba)
+        metrics["average_precision"] = average_precision_score(y_test, y_proba)
+    return {k: round(float(v), 4) for k, v in metrics.items()}
+
+
+def list_snapshot_partitions(snapshot_dir: Union[str, Path] = SNAPSHOT_DIR) -> List[str]:
+    """A data_collector által írt napi snapshot partíciók (fájlnév szerint időrendben)."""
+    return sorted(p.name for p in Path(snapshot_dir).glob("snapshot_*.csv"))
+
+
+def feature_drift(scaler, X: pd.DataFrame) -> Dict[str, float]:
+    """
+    Egyszerű drift mérőszám: az új adatok átlagának eltolódása a tanításkori
+    eloszláshoz képest, a skálázó szórásában kifejezve (z-érték).
+    """
+    shift = np.abs(X.mean().to_numpy() - scaler.mean_) / np.where(scaler.scale_ > 0, scaler.scale_, 1.0)
+    return {col: round(float(z), 3) for col, z in zip(X.columns, shift)}
+
+
+def supports_incremental(model) -> bool:
+    """partial_fit-képes modell, vagy warm startolható fa ensemble."""
+    return hasattr(model, "partial_fit") or isinstance(model, (RandomForestClassifier, ExtraTreesClassifier))
+
+
+def _incremental_fit(model, X_scaled, y, extra_trees: int, max_trees: int):
+    """
+    A meglévő modell bővítése csak az új adatokon:
+    - partial_fit-képes modellnél (SGD) egy újabb lépés,
+    - Random Forest / Extra Trees esetén warm start, csak az új fák tanulnak.
+    """
+    candidate = copy.deepcopy(model)
+
+    if hasattr(candidate, "partial_fit"):
+        # A partial_fit nem ismeri a 'balanced' presetet, ezért mintasúlyokkal pótoljuk
+        weights = compute_sample_weight('balanced', y) if y.nunique() > 1 else None
+        candidate.set_params(class_weight=None)
+        candidate.partial_fit(X_scaled, y, classes=np.array([0, 1]), sample_weight=weights)
+        return candidate, "partial_fit"
+
+    if isinstance(candidate, (RandomForestClassifier, ExtraTreesClassifier)):
+        if y.nunique() < 2:
+            raise ValueError("Az új partícióban csak egy osztály szerepel, a warm start nem biztonságos.")
+        candidate.set_params(warm_start=True, n_estimators=len(candidate.estimators_) + extra_trees)
+        with warnings.catch_warnings():
+            # Szándékosan csak az új partíción súlyozunk ('balanced' + warm start figyelmeztetés)
+            warnings.simplefilter("ignore", UserWarning)
+            candidate.fit(X_scaled, y)
+        candidate.set_params(warm_start=False)
+
+        # Csúszó ablak: a legrégebbi fák kiesnek, hogy a predikció költsége ne nőjön a végtelenségig
+        if len(candidate.estimators_) > max_trees:
+            candidate.estimators_ = candidate.estimators_[-max_trees:]
+            candidate.set_params(n_estimators=max_trees)
+        return candidate, "warm_start"
+
+    raise ValueError(f"A(z) {type(model).__name__} modell nem frissíthető inkrementálisan, teljes újratanítás kell.")
+
+
+def train_and_evaluate(
+    mode: str = "random",
+    families: Optional[List[str]] = None,
+    n_iter: Optional[int] = None,
+    cv_folds: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+    dataset_path: Optional[Union[str, Path]] = DATASET_PATH,
+    registry: Optional[ModelRegistry] = None,
+    partitions: Optional[List[str]] = None,
+    snapshot_dir: Union[str, Path] = SNAPSHOT_DIR,
+    extra: Optional[Dict[str, Any]] = None,
+) -> Optional[str]:
+    """
+    Teljes betanítás a crypto_ml_dataset.csv-n és/vagy a megadott snapshot partíciókon
+    (dataset_path=None: csak a partíciók). A verzió csak a ténylegesen felhasznált partíciókat rögzíti (trained_partitions),
+    így az inkrementális mód a többit még újnak látja.
+    """
+    logger.info("🧠 Machine Learning betanítás indítása...")
+    partitions = list(partitions or [])
+
+    # 1. Adatok betöltése
+    if not (dataset_path and os.path.exists(dataset_path)) and not partitions:
+        logger.error(f"Nem található az adathalmaz: {dataset_path}")
+        return None
 
     # 2. Bemeneti (X) és Cél (y) változók szétválasztása
     # Eldobjuk a neveket és ID-kat, mert azokból nem tanulhat a gép (csak a számokból)
-    drop_columns = ['id', 'symbol', 'name', 'TARGET_RISK']
-    X = df.drop(columns=drop_columns)
-    y = df['TARGET_RISK']
+    X, y = load_dataset(dataset_path, [Path(snapshot_dir) / p for p in partitions])
 
     # 3. Képző és Tesztelő halmazra bontás (80% tanul, 20% vizsgázik)
     # A stratify=y BIZTOSÍTJA, hogy a teszt halmazba is jusson a ritka 1-es (scam) osztályból!
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
     logger.info(f"🔪 Adatok felosztva. Tanuló: {len(X_train)}, Teszt: {len(X_test)}")
 
-    # 4. Adatok normalizálása (Skálázás)
-    # Hogy a millió dolláros Market Cap ne nyomja el a 2%-os volatilitást
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    # 4. Párhuzamos, keresztvalidált modell- és hiperparaméter keresés
+    families = families or list(CANDIDATE_FAMILIES.keys())
+    n_jobs = settings.TRAIN_N_JOBS if n_jobs is None else n_jobs
+    search = build_search(
+        families=families,
+        mode=mode,
+        n_iter=n_iter or settings.TRAIN_SEARCH_ITERATIONS,
+        cv_folds=cv_folds or settings.TRAIN_CV_FOLDS,
+        n_jobs=n_jobs,
+        minority_count=int(y_train.value_counts().min()),
+    )
+    logger.info(f"🌲 {mode.upper()} keresés indítása ({', '.join(families)}), n_jobs={n_jobs}...")
 
-    # 5. Algoritmus kiválasztása és betanítása
-    # A class_weight='balanced' oldja meg a 742 vs 8 problémát a képedről!
-    logger.info("🌲 Random Forest algoritmus betanítása...")
-    model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42, class_weight='balanced')
-    
     # ITT TÖRTÉNIK A TANULÁS
-    model.fit(X_train_scaled, y_train)
-    logger.success("✅ Modell sikeresen betanítva!")
+    started = time.perf_counter()
+    search.fit(X_train, y_train)
+    training_time = time.perf_counter() - started
+
+    best_pipeline = search.best_estimator_
+    scaler = best_pipeline.named_steps["scaler"]
+    model = best_pipeline.named_steps["clf"]
+    best_params = {k: (type(v).__name__ if k == "clf" else v) for k, v in search.best_params_.items()}
+    logger.success(f"✅ Legjobb modell: {type(model).__name__} (CV AP: {search.best_score_:.4f}, {training_time:.1f}s)")
 
-    # 6. Értékelés (Vizsgáztatás a 20% teszt adaton)
+    # 5. Értékelés (Vizsgáztatás a 20% teszt adaton)
     logger.info("📈 Tesztelés az ismeretlen adatokon...")
+    X_test_scaled = scaler.transform(X_test)
     y_pred = model.predict(X_test_scaled)
-    
-    # 7. Eredmények kiírása
+
+    # 6. Eredmények kiírása
     print("\n" + "="*50)
     print("   CONFUSION MATRIX (Tévesztési Mátrix)   ")
     print("="*50)
@@ -67,14 +267,186 @@ def train_and_evaluate():
     print("\n" + "="*50)
     print("   CLASSIFICATION REPORT (Értékelés)   ")
     print("="*50)
-    print(classification_report(y_test, y_pred, target_names=['Safe (0)', 'Risk/Scam (1)']))
+    print(classification_report(y_test, y_pred, labels=[0, 1], target_names=['Safe (0)', 'Risk/Scam (1)'], zero_division=0))
 
-    # 8. Modell mentése (.pkl fájlba) a valós idejű használathoz
-    os.makedirs(MODEL_DIR, exist_ok=True)
-    joblib.dump(model, MODEL_PATH)
-    joblib.dump(scaler, SCALER_PATH)
-    logger.info(f"💾 Modell elmentve ide: {MODEL_PATH}")
+    metrics = evaluate_model(model, X_test_scaled, y_test)
+    metrics["cv_average_precision"] = round(float(search.best_score_), 4)
+
+    # 7. Modell regisztrálása (verzió + metrikák + feature séma) és aktiválása
+    registry = registry or ModelRegistry()
+    version_id = registry.register(
+        model=model,
+        scaler=scaler,
+        metrics=metrics,
+        feature_columns=list(X.columns),
+        feature_dtypes=[str(t) for t in X.dtypes],
+        training_time_s=training_time,
+        params=best_params,
+        extra={
+            "search_mode": mode,
+            "families": families,
+            "n_candidates": len(search.cv_results_["params"]),
+            "train_rows": len(X_train),
+            "test_rows": len(X_test),
+            # Csak a tanító halmazba ténylegesen bekerült partíciók (CSV-only tanításnál üres)
+            "trained_partitions": sorted(partitions),
+            **(extra or {}),
+        },
+    )
+    logger.info(f"💾 Modell elmentve ({version_id}), aktív útvonal: {MODEL_PATH}")
     logger.info("Mostantól a Risk Engine használhatja az AI modellt!")
+    return version_id
+
+
+def incremental_update(
+    snapshot_dir: Union[str, Path] = SNAPSHOT_DIR,
+    registry: Optional[ModelRegistry] = None,
+) -> Optional[str]:
+    """
+    Inkrementális frissítés: csak a még nem látott snapshot partíciókon tanul,
+    így a napi frissítés ideje az új adatok méretével arányos, nem a teljes történettel.
+    Az új verzió csak akkor lesz aktív, ha a holdouton nem romlik a szülőhöz képest.
+    Nem bővíthető modell család vagy erős drift esetén teljes újratanításra vált (update_strategy=full_retrain).
+    """
+    registry = registry or ModelRegistry()
+    model, scaler, parent_meta = registry.load()
+    parent_version = parent_meta["version"]
+
+    seen = set(parent_meta.get("trained_partitions", []))
+    new_partitions = [p for p in list_snapshot_partitions(snapshot_dir) if p not in seen]
+    if not new_partitions:
+        logger.info("Nincs új snapshot partíció, a modell naprakész.")
+        return None
+
+    logger.info(f"🧩 Inkrementális frissítés {len(new_partitions)} új partícióból (szülő: {parent_version})...")
+    df = pd.concat([pd.read_csv(Path(snapshot_dir) / p) for p in new_partitions], ignore_index=True)
+    X = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])[parent_meta["feature_columns"]]
+    y = df['TARGET_RISK']
+
+    # 1. Drift ellenőrzés a tanításkori eloszláshoz képest
+    drift = feature_drift(scaler, X)
+    drifted = {k: v for k, v in drift.items() if v > settings.DRIFT_Z_THRESHOLD}
+    if drifted:
+        logger.warning(f"⚠️ Feature drift az új adatokban: {drifted}")
+
+    # Erős driftnél a régi skálázó tere már nem érvényes, nem érinthető modellnél pedig
+    # nincs mit bővíteni: mindkét esetben teljes újratanítás az összes partícióval
+    blocking = {k: v for k, v in drift.items() if v > settings.DRIFT_RETRAIN_Z_THRESHOLD}
+    reason = None
+    if blocking:
+        reason = f"feature drift > {settings.DRIFT_RETRAIN_Z_THRESHOLD}: {blocking}"
+    elif not supports_incremental(model):
+        reason = f"{type(model).__name__} nem frissíthető inkrementálisan"
+    if reason:
+        logger.warning(f"🔁 Inkrementális frissítés helyett teljes újratanítás ({reason}).")
+        # A CSV a legutóbbi snapshot másolata (data_collector), ezért itt csak a partíciókból tanulunk
+        return train_and_evaluate(
+            families=parent_meta.get("families"),
+            dataset_path=None,
+            registry=registry,
+            partitions=list_snapshot_partitions(snapshot_dir),
+            snapshot_dir=snapshot_dir,
+            extra={"parent_version": parent_version, "update_strategy": "full_retrain",
+                   "fallback_reason": reason, "feature_drift": drift},
+        )
+
+    # 2. Holdout leválasztása az új adatokból (ha lehet, rétegzetten)
+    stratify = y if y.value_counts().min() >= 2 else None
+    X_train, X_hold, y_train, y_hold = train_test_split(X, y, test_size=0.2, random_state=42, stratify=stratify)
+
+    # 3. A skálázó változatlan marad: a meglévő fák/súlyok ebben a térben tanultak
+    started = time.perf_counter()
+    candidate, strategy = _incremental_fit(
+        model, scaler.transform(X_train), y_train,
+        extra_trees=settings.INCREMENTAL_EXTRA_TREES,
+        max_trees=settings.INCREMENTAL_MAX_TREES,
+    )
+    training_time = time.perf_counter() - started
+
+    # 4. Szülő vs. jelölt a holdouton
+    X_hold_scaled = scaler.transform(X_hold)
+    parent_metrics = evaluate_model(model, X_hold_scaled, y_hold)
+    metrics = evaluate_model(candidate, X_hold_scaled, y_hold)
+    key = "average_precision" if "average_precision" in metrics else "f1"
+    accepted = metrics[key] >= parent_metrics[key] - settings.INCREMENTAL_MAX_DEGRADATION
+    logger.info(f"📈 Holdout {key}: szülő={parent_metrics[key]} | új={metrics[key]} ({training_time:.2f}s, {strategy})")
+
+    version_id = registry.register(
+        model=candidate,
+        scaler=scaler,
+        metrics=metrics,
+        feature_columns=parent_meta["feature_columns"],
+        feature_dtypes=[str(t) for t in X.dtypes],
+        training_time_s=training_time,
+        params=parent_meta.get("params", {}),
+        extra={
+            "parent_version": parent_version,
+            # Öröklődik: egy későbbi (drift miatti) teljes újratanítás is a szülő családjaiban keres
+            "families": parent_meta.get("families"),
+            "update_strategy": strategy,
+            "parent_holdout_metrics": parent_metrics,
+            "new_partitions": new_partitions,
+            "trained_partitions": sorted(seen | set(new_partitions)),
+            "train_rows": len(X_train),
+            "test_rows": len(X_hold),
+            "feature_drift": drift,
+        },
+        activate=accepted,
+    )
+    if not accepted:
+        logger.warning(f"❌ Az inkrementális modell ({version_id}) gyengébb a holdouton, nem lett aktiválva.")
+    return version_id
+
+
+@app.callback(invoke_without_command=True)
+def main(ctx: typer.Context):
+    """Alapértelmezésként (alparancs nélkül) teljes betanítást futtat."""
+    if ctx.invoked_subcommand is None:
+        train_and_evaluate()
+
+
+@app.command()
+def train(
+    mode: str = typer.Option("random", help="grid vagy random keresés"),
+    family: List[str] = typer.Option(None, help="Modell család(ok), pl. --family random_forest"),
+    n_iter: int = typer.Option(None, help="Random keresés jelöltjeinek száma"),
+    cv_folds: int = typer.Option(None, help="Keresztvalidációs foldok száma"),
+    n_jobs: int = typer.Option(None, help="Párhuzamos folyamatok (-1 = összes mag)"),
+):
+    """Párhuzamos hiperparaméter keresés + új verzió regisztrálása."""
+    train_and_evaluate(mode=mode, families=family or None, n_iter=n_iter, cv_folds=cv_folds, n_jobs=n_jobs)
+
+
+@app.command()
+def incremental():
+    """Csak az új snapshot partíciókon tanul (warm start / partial_fit + drift ellenőrzés)."""
+    version = incremental_update()
+    if version:
+        registry = ModelRegistry()
+        meta = registry.get_meta(version)
+        status = "aktív" if registry.current_version() == version else "nem aktivált"
+        print(f"{version}  {meta.get('update_strategy')}  ({status})"
+              + (f"  ok: {meta['fallback_reason']}" if meta.get("fallback_reason") else ""))
+
+
+@app.command()
+def versions():
+    """Regisztrált modell verziók listázása."""
+    registry = ModelRegistry()
+    current = registry.current_version()
+    for meta in registry.list_versions():
+        marker = "*" if meta["version"] == current else " "
+        print(f"{marker} {meta['version']}  {meta['model_family']:<32} "
+              f"AP={meta['metrics'].get('average_precision', 'n/a')}  "
+              f"F1={meta['metrics'].get('f1', 'n/a')}  {meta['training_time_s']}s")
+
+
+@app.command()
+def rollback(version: str = typer.Argument(None, help="Cél verzió (üresen: az előző aktív)")):
+    """Visszaállás egy korábbi modell verzióra."""
+    ModelRegistry().rollback(version)
+
 
 if __name__ == "__main__":
-    train_and_evaluate()
\ No newline at end of file
+    setup_logging()
+    app()
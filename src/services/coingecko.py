@@ -1,18 +1,113 @@
 import aiohttp
 import asyncio
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List
 from loguru import logger
 from config.settings import settings
+from src.utils.rate_limiter import AsyncRateLimiter
+from src.utils.telemetry import tracer
+from src.core.market_snapshot import MarketSnapshot
+from src.core.red_flags import RedFlagScanner
+from src.core.price_series import PriceSeries
+from src.utils.lru_cache import LRUCache
+
+# Idősor felbontás -> (extra lekérdezési paraméter, megengedett napok). Az ingyenes API az "interval"
+# nélküli kérésre automatikus felbontást ad: 1 nap = 5 perces, 2-90 nap = óránkénti, afölött napi pontok
+HISTORY_INTERVALS = {
+    "daily": ({"interval": "daily"}, (1, 3650)),
+    "hourly": ({}, (2, 90)),
+    "5m": ({}, (1, 1)),
+}
 
 class CoinGeckoService:
-    BASE_URL = "https://api.coingecko.com/api/v3"
+    MARKETS_PAGE_SIZE = 250  # A /coins/markets maximális oldalmérete
+
+    # Folyamat szintű, közös API keret: minden példány és parancs ezen osztozik
+    rate_limiter = AsyncRateLimiter(settings.COINGECKO_CALLS_PER_MINUTE / 60, burst=settings.COINGECKO_BURST)
+
+    def __init__(self, base_url: Optional[str] = None, red_flags: Optional[RedFlagScanner] = None):
+        self.base_url = (base_url or settings.COINGECKO_BASE_URL).rstrip("/")
+        # A leírás red flag vizsgálata parse-kor fut, a snapshot csak az összegzést tartja meg
+        self.red_flags = red_flags or RedFlagScanner()
+        # Egy tartós HTTP session (connection pool) eseményhurkonként
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Rövid TTL cache a pillanatnyi adatokra: coin_id -> (lejárat, MarketSnapshot)
+        # A teljes JSON dokumentum helyett csak a tömör snapshot marad a memóriában. Méretkorlátos,
+        # a lejárat után COINGECKO_STALE_TTL-lel régebbi bejegyzéseket pedig időnként kisöpörjük.
+        self._coin_cache: LRUCache[tuple] = LRUCache(settings.COINGECKO_CACHE_MAX_COINS)
+        self._last_sweep = time.monotonic()
+        # Utolsó sikeres idősor (coin_id, days, interval) szerint; degradált auditnál ebből pótolunk
+        self._history_cache: LRUCache[PriceSeries] = LRUCache(settings.COINGECKO_HISTORY_CACHE_MAX)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """A meglévő session-t adja vissza; új eseményhurokban vagy lezárás után újat nyit."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or getattr(self._session, "closed", False) or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession()
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """Lezárja a connection poolt (a CLI parancsok és a szerver leállásakor)."""
+        session, self._session = self._session, None
+        if session is not None and not getattr(session, "closed", True):
+            await session.close()
+
+    def get_cached_snapshot(self, coin_id: str) -> Optional[MarketSnapshot]:
+        """Az utolsó ismert adat, akár lejárt TTL-lel is (határidő túllépéskor)."""
+        cached = self._coin_cache.get(coin_id)
+        return cached[1] if cached else None
+
+    def get_cached_history(self, coin_id: str, days: Optional[int] = None, interval: Optional[str] = None) -> PriceSeries:
+        days, interval = self.history_window(days, interval)
+        return self._history_cache.get((coin_id, days, interval), PriceSeries(interval=interval))
+
+    @staticmethod
+    def history_window(days: Optional[int] = None, interval: Optional[str] = None) -> tuple:
+        """A kért ablak a felbontás által megengedett napokra igazítva: (napok, felbontás)."""
+        interval = interval or settings.HISTORY_INTERVAL
+        if interval not in HISTORY_INTERVALS:
+            raise ValueError(f"Ismeretlen idősor felbontás: '{interval}' (elérhető: {', '.join(HISTORY_INTERVALS)})")
+        lo, hi = HISTORY_INTERVALS[interval][1]
+        days = days or settings.HISTORY_DAYS
+        clamped = min(max(days, lo), hi)
+        if clamped != days:
+            logger.debug("Idősor ablak {} napról {} napra igazítva ({} felbontás).", days, clamped, interval)
+        return clamped, interval
+
+    async def get_snapshot(self, coin_id: str, retries: int = 3) -> Optional[MarketSnapshot]:
+        """Egy coin tömör pillanatképe (TTL cache-elve); a pipeline ezt használja."""
+        cached = self._coin_cache.get(coin_id)
+        if cached and cached[0] > time.monotonic():
+            logger.debug("Cache találat: {}", coin_id)
+            tracer.incr("cache_requests_total", cache="coingecko_coin", result="hit")
+            return cached[1]
+        tracer.incr("cache_requests_total", cache="coingecko_coin", result="miss")
+
+        payload = await self.get_coin_data(coin_id, retries=retries)
+        if not payload:
+            return None
+        snapshot = MarketSnapshot.from_coin_payload(payload, scan=self.red_flags.scan)
+        self._coin_cache[coin_id] = (time.monotonic() + settings.COINGECKO_CACHE_TTL, snapshot)
+        self._sweep_coin_cache()
+        return snapshot
+
+    def _sweep_coin_cache(self) -> int:
+        """A tartalékként sem használható (lejárat + COINGECKO_STALE_TTL után) bejegyzések törlése, TTL-enként egyszer."""
+        now = time.monotonic()
+        if now - self._last_sweep < settings.COINGECKO_CACHE_TTL:
+            return 0
+        self._last_sweep = now
+        return self._coin_cache.prune(lambda entry: now - entry[0] > settings.COINGECKO_STALE_TTL)
 
     async def get_coin_data(self, coin_id: str, retries: int = 3) -> Optional[Dict[str, Any]]:
         """
         Aszinkron lekérdezés újrapróbálkozási mechanizmussal (Retry Logic).
-        Ez hozza le a pillanatnyi adatokat, leírásokat és közösségi statisztikákat.
+        A nyers /coins/{id} dokumentumot adja vissza (cache nélkül); a leírás, a linkek és
+        a teljes közösségi blokk a get_snapshot feldolgozása után eldobható.
         """
-        url = f"{self.BASE_URL}/coins/{coin_id}"
+        url = f"{self.base_url}/coins/{coin_id}"
         params = {
             "localization": "false",
             "tickers": "false",
@@ -22,69 +117,189 @@ class CoinGeckoService:
             "sparkline": "false"
         }
 
-        async with aiohttp.ClientSession() as session:
+        session = self._get_session()
+        with tracer.span("coingecko.coin", coin=coin_id) as span:
             for attempt in range(retries):
+                span.set(attempts=attempt + 1)
                 try:
-                    logger.info(f"API hívás ({attempt+1}/{retries}): {coin_id}")
-                    
+                    logger.debug("API hívás ({}/{}): {}", attempt + 1, retries, coin_id)
+                    await self.rate_limiter.acquire()
+
                     async with session.get(url, params=params, timeout=settings.API_TIMEOUT) as response:
+                        self._record_response(span, "coin", response)
                         if response.status == 200:
                             return await response.json()
-                        
+
                         elif response.status == 429:
                             # HA TÚL GYORSAN HÍVTUK: VÁRUNK ÉS ÚJRA
-                            wait_time = (attempt + 1) * 5  # 5mp, 10mp, 15mp
+                            wait_time = (attempt + 1) * settings.COINGECKO_RETRY_BACKOFF  # 5mp, 10mp, 15mp
                             logger.warning(f"Rate Limit (429)! Várakozás {wait_time} másodpercig...")
+                            tracer.incr("retries_total", service="coingecko", endpoint="coin")
+                            tracer.incr("retry_wait_seconds_total", wait_time, service="coingecko", endpoint="coin")
                             await asyncio.sleep(wait_time)
                             continue  # Újrapróbáljuk a ciklust
-                        
+
                         elif response.status == 404:
                             logger.warning(f"Token nem található: {coin_id}")
                             return None
                         else:
                             logger.error(f"API Hiba: {response.status}")
                             return None
-                            
+
                 except Exception as e:
-                    logger.exception(f"Hálózati hiba: {e}")
+                    # Traceback formázás nélkül: a forró útvonalon ez lenne a legdrágább log
+                    logger.warning(f"Hálózati hiba ({coin_id}): {type(e).__name__}: {e}")
+                    tracer.incr("errors_total", service="coingecko", endpoint="coin")
                     return None
-            
+
             logger.error(f"Sikertelen lekérdezés {retries} próba után: {coin_id}")
             return None
 
-    async def get_historical_prices(self, coin_id: str, days: int = 30) -> list:
+    @staticmethod
+    def _record_response(span, endpoint: str, response):
+        """HTTP státusz, 429 és payload méret a span-re és a számlálókba."""
+        size = getattr(response, "content_length", None)
+        span.set(status=response.status, payload_bytes=size)
+        tracer.incr("http_responses_total", service="coingecko", endpoint=endpoint, status=response.status)
+        if response.status == 429:
+            tracer.incr("http_429_total", service="coingecko", endpoint=endpoint)
+        if size:
+            tracer.incr("payload_bytes_total", size, service="coingecko", endpoint=endpoint)
+
+    async def get_historical_prices(self, coin_id: str, days: Optional[int] = None,
+                                    interval: Optional[str] = None) -> PriceSeries:
         """
-        Letölti az elmúlt X nap történelmi árfolyamadatait (Time-Series).
-        Ez felelős azért, hogy a PDF generátor meg tudja rajzolni a trendvonalat.
+        Letölti az elmúlt X nap történelmi árfolyamadatait (Time-Series) a kért felbontásban
+        (daily | hourly | 5m). Teljes felbontású PriceSeries: a quant metrikák ebből számolnak,
+        a PDF grafikon ritkítva rajzolja. Hiba esetén üres sorozat.
         """
-        url = f"{self.BASE_URL}/coins/{coin_id}/market_chart"
-        params = {
-            "vs_currency": "usd", 
-            "days": str(days), 
-            "interval": "daily"
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            try:
-                logger.info(f"Történelmi adatok lekérése ({days} nap): {coin_id}")
+        days, interval = self.history_window(days, interval)
+        url = f"{self.base_url}/coins/{coin_id}/market_chart"
+        params = {"vs_currency": "usd", "days": str(days), **HISTORY_INTERVALS[interval][0]}
+        empty = PriceSeries(interval=interval)
+
+        session = self._get_session()
+        try:
+            logger.debug("Történelmi adatok lekérése ({} nap, {}): {}", days, interval, coin_id)
+            await self.rate_limiter.acquire()
+            with tracer.span("coingecko.history", coin=coin_id, days=days, interval=interval) as span:
                 async with session.get(url, params=params, timeout=settings.API_TIMEOUT) as response:
+                    self._record_response(span, "history", response)
                     if response.status == 200:
                         data = await response.json()
-                        # A CoinGecko [timestamp, price] listák listáját adja vissza
-                        # Nekünk csak a price (ár) kell, ami az index 1-en van.
-                        prices = [item[1] for item in data.get('prices', [])]
+                        # A CoinGecko [timestamp, price] párokat ad; az időbélyeg a felbontáshoz kell
+                        prices = PriceSeries.from_market_chart(data, interval)
+                        if len(prices):
+                            self._history_cache[(coin_id, days, interval)] = prices
+                        span.set(points=len(prices))
                         return prices
-                    
+
                     elif response.status == 429:
                         logger.warning("Rate limit a történelmi adatoknál!")
                         # Mivel ez általában másodlagos adat, nem csinálunk végtelen retry-t,
                         # csak várunk picit és üres listával térünk vissza, ha nem megy.
-                        await asyncio.sleep(5)
-                        return []
+                        tracer.incr("retry_wait_seconds_total", settings.COINGECKO_RETRY_BACKOFF, service="coingecko", endpoint="history")
+                        await asyncio.sleep(settings.COINGECKO_RETRY_BACKOFF)
+                        return empty
                     else:
                         logger.error(f"Történelmi adat API hiba: {response.status}")
-                        return []
-                        
-            except Exception as e:
-                logger.error(f"Hiba a történelmi adatok letöltésekor: {e}")
-                return []
\ No newline at end of file
+                        return empty
+
+        except Exception as e:
+            logger.error(f"Hiba a történelmi adatok letöltésekor: {e}")
+            tracer.incr("errors_total", service="coingecko", endpoint="history")
+            return empty
+
+    async def get_markets(self, coin_ids: List[str], retries: int = 3) -> List[Dict[str, Any]]:
+        """
+        Sok coin piaci adata kevés hívással: a /coins/markets egy kérésben 250 coint ad vissza.
+        A sorok mezőnevei megegyeznek az ML adathalmaz oszlopaival.
+        """
+        rows: List[Dict[str, Any]] = []
+        for start in range(0, len(coin_ids), self.MARKETS_PAGE_SIZE):
+            chunk = coin_ids[start:start + self.MARKETS_PAGE_SIZE]
+            page = await self._markets_page({"ids": ",".join(chunk), "page": "1"}, retries, coins=len(chunk))
+            rows.extend(page or [])
+        return rows
+
+    async def get_top_markets(self, limit: int, retries: int = 3) -> List[Dict[str, Any]]:
+        """
+        A piac első `limit` coinja kapitalizáció szerint (screener): ceil(limit / 250) hívás.
+        Az oldalak a közös rate limiter ütemében jönnek; egy hibás oldal után megállunk.
+        """
+        rows: List[Dict[str, Any]] = []
+        pages = -(-limit // self.MARKETS_PAGE_SIZE)
+        for page_no in range(1, pages + 1):
+            page = await self._markets_page({"order": "market_cap_desc", "page": str(page_no)}, retries, page=page_no)
+            if not page:
+                break
+            rows.extend(page)
+            if len(page) < self.MARKETS_PAGE_SIZE:
+                break  # Elfogyott a piac
+        return rows[:limit]
+
+    async def get_coin_list(self, retries: int = 3) -> List[Dict[str, Any]]:
+        """
+        Az összes listázott coin (id, szimbólum, név) egy hívásban; a lokális CoinIndex forrása.
+        Hiba esetén üres lista (a meglévő index érvényben marad).
+        """
+        url = f"{self.base_url}/coins/list"
+        session = self._get_session()
+        with tracer.span("coingecko.coin_list") as span:
+            for attempt in range(retries):
+                span.set(attempts=attempt + 1)
+                try:
+                    await self.rate_limiter.acquire()
+                    async with session.get(url, timeout=settings.API_TIMEOUT) as response:
+                        self._record_response(span, "coin_list", response)
+                        if response.status == 200:
+                            return await response.json()
+                        elif response.status == 429:
+                            wait_time = (attempt + 1) * settings.COINGECKO_RETRY_BACKOFF
+                            logger.warning(f"Rate Limit (429) a coin listánál! Várakozás {wait_time} másodpercig...")
+                            tracer.incr("retries_total", service="coingecko", endpoint="coin_list")
+                            tracer.incr("retry_wait_seconds_total", wait_time, service="coingecko", endpoint="coin_list")
+                            await asyncio.sleep(wait_time)
+                        else:
+                            logger.error(f"Coin lista API hiba: {response.status}")
+                            return []
+                except Exception as e:
+                    logger.error(f"Hálózati hiba a coin lista lekérésnél: {e}")
+                    tracer.incr("errors_total", service="coingecko", endpoint="coin_list")
+                    return []
+        return []
+
+    async def _markets_page(self, query: Dict[str, str], retries: int, **span_attrs) -> Optional[List[Dict[str, Any]]]:
+        """Egy /coins/markets oldal 429 utáni újrapróbálkozással; hiba esetén None."""
+        url = f"{self.base_url}/coins/markets"
+        params = {
+            "vs_currency": "usd",
+            "per_page": str(self.MARKETS_PAGE_SIZE),
+            "sparkline": "false",
+            "price_change_percentage": "1h,24h,7d,30d",
+            **query,
+        }
+        session = self._get_session()
+        with tracer.span("coingecko.markets", **span_attrs) as span:
+            for attempt in range(retries):
+                span.set(attempts=attempt + 1)
+                try:
+                    await self.rate_limiter.acquire()
+                    async with session.get(url, params=params, timeout=settings.API_TIMEOUT) as response:
+                        self._record_response(span, "markets", response)
+                        if response.status == 200:
+                            return await response.json()
+                        elif response.status == 429:
+                            wait_time = (attempt + 1) * settings.COINGECKO_RETRY_BACKOFF
+                            logger.warning(f"Rate Limit (429) a markets végponton! Várakozás {wait_time} másodpercig...")
+                            tracer.incr("retries_total", service="coingecko", endpoint="markets")
+                            tracer.incr("retry_wait_seconds_total", wait_time, service="coingecko", endpoint="markets")
+                            await asyncio.sleep(wait_time)
+                        else:
+                            logger.error(f"Markets API hiba: {response.status}")
+                            return None
+                except Exception as e:
+                    logger.error(f"Hálózati hiba a markets lekérésnél: {e}")
+                    tracer.incr("errors_total", service="coingecko", endpoint="markets")
+                    return None
+        return None
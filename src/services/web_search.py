@@ -1,27 +1,166 @@
 import asyncio
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
 from duckduckgo_search import DDGS
 from loguru import logger
+from config.settings import settings
+from src.utils.lru_cache import LRUCache
+from src.utils.telemetry import tracer
+
+# Egy audit ezeket a témákat keresi párhuzamosan
+DEFAULT_NEWS_TOPICS = ("hack exploit", "scam rug pull", "exchange listing news")
+
+SearchBackend = Callable[[str, int], List[Dict[str, Any]]]
+
+
+def ddgs_backend(query: str, max_results: int) -> List[Dict[str, Any]]:
+    """Az éles (szinkron) DuckDuckGo keresés. Teszteknél lokális stand-in váltja ki."""
+    with DDGS() as ddgs:
+        return list(ddgs.text(query, max_results=max_results))
+
 
 class WebSearchService:
-    def _search_sync(self, keyword: str, max_results: int) -> str:
-        """A szinkron kereső logika (belső használatra)."""
-        query = f"{keyword} crypto scam hack analysis news"
-        results_text = ""
+    """
+    Egységes, aszinkron hírkereső (a korábbi NewsService + WebSearchService).
+    - több lekérdezés párhuzamosan (hack, scam, listing),
+    - találatok deduplikálása,
+    - TTL cache lekérdezésenként (LRU korláttal),
+    - folyamatban lévő lekérdezés megosztása: ugyanarra a kulcsra nem indul új szál,
+    - kemény határidő: ami addig nem jön meg, azt cache-ből vagy üresen pótoljuk.
+    """
+
+    def __init__(self, backend: Optional[SearchBackend] = None, cache_ttl: Optional[float] = None,
+                 deadline: Optional[float] = None):
+        self.backend = backend or ddgs_backend
+        self.cache_ttl = settings.SEARCH_CACHE_TTL if cache_ttl is None else cache_ttl
+        self.deadline = settings.SEARCH_DEADLINE if deadline is None else deadline
+        # (lekérdezés, max_results) -> (tárolás ideje, találatok)
+        self._cache: LRUCache[Tuple[float, List[Dict[str, Any]]]] = LRUCache(settings.SEARCH_CACHE_MAX_ENTRIES)
+        # Folyamatban lévő lekérdezések: kulcs -> várakozó (eseményhurok, future) párok
+        self._inflight: Dict[Tuple[str, int], List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        self._inflight_lock = threading.Lock()
+
+    def _query_sync(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Egy lekérdezés a háttérszálon; a sikeres eredmény akkor is a cache-be kerül, ha már lejárt a határidő."""
+        results = self.backend(query, max_results) or []
+        self._cache[(query, max_results)] = (time.monotonic(), results)
+        return results
+
+    def _run_detached(self, query: str, max_results: int) -> asyncio.Future:
+        """
+        Daemon szálon indítja a lekérdezést. Az asyncio.to_thread alapértelmezett executorát
+        a CLI kilépéskor megvárná, így egy beragadt keresés a határidő után is fogva tartaná a programot.
+        Ha ugyanez a lekérdezés már fut (pl. egy beragadt DDG hívás), nem indul új szál: a hívó
+        a meglévő eredményére vár, így a hosszan futó serve / watch nem halmoz fel szálakat.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (query, max_results)
+        with self._inflight_lock:
+            waiters = self._inflight.get(key)
+            if waiters is not None:
+                waiters.append((loop, future))
+                tracer.incr("web_search_inflight_joined_total")
+                return future
+            self._inflight[key] = [(loop, future)]
+
+        def worker():
+            try:
+                result, error = self._query_sync(query, max_results), None
+            except Exception as e:
+                result, error = None, e
+            with self._inflight_lock:
+                waiters = self._inflight.pop(key, [])
+
+            def deliver(waiter: asyncio.Future):
+                if waiter.done():
+                    return
+                if error is not None:
+                    waiter.set_exception(error)
+                else:
+                    waiter.set_result(result)
+            for waiter_loop, waiter in waiters:
+                try:
+                    waiter_loop.call_soon_threadsafe(deliver, waiter)
+                except RuntimeError:
+                    pass  # Az eseményhurok már leállt; az eredmény a cache-ben van
+
+        threading.Thread(target=worker, name="web-search", daemon=True).start()
+        return future
+
+    def _cached(self, key: Tuple[str, int], allow_stale: bool = False) -> Optional[List[Dict[str, Any]]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if allow_stale or time.monotonic() - entry[0] < self.cache_ttl:
+            return entry[1]
+        return None
+
+    async def search(self, keyword: str, topics: Sequence[str] = DEFAULT_NEWS_TOPICS, max_results: int = 3,
+                     deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Párhuzamos, deduplikált keresés; a határidőn túl futó lekérdezéseket cache-ből pótolja."""
+        deadline = self.deadline if deadline is None else deadline
+        queries = [f"{keyword} crypto {topic}" for topic in topics]
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        pending: Dict[asyncio.Future, str] = {}
+
+        for query in queries:
+            cached = self._cached((query, max_results))
+            if cached is not None:
+                results[query] = cached
+            else:
+                pending[self._run_detached(query, max_results)] = query
+        tracer.incr("cache_requests_total", len(queries) - len(pending), cache="web_search", result="hit")
+        tracer.incr("cache_requests_total", len(pending), cache="web_search", result="miss")
+
+        if pending:
+            logger.debug("Keresés háttérszálon: '{}' ({} lekérdezés, {}s határidő)...", keyword, len(pending), deadline)
+            with tracer.span("web_search.queries", keyword=keyword, queries=len(pending)) as span:
+                done, not_done = await asyncio.wait(pending.keys(), timeout=deadline)
+                span.set(timed_out=len(not_done))
+            for future in done:
+                query = pending[future]
+                if future.exception() is not None:
+                    logger.warning(f"Sikertelen keresés ({query}): {future.exception()}")
+                    tracer.incr("errors_total", service="web_search", endpoint="query")
+                    results[query] = self._cached((query, max_results), allow_stale=True) or []
+                else:
+                    results[query] = future.result()
+            for future in not_done:
+                query = pending[future]
+                future.cancel()
+                logger.warning(f"Keresési határidő túllépve: '{query}', cache/üres eredménnyel folytatjuk.")
+                tracer.incr("deadline_exceeded_total", service="web_search")
+                results[query] = self._cached((query, max_results), allow_stale=True) or []
+
+        # Deduplikálás (URL, ennek hiányában a cím alapján), a témák sorrendjében
+        seen, merged = set(), []
+        for query in queries:
+            for item in results.get(query, []):
+                key = (item.get('href') or item.get('title') or '').strip().lower()
+                if key and key not in seen:
+                    seen.add(key)
+                    merged.append(item)
+        return merged
+
+    @staticmethod
+    def format_results(results: List[Dict[str, Any]], limit: Optional[int] = None) -> str:
+        if not results:
+            return "No recent news found."
+        return "".join(
+            f"{i+1}. [{r.get('title', '')}] - {r.get('body', '')}\n" for i, r in enumerate(results[:limit])
+        )
+
+    async def search_news(self, keyword: str, max_results: int = 3) -> str:
+        """Az audit promptjába kerülő, formázott hírösszefoglaló."""
         try:
-            with DDGS() as ddgs:
-                results = list(ddgs.text(query, max_results=max_results))
-                if not results:
-                    return "No recent news found."
-                for i, r in enumerate(results):
-                    results_text += f"{i+1}. [{r.get('title', '')}] - {r.get('body', '')}\n"
-                return results_text
+            results = await self.search(keyword, max_results=max_results)
         except Exception as e:
             logger.error(f"Hiba a webes keresés során: {e}")
             return "Web search unavailable."
+        return self.format_results(results, limit=max_results * 2)
 
-    async def search_news(self, keyword: str, max_results: int = 3) -> str:
-        """
-        Aszinkron wrapper a szinkron kereséshez. Külön szálon (Thread) futtatja.
-        """
-        logger.info(f"Keresés háttérszálon: '{keyword}'...")
-        return await asyncio.to_thread(self._search_sync, keyword, max_results)
\ No newline at end of file
+    def get_latest_news(self, keyword: str, max_results: int = 3) -> str:
+        """Szinkron változat (a régi NewsService interfésze); futó eseményhurokból ne hívd."""
+        return asyncio.run(self.search_news(keyword, max_results))
@@ -0,0 +1,53 @@
+import numpy as np
+from typing import Tuple
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: n_out pont indexe, amelyek vizuálisan a legjobban
+    megőrzik a görbe alakját (csúcsok, letörések). Az első és az utolsó pont mindig marad;
+    a belső pontok egyenlő bucketekre oszlanak, bucketenként egy numpy lépés (O(N) összesen).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)  # n_out - 2 belső bucket határai
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # A következő bucket átlaga (az utolsó belső bucketnél a záró pont)
+        nlo, nhi = (hi, edges[b + 2]) if b + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        # Háromszög terület (konstans szorzó nélkül) az előző kiválasztott pont és a következő átlag között
+        area = np.abs((x[prev] - avg_x) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (avg_y - y[prev]))
+        prev = lo + int(np.argmax(area))
+        selected[b + 1] = prev
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Min/max bucketing: (n_out - 2) // 2 bucket, mindegyikből a minimum és a maximum indexe
+    (időrendben), plusz az első és az utolsó pont. Teljesen vektorizált; a szélsőértékek
+    (kanócok) garantáltan látszanak.
+    """
+    n = len(y)
+    buckets = (n_out - 2) // 2
+    if n <= n_out or buckets < 1:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    size = -(-n // buckets)  # Felfelé kerekítve; a hiányzó helyeket az utolsó érték tölti ki
+    body = np.pad(y, (0, size * buckets - n), mode="edge").reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    idx = np.concatenate([offsets + body.argmin(axis=1), offsets + body.argmax(axis=1), [0, n - 1]])
+    return np.unique(np.minimum(idx, n - 1))
+
+
+def downsample(x: np.ndarray, y: np.ndarray, n_out: int, method: str = "lttb") -> Tuple[np.ndarray, np.ndarray]:
+    """(x, y) legfeljebb ~n_out pontra: a rajzolás költsége a bemenet hosszától független."""
+    idx = lttb_indices(x, y, n_out) if method == "lttb" else minmax_indices(y, n_out)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
@@ -0,0 +1,162 @@
+import datetime
+import json
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+from loguru import logger
+from config.settings import settings
+
+CONSOLE_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+)
+
+
+class LogSampler:
+    """
+    Ismétlődő üzenetek ritkítása hívási helyenként (modul + sor): egy időablakon belül
+    legfeljebb `burst` üzenet megy át, a többit eldobjuk, és a következő átengedett
+    üzenet "suppressed" mezője jelzi, hányat. A CRITICAL szintet sosem ritkítjuk.
+    Csak azokat a rekordokat számolja, amelyeket legalább egy sink modul szűrője átenged
+    (a modul szinten eldobott DEBUG ne fogyassza el a hívási hely keretét).
+    """
+
+    def __init__(self, window_s: float, burst: int, filters: Sequence["ModuleLevelFilter"] = ()):
+        self.window_s = window_s
+        self.burst = burst
+        self.filters = list(filters)
+        self._lock = threading.Lock()
+        # (modul, sor) -> [ablak kezdete, átengedett, eldobott]
+        self._sites: Dict[Tuple[str, int], list] = {}
+
+    def patch(self, record: Dict[str, Any]):
+        """loguru patcher: rekordonként egyszer fut, a hívó szálon, a sinkek szűrői előtt."""
+        if self.burst <= 0 or record["level"].no >= 50:
+            return
+        if self.filters and not any(f.accepts(record) for f in self.filters):
+            return  # Egyik sink sem írná ki: nem számít bele a ritkításba
+        key = (record["name"], record["line"])
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window_s:
+                suppressed = site[2] if site else 0
+                self._sites[key] = [now, 1, 0]
+                if suppressed:
+                    record["extra"]["suppressed"] = suppressed
+                return
+            if site[1] < self.burst:
+                site[1] += 1
+                return
+            site[2] += 1
+        record["extra"]["_sampled_out"] = True
+
+
+class SizeOrTimeRotation:
+    """Rotáció méretre VAGY napi időpontra (amelyik előbb teljesül); loguru rotation callable."""
+
+    def __init__(self, max_mb: float, at: str):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        hour, minute = (int(part) for part in at.split(":"))
+        self.at = datetime.time(hour, minute)
+        self._next = self._next_boundary(datetime.datetime.now())
+
+    def _next_boundary(self, now: datetime.datetime) -> datetime.datetime:
+        boundary = datetime.datetime.combine(now.date(), self.at)
+        return boundary if boundary > now else boundary + datetime.timedelta(days=1)
+
+    def should_rotate(self, now: datetime.datetime, size: int, incoming: int) -> bool:
+        """Loguru nélkül is használható (pl. a telemetria traces.jsonl exportja)."""
+        if now >= self._next:
+            self._next = self._next_boundary(now)
+            return True
+        return size + incoming > self.max_bytes
+
+    def __call__(self, message, file) -> bool:
+        return self.should_rotate(message.record["time"].replace(tzinfo=None), file.tell(), len(message))
+
+
+class ModuleLevelFilter:
+    """Modulonkénti minimum szint a leghosszabb egyező előtag alapján (pl. "src.services": "WARNING")."""
+
+    def __init__(self, default_level: str, module_levels: Dict[str, str]):
+        self.default_no = logger.level(default_level).no
+        self.module_levels = {name: logger.level(level).no for name, level in module_levels.items()}
+        self._cache: Dict[str, int] = {}
+
+    def threshold(self, module: Optional[str]) -> int:
+        module = module or ""
+        cached = self._cache.get(module)
+        if cached is None:
+            matches = [name for name in self.module_levels if module == name or module.startswith(name + ".")]
+            cached = self.module_levels[max(matches, key=len)] if matches else self.default_no
+            self._cache[module] = cached
+        return cached
+
+    def min_level(self) -> int:
+        return min([self.default_no, *self.module_levels.values()])
+
+    def accepts(self, record: Dict[str, Any]) -> bool:
+        return record["level"].no >= self.threshold(record["name"])
+
+    def __call__(self, record: Dict[str, Any]) -> bool:
+        if record["extra"].get("_sampled_out"):
+            return False
+        return self.accepts(record)
+
+
+def _json_format(record: Dict[str, Any]) -> str:
+    """Tömör JSON sor (a loguru serialize=True teljes rekordja helyett)."""
+    entry = {
+        "ts": record["time"].isoformat(),
+        "level": record["level"].name,
+        "module": record["name"],
+        "func": record["function"],
+        "line": record["line"],
+        "msg": record["message"],
+    }
+    extra = {k: v for k, v in record["extra"].items() if not k.startswith("_")}
+    if extra:
+        entry["extra"] = extra
+    if record["exception"] is not None:
+        exc_type, exc_value, _ = record["exception"]
+        entry["exception"] = f"{exc_type.__name__ if exc_type else 'Exception'}: {exc_value}"
+    record["extra"]["_json"] = json.dumps(entry, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
+
+
+def setup_logging(console_level: Optional[str] = None, json_sink: bool = True, enqueue: bool = True):
+    """
+    Központi loguru konfiguráció (a CLI belépési pontjai hívják, többször is hívható).
+    - konzol: ember által olvasható formátum,
+    - settings.LOG_DIR/LOG_JSON_FILE: JSON Lines, méret + idő alapú rotációval és tömörítéssel,
+    - enqueue=True: csak a sinkbe írás (fájl / konzol I/O, rotáció, tömörítés) kerül háttérszálra;
+      a patcher (ritkítás), a szűrők és az üzenet formázása továbbra is a hívó szálon fut,
+    - modulonkénti szintek és ritkítás (sampling) minden sinkre; a ritkítás csak a modul
+      szűrőn átjutó rekordokat számolja.
+    """
+    console_filter = ModuleLevelFilter(console_level or settings.LOG_LEVEL, settings.LOG_MODULE_LEVELS)
+    file_filter = ModuleLevelFilter(settings.LOG_FILE_LEVEL, settings.LOG_MODULE_LEVELS)
+    sampler = LogSampler(settings.LOG_SAMPLE_WINDOW, settings.LOG_SAMPLE_BURST,
+                         [console_filter, file_filter] if json_sink else [console_filter])
+    logger.remove()
+    logger.configure(patcher=sampler.patch)
+
+    logger.add(sys.stderr, level=console_filter.min_level(), format=CONSOLE_FORMAT,
+               filter=console_filter, enqueue=enqueue, backtrace=False, diagnose=False)
+
+    if json_sink:
+        logger.add(
+            settings.LOG_DIR / settings.LOG_JSON_FILE,
+            level=file_filter.min_level(),
+            format=_json_format,
+            filter=file_filter,
+            rotation=SizeOrTimeRotation(settings.LOG_ROTATION_MB, settings.LOG_ROTATION_TIME),
+            retention=settings.LOG_RETENTION,
+            compression=settings.LOG_COMPRESSION,
+            enqueue=enqueue,
+            backtrace=False,
+            diagnose=False,
+            encoding="utf-8",
+        )
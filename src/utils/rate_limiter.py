@@ -0,0 +1,35 @@
+import asyncio
+import threading
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket alapú, foglalásos rate limiter.
+    Minden hívó azonnal lefoglal egy tokent (a keret negatívba is mehet), és annyit vár,
+    amennyi idő alatt a keret visszatöltődik. Így a sorrend megmarad (FIFO jelleg),
+    nincs eseményhurokhoz kötött lock, és több párhuzamos parancs ugyanazt a keretet használja.
+    """
+
+    def __init__(self, rate_per_sec: float, burst: int = 1):
+        if rate_per_sec <= 0:
+            raise ValueError("rate_per_sec must be positive")
+        self.rate = rate_per_sec
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Lefoglal egy tokent, és visszaadja, hány másodpercet kell várni a felhasználásig."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -1,11 +1,15 @@
 import os
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # Csak fájlba renderelünk; háttérszálon is biztonságos backend
 import matplotlib.pyplot as plt
 from fpdf import FPDF
 from datetime import datetime
 from loguru import logger
 from config.settings import settings
+from src.core.price_series import PriceSeries
+from src.utils.downsample import downsample
 
 class AdvancedPDFReport(FPDF):
     def header(self):
@@ -23,25 +27,55 @@ class AdvancedPDFReport(FPDF):
 
 class ReportGenerator:
     @staticmethod
-    def _create_price_chart(prices: list, token_name: str) -> str:
-        """Készít egy 30 napos trendgrafikont 7 napos mozgóátlaggal."""
-        if not prices: return None
-        
+    def _create_price_chart(prices, token_name: str) -> str:
+        """
+        Trendgrafikon 7 napos mozgóátlaggal. Árlistát vagy PriceSeries-t is elfogad;
+        a mozgóátlag a teljes felbontáson készül, a rajzolás pedig legfeljebb
+        CHART_MAX_POINTS pontra ritkítva (LTTB / min-max), így a csúcsok megmaradnak.
+        """
+        if prices is None or not len(prices): return None
+
+        y = np.asarray(prices, dtype=np.float64)
+        timestamps = prices.timestamps if isinstance(prices, PriceSeries) else None
+        has_time = timestamps is not None and len(timestamps) == len(y)
+        x = timestamps if has_time else np.arange(len(y), dtype=np.float64)
+        span_days = prices.span_days if isinstance(prices, PriceSeries) and has_time else float(len(y) - 1)
+        # Egy napra eső pontok száma (napi adatnál 1, óránkéntinél ~24)
+        per_day = max(1, int(round((len(y) - 1) / span_days))) if span_days > 0 else 1
+
+        # 7 napos Mozgóátlag (SMA) kumulatív összeggel, a teljes felbontáson
+        window = 7 * per_day
+        sma_x = sma = None
+        if len(y) >= window:
+            csum = np.cumsum(np.insert(y, 0, 0.0))
+            sma = (csum[window:] - csum[:-window]) / window
+            # Eltoljuk az SMA-t, hogy a végére illeszkedjen
+            sma_x = x[window - 1:]
+
+        method = settings.CHART_DOWNSAMPLE
+        x_plot, y_plot = downsample(x, y, settings.CHART_MAX_POINTS, method)
+        if sma is not None:
+            sma_x, sma = downsample(sma_x, sma, settings.CHART_MAX_POINTS, method)
+
+        def _axis(values):
+            # Időbélyeg (ms) -> dátum a tengelyen; sima listánál a napok sorszáma
+            return pd.to_datetime(values, unit='ms') if has_time else values
+
         plt.figure(figsize=(8, 4))
         plt.style.use('bmh')
-        
-        # Nyers árak
-        plt.plot(prices, label='Daily Price', color='#2196F3', linewidth=1.5, alpha=0.7)
-        
-        # 7 napos Mozgóátlag (SMA) kiszámítása
-        if len(prices) >= 7:
-            sma = np.convolve(prices, np.ones(7)/7, mode='valid')
-            # Eltoljuk az SMA-t, hogy a végére illeszkedjen
-            plt.plot(range(6, len(prices)), sma, label='7-Day SMA', color='#FF9800', linewidth=2, linestyle='--')
 
-        plt.title(f"{token_name.upper()} - 30 Day Price Trend & Momentum", fontsize=12)
-        plt.xlabel("Days (Last 30)")
+        # Nyers árak
+        label = 'Daily Price' if per_day == 1 else f'Price ({getattr(prices, "interval", "intraday")})'
+        plt.plot(_axis(x_plot), y_plot, label=label, color='#2196F3', linewidth=1.2 if per_day > 1 else 1.5, alpha=0.7)
+        if sma is not None:
+            plt.plot(_axis(sma_x), sma, label='7-Day SMA', color='#FF9800', linewidth=2, linestyle='--')
+
+        days_label = f"{span_days:g}" if span_days == int(span_days) else f"{span_days:.1f}"
+        plt.title(f"{token_name.upper()} - {days_label} Day Price Trend & Momentum", fontsize=12)
+        plt.xlabel("Date" if has_time else f"Days (Last {days_label})")
         plt.ylabel("Price (USD)")
+        if has_time:
+            plt.gcf().autofmt_xdate()
         plt.legend()
         plt.tight_layout()
         
@@ -76,7 +110,8 @@ class ReportGenerator:
         return filename
 
     @staticmethod
-    def create_pdf(data: dict, token_name: str, historical_prices: list = None, risk_dimensions: dict = None):
+    def create_pdf(data: dict, token_name: str, historical_prices: list = None, risk_dimensions: dict = None,
+                   degraded: dict = None, red_flags: dict = None):
         """Generálja a PDF-et a grafikonokkal beágyazva."""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M")
@@ -108,6 +143,30 @@ class ReportGenerator:
             pdf.multi_cell(0, 6, safe_summary)
             pdf.ln(5)
 
+            # Adatminőségi figyelmeztetés: mely bemenetek maradtak ki / jöttek cache-ből
+            if degraded:
+                pdf.set_font("Arial", "B", 11)
+                pdf.set_text_color(255, 140, 0)
+                pdf.cell(0, 7, "Data Quality Notice (degraded inputs):", 0, 1)
+                pdf.set_font("Arial", "", 10)
+                pdf.set_text_color(0, 0, 0)
+                for stage_name, reason in degraded.items():
+                    pdf.multi_cell(0, 5, f"* {stage_name}: {reason}".encode('latin-1', 'replace').decode('latin-1'))
+                pdf.ln(3)
+
+            # Determinisztikus red flag találatok (kulcsszó előszűrő a leírásra és a hírekre)
+            if red_flags and red_flags.get('hits'):
+                pdf.set_font("Arial", "B", 11)
+                pdf.set_text_color(200, 0, 0)
+                pdf.cell(0, 7, f"Red Flag Scan: {red_flags['count']} signature(s), score {red_flags['score']}/100", 0, 1)
+                pdf.set_font("Arial", "", 10)
+                pdf.set_text_color(0, 0, 0)
+                for hit in red_flags['hits']:
+                    line = (f"* [{hit['severity'].upper()}] {hit['category'].replace('_', ' ')}: "
+                            f"\"{hit['pattern']}\" x{hit['count']} in {hit['source']} - ...{hit['snippet']}...")
+                    pdf.multi_cell(0, 5, line.encode('latin-1', 'replace').decode('latin-1'))
+                pdf.ln(3)
+
             # --- 2. Szekció: Technikai Grafikonok ---
             trend_img = None
             radar_img = None
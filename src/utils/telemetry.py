@@ -0,0 +1,220 @@
+import contextvars
+import datetime
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from loguru import logger
+from config.settings import settings
+from src.utils.logging_setup import SizeOrTimeRotation
+
+# Az aktuális span (asyncio taskok és szálak között öröklődik)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("chainsentinel_span", default=None)
+
+
+class Span:
+    """Egy mért szakasz: név, időtartam és tetszőleges attribútumok (retry, cache, méret...)."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "duration_s", "attrs")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:12]
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.duration_s: Optional[float] = None
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round((self.duration_s or 0.0) * 1000, 3),
+            "attrs": self.attrs,
+        }
+
+
+class Telemetry:
+    """
+    Könnyűsúlyú, függőség nélküli tracing + metrikák.
+    - span(): időmérés kontextuskezelővel (sync és async kódban is), szülő-gyerek kapcsolattal,
+    - incr(): címkézett számlálók (429-ek, retry-k, cache találatok, payload bájtok),
+    - export: JSON Lines (span-ek) és Prometheus textfile (összesítők) a settings.LOG_DIR alá.
+    A memóriában tartott span-ek száma korlátos, így a hosszan futó folyamatoknál sem nő.
+    """
+
+    def __init__(self, max_spans: int = 10000):
+        self._lock = threading.Lock()
+        self._spans: deque = deque(maxlen=max_spans)
+        self._finished = 0  # Összes lezárt span (sorszám)
+        self._exported = 0  # Eddig a sorszámig már kiírtuk a JSONL-be
+        self._counters: Dict[Tuple[str, Tuple], float] = defaultdict(float)
+        # span név -> [darab, összidő, max]
+        self._durations: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+        self._export_lock = threading.Lock()
+        self._rotation: Optional[SizeOrTimeRotation] = None
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Span]:
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        span = Span(name, trace_id, parent.span_id if parent else None, attrs)
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            span.duration_s = time.perf_counter() - started
+            _current_span.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+            self._finished += 1
+            stats = self._durations[span.name]
+            stats[0] += 1
+            stats[1] += span.duration_s
+            stats[2] = max(stats[2], span.duration_s)
+
+    def incr(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def counter(self, name: str, **labels) -> float:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        return self._counters.get(key, 0.0)
+
+    @staticmethod
+    def current_trace_id() -> Optional[str]:
+        span = _current_span.get()
+        return span.trace_id if span else None
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            spans = list(self._spans)
+        return [s for s in spans if trace_id is None or s.trace_id == trace_id]
+
+    def breakdown(self, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Span név szerinti összesítés (a --profile kimenete), összidő szerint csökkenő sorrendben."""
+        stats: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+        for span in self.spans(trace_id):
+            entry = stats[span.name]
+            entry[0] += 1
+            entry[1] += span.duration_s
+            entry[2] = max(entry[2], span.duration_s)
+        rows = [
+            {"name": name, "count": int(count), "total_ms": round(total * 1000, 1), "max_ms": round(peak * 1000, 1)}
+            for name, (count, total, peak) in stats.items()
+        ]
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    # --- Export ---
+    def export_jsonl(self, path: Optional[Path] = None) -> Path:
+        """
+        Az előző export óta lezárt span-ek hozzáfűzése (traces.jsonl). A fájl a naplókkal azonos
+        méret / idő alapú rotációt kap (TRACE_ROTATION_MB, LOG_ROTATION_TIME), és legfeljebb
+        TRACE_BACKUPS régi példány marad, így a hosszan futó szerver sem növeli korlátlanul.
+        """
+        path = Path(path) if path else settings.LOG_DIR / "traces.jsonl"
+        with self._lock:
+            pending = min(self._finished - self._exported, len(self._spans))
+            new_spans = list(self._spans)[len(self._spans) - pending:]
+            self._exported = self._finished
+        if not new_spans:
+            return path
+        payload = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in new_spans)
+        with self._export_lock:
+            if self._rotation is None:
+                self._rotation = SizeOrTimeRotation(settings.TRACE_ROTATION_MB, settings.LOG_ROTATION_TIME)
+            size = path.stat().st_size if path.exists() else 0
+            if size and self._rotation.should_rotate(datetime.datetime.now(), size, len(payload.encode("utf-8"))):
+                self._rotate(path)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(payload)
+        return path
+
+    @staticmethod
+    def _rotate(path: Path):
+        """traces.jsonl -> traces.<időbélyeg>.jsonl, a legrégebbiek törlése TRACE_BACKUPS fölött."""
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path.replace(path.with_name(f"{path.stem}.{stamp}{path.suffix}"))
+        backups = sorted(path.parent.glob(f"{path.stem}.*{path.suffix}"))
+        for old in backups[:max(0, len(backups) - settings.TRACE_BACKUPS)]:
+            old.unlink(missing_ok=True)
+
+    @staticmethod
+    def _label_value(value: Any) -> str:
+        """Prometheus címke érték escape (a span nevek és coin id-k felhasználói bemenetből is jöhetnek)."""
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            durations = {name: list(v) for name, v in self._durations.items()}
+            counters = dict(self._counters)
+        # A summary családban csak _count / _sum (és kvantilis) lehet; a maximum külön gauge család
+        summary = [
+            "# HELP chainsentinel_span_duration_seconds Szakaszok futási ideje.",
+            "# TYPE chainsentinel_span_duration_seconds summary",
+        ]
+        peaks = [
+            "# HELP chainsentinel_span_duration_seconds_max Szakaszok leghosszabb futási ideje.",
+            "# TYPE chainsentinel_span_duration_seconds_max gauge",
+        ]
+        for name, (count, total, peak) in sorted(durations.items()):
+            label = self._label_value(name)
+            summary.append(f'chainsentinel_span_duration_seconds_count{{span="{label}"}} {int(count)}')
+            summary.append(f'chainsentinel_span_duration_seconds_sum{{span="{label}"}} {total:.6f}')
+            peaks.append(f'chainsentinel_span_duration_seconds_max{{span="{label}"}} {peak:.6f}')
+        lines = summary + peaks
+
+        typed = set()
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"chainsentinel_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            label_text = ",".join(f'{k}="{self._label_value(v)}"' for k, v in labels)
+            lines.append(f"{metric}{{{label_text}}} {value:g}" if label_text else f"{metric} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path: Optional[Path] = None) -> Path:
+        """Prometheus textfile (node_exporter textfile collector kompatibilis), atomikus cserével."""
+        path = Path(path) if path else settings.LOG_DIR / "metrics.prom"
+        tmp = path.with_suffix(".prom.tmp")
+        tmp.write_text(self.render_prometheus(), encoding="utf-8")
+        tmp.replace(path)
+        return path
+
+    def export(self):
+        try:
+            self.export_jsonl()
+            self.export_prometheus()
+        except OSError as e:
+            logger.warning(f"A telemetria exportja nem sikerült: {e}")
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._durations.clear()
+            self._finished = self._exported = 0
+
+
+# Folyamat szintű példány: minden szolgáltatás ide jelent
+tracer = Telemetry()
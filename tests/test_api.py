@@ -1,4 +1,5 @@
 import pytest
+import asyncio
 from unittest.mock import AsyncMock
 from src.services.coingecko import CoinGeckoService
 from src.core.risk_engine import RiskEngine
@@ -93,15 +94,118 @@ async def test_coingecko_service_mocked(mocker):
     assert len(history) == 2
     assert history[0] == 50000
 
-# --- 3. WEB SEARCH MOCKOLÁSA ---
+# --- 3. WEB SEARCH (LOKÁLIS STAND-IN BACKENDDEL) ---
 @pytest.mark.asyncio
-async def test_web_search_async(mocker):
-    service = WebSearchService()
-    
-    mocker.patch.object(service, '_search_sync', return_value="1. [Test Hack] - Fake news")
+async def test_web_search_async():
+    def fake_backend(query, max_results):
+        return [{"title": "Test Hack", "body": "Fake news", "href": "https://example.test/hack"}]
+
+    service = WebSearchService(backend=fake_backend)
     
     result = await service.search_news("TestToken")
     assert "Test Hack" in result
+    # A három párhuzamos lekérdezés ugyanazt a cikket adta: deduplikálva egyszer szerepel
+    assert result.count("Test Hack") == 1
+
+@pytest.mark.asyncio
+async def test_web_search_deadline_and_cache():
+    import threading
+    release = threading.Event()
+    calls = []
+
+    def slow_backend(query, max_results):
+        calls.append(query)
+        if "hack" in query:
+            release.wait(5)  # Beragadt lekérdezés
+        return [{"title": query, "body": "", "href": query}]
+
+    service = WebSearchService(backend=slow_backend, deadline=0.2)
+    results = await service.search("Coin")
+    # A lassú lekérdezés kimaradt, a többi megjött
+    assert len(results) == 2
+    # Ismételt kérés a beragadt lekérdezésre: nem indul új szál, a futó lekérdezés eredményére várunk
+    assert len(await service.search("Coin")) == 2
+    assert sum("hack" in query for query in calls) == 1
+
+    # A késve megérkező eredmény a cache-be kerül, a következő hívás már hálózat nélkül teljes
+    release.set()
+    for _ in range(50):
+        if len(service._cache) == 3:
+            break
+        await asyncio.sleep(0.02)
+    calls.clear()
+    assert len(await service.search("Coin")) == 3
+    assert calls == []
+
+    # A cache méretkorlátos: betelt állapotban a legrégebben használt bejegyzés esik ki
+    from src.utils.lru_cache import LRUCache
+    lru = LRUCache(2)
+    lru["a"], lru["b"] = 1, 2
+    assert lru.get("a") == 1
+    lru["c"] = 3
+    assert "b" not in lru and len(lru) == 2 and lru.prune(lambda value: value > 2) == 1
+
+@pytest.mark.asyncio
+async def test_latency_budget_degrades_gracefully():
+    from src.core.latency_budget import LatencyBudget, StageTimeout
+    budget = LatencyBudget(1.0, {"history": 0.1, "coin_data": 0.1, "fast": 0.5})
+
+    # Opcionális lassú szakasz: megszakítjuk, a cache-elt érték jön vissza
+    result = await budget.run("history", asyncio.sleep(5, result=[1.0]), fallback=lambda: [0.5])
+    assert result == [0.5]
+    assert "cache" in budget.degraded["history"]
+
+    # Időben kész szakasz: nincs degradáció
+    assert await budget.run("fast", asyncio.sleep(0, result="ok")) == "ok"
+    assert "fast" not in budget.degraded
+
+    # Kötelező szakasz cache nélkül: StageTimeout
+    with pytest.raises(StageTimeout):
+        await budget.run("coin_data", asyncio.sleep(5), fallback=lambda: None, required=True)
+
+    # Előre félretett PDF keret: a teljes részesedését kihasználó LLM után is marad rá idő
+    budget = LatencyBudget(1.0, {"llm": 0.9, "pdf": 0.3}, reserve=("pdf",))
+    assert budget.stage_timeout("llm") <= 0.7
+    assert await budget.run("llm", asyncio.sleep(5), fallback=None) is None
+    assert budget.stage_timeout("pdf") >= 0.25
+
+# A letöltések az ML pontozással átfedésben futnak; foglalt PDF zárra legfeljebb a határidőig várunk
+@pytest.mark.asyncio
+async def test_audit_overlaps_downloads_and_bounded_pdf_lock():
+    import threading
+    import time
+    from benchmarks.fakes import FixtureCoinGeckoService, fixture_search_backend
+    from src.core import pipeline as pipeline_module
+    from src.core.pipeline import AnalysisPipeline
+    from src.core.rag_engine import RAGEngine
+
+    # Időmérés helyett kölcsönös várakozás: soros futásnál egyik fél sem látná a másikat elindulni
+    history_started, scoring_started = threading.Event(), threading.Event()
+    overlapped = {}
+
+    class SlowHistory(FixtureCoinGeckoService):
+        async def get_historical_prices(self, coin_id, days=None, interval=None):
+            history_started.set()
+            overlapped["history"] = await asyncio.to_thread(scoring_started.wait, 5)
+            return await super().get_historical_prices(coin_id, days, interval)
+
+    class SlowScoring(RiskEngine):
+        def calculate_risk_metrics(self, data):
+            scoring_started.set()
+            overlapped["scoring"] = history_started.wait(5)  # Szinkron, CPU-jellegű szakasz
+            return super().calculate_risk_metrics(data)
+
+    pipeline = AnalysisPipeline(SlowHistory(), WebSearchService(backend=fixture_search_backend),
+                                None, RAGEngine(), SlowScoring())
+    result = await pipeline.audit("bitcoin", render_pdf=False, tier="rules")
+    assert "history" not in result["degraded"] and result["quant"]["observations"] > 7
+    assert overlapped == {"history": True, "scoring": True}
+
+    with pipeline_module._PDF_RENDER_LOCK:
+        started = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            await asyncio.to_thread(AnalysisPipeline._render_pdf, time.monotonic() + 0.1)
+        assert time.perf_counter() - started < 1
 
 # --- 4. LLM ENGINE MOCKOLÁSA ---
 @pytest.mark.asyncio
@@ -115,4 +219,229 @@ async def test_llm_engine_mocked(mocker):
     
     assert "error" not in result
     assert result["verdict"] == "Safe"
-    assert result["score"] == 90
\ No newline at end of file
+    assert result["score"] == 90
+
+# Séma + toleráns javítás: kódblokk, szimpla idézőjel, rossz típusok újrahívás nélkül
+@pytest.mark.asyncio
+async def test_llm_schema_repair_and_bounded_retry(mocker):
+    from src.core.llm_schemas import AuditAnalysis, PortfolioPlan, repair_json
+
+    assert repair_json("Sure!\n```json\n{\"score\": 70, \"pros\": [\"a\",],}\n```\nHope it helps") == \
+        {"score": 70, "pros": ["a"]}
+    assert repair_json("{'verdict': 'Safe', 'ok': true}") == {"verdict": "Safe", "ok": True}
+    assert repair_json('{"summary": "cut off", "pros": ["x"]') == {"summary": "cut off", "pros": ["x"]}  # Csonka
+    assert repair_json('{"summary": "cut of') is None  # Nyitott szöveg: nem javítható
+    assert repair_json("no json here") is None
+
+    engine = LLMEngine()
+    chat = mocker.patch('ollama.AsyncClient.chat', new_callable=AsyncMock, return_value={'message': {
+        'content': "Here you go: {'Verdict': 'high_risk', 'score': '85/100', 'pros': 'Liquid\\n- Listed'}"}})
+    result = await engine.analyze_json("p", "s", schema=AuditAnalysis)
+    assert chat.await_count == 1
+    assert result == {"verdict": "High Risk", "score": 85, "summary": "", "chart_analysis": "",
+                      "pros": ["Liquid", "Listed"], "cons": []}
+    # Hiányzó pontszám: az ML pontszám (context) pótolja
+    chat.return_value = {'message': {'content': '{"verdict": "Scam"}'}}
+    assert (await engine.analyze_json("p", "s", schema=AuditAnalysis, context={"score": 91}))["score"] == 91
+
+    # Az ítélet soha nem fordulhat át: tagadás / részszó / ellentmondás esetén a pontszám sávja dönt
+    verdicts = [({"verdict": "Unsafe", "score": 85}, "High Risk"), ({"verdict": "Not safe", "score": 85}, "High Risk"),
+                ({"verdict": "Not a scam", "score": 20}, "Safe"), ({"verdict": "Low Risk", "score": 15}, "Safe"),
+                ({"verdict": "Safe", "score": 90}, "High Risk"), ({"verdict": "SCAM!", "score": 95}, "Scam"),
+                ({"verdict": "safe or high risk", "score": 30}, "Safe"), ({"verdict": "high-risk", "score": 60}, "High Risk")]
+    for payload, expected in verdicts:
+        assert AuditAnalysis.model_validate(payload).verdict == expected, payload
+
+    # Javíthatatlan válasz: legfeljebb `retries` újragenerálás, utána hiba
+    chat.reset_mock()
+    chat.side_effect = [{'message': {'content': 'garbage'}}, {'message': {'content': '{"allocation": {"BTC": "$4,000"}}'}}]
+    plan = await engine.analyze_json("p", "s", schema=PortfolioPlan, retries=1)
+    assert plan == {"allocation": {"BTC": 4000.0}, "reasoning": ""} and chat.await_count == 2
+    chat.side_effect = None
+    chat.return_value = {'message': {'content': '{"allocation": {}}'}}
+    assert "error" in await engine.analyze_json("p", "s", schema=PortfolioPlan, retries=1)
+
+# Stabil prompt előtag: az audit prompt eleje eszköztől független, a prefix cache becslés jelzi a spórolást
+@pytest.mark.asyncio
+async def test_stable_prompt_prefix_reuse():
+    from types import SimpleNamespace
+    from benchmarks.fakes import FakeOllamaClient
+    from src.core.pipeline import AnalysisPipeline
+    from src.utils.telemetry import tracer
+
+    risk = {"quantitative_score": 40, "dimensions": {"Liquidity Strength": 5}}
+    quant = {"annualized_volatility_pct": 50, "max_drawdown_pct": -20, "sharpe_ratio": 1, "trend_status": "Up"}
+    system = AnalysisPipeline.build_audit_system_prompt("RULE: rug pulls" * 200)
+    assert system == AnalysisPipeline.build_audit_system_prompt("RULE: rug pulls" * 200)
+    prompts = [AnalysisPipeline.build_audit_prompt(SimpleNamespace(name=name), risk, quant, "news")
+               for name in ("Bitcoin", "Pepe")]
+    assert all(p.startswith("ASSET:") and "rug pulls" not in p for p in prompts)
+
+    engine = LLMEngine()
+    engine.client = FakeOllamaClient(latency=0.01)
+    tracer.reset()
+    for prompt in prompts:
+        await engine.analyze_json(prompt, system)
+    cold, warm = [s.attrs for s in tracer.spans() if s.name == "llm.chat"]
+    assert not cold["prefix_hit"] and warm["prefix_hit"] and warm["prefill_saved_ms"] > 0
+    assert warm["prompt_tokens"] < cold["prompt_tokens"] / 10
+    assert tracer.counter("llm_prefill_saved_seconds_total") > 0
+
+# Többszintű audit: egyértelmű esetben nincs LLM, útvonalanként modell + időkorlátos visszalépés
+@pytest.mark.asyncio
+async def test_tiered_audit_and_model_routes(monkeypatch):
+    import time
+    from config.settings import settings
+    from benchmarks.fakes import FakeOllamaClient, FixtureCoinGeckoService, fixture_search_backend
+    from src.core.pipeline import AnalysisPipeline
+    from src.core.rag_engine import RAGEngine
+
+    calm = {"annualized_volatility_pct": 40, "max_drawdown_pct": -8, "sharpe_ratio": 1.2, "trend_status": "Bullish"}
+    risky = {"annualized_volatility_pct": 180, "max_drawdown_pct": -60, "sharpe_ratio": -1, "trend_status": "Bearish"}
+    tier = lambda score, quant, **extra: AnalysisPipeline.choose_audit_tier(
+        {"quantitative_score": score, "ml_active": True, **extra}, quant)[0]
+    assert tier(5, calm) == "rules" and tier(95, risky) == "rules"
+    assert tier(25, {**calm, "annualized_volatility_pct": 80}) == "fast"
+    assert tier(50, calm) == "full" and tier(95, calm) == "full"  # Határeset / ellentmondás
+    assert tier(5, calm, red_flags={"critical": 1}) == "full"
+    assert AnalysisPipeline.choose_audit_tier({"quantitative_score": 5, "ml_active": False}, calm)[0] == "full"
+
+    class SlowBigModel(FakeOllamaClient):
+        async def chat(self, model, messages, format=None, **kwargs):
+            if model == "big":
+                await asyncio.sleep(1)
+            return await super().chat(model, messages, format, **kwargs)
+
+    monkeypatch.setattr(settings, "MODEL_NAME", "big")
+    monkeypatch.setattr(settings, "SMALL_MODEL_NAME", "tiny")
+    monkeypatch.setattr(settings, "LLM_ROUTE_TIMEOUTS", {**settings.LLM_ROUTE_TIMEOUTS, "audit_full": 0.05})
+    llm = LLMEngine()
+    llm.client = SlowBigModel()
+    result, model = await llm.analyze_routed("audit_full", "p", "s")
+    assert model == "tiny" and result["verdict"] == "High Risk"  # A nagy modell lejárt: visszalépés
+
+    # Szakasz határidővel: a route időkorlátja (60s) helyett a hátralévő idő fele jut a nagy modellre,
+    # így a tartalék modell még a határidőn belül válaszol
+    monkeypatch.setattr(settings, "LLM_ROUTE_TIMEOUTS", {**settings.LLM_ROUTE_TIMEOUTS, "audit_full": 60.0})
+    result, model = await llm.analyze_routed("audit_full", "p", "s", deadline=time.monotonic() + 0.2)
+    assert model == "tiny" and "error" not in result  # Határidő nélkül a (1s alatt válaszoló) nagy modell nyerne
+
+    pipeline = AnalysisPipeline(FixtureCoinGeckoService(), WebSearchService(backend=fixture_search_backend),
+                                llm, RAGEngine(), RiskEngine())
+    calls = llm.client.calls
+    result = await pipeline.audit("bitcoin", render_pdf=False, tier="rules")
+    assert result["tier"]["tier"] == "rules" and result["tier"]["model"] is None and llm.client.calls == calls
+    assert result["analysis"]["summary"].startswith("Rule-based")
+
+    result = await pipeline.audit("bitcoin", render_pdf=False, tier="fast")
+    assert result["tier"]["route"] == "audit_fast" and result["tier"]["model"] == "tiny"
+    auto = await pipeline.audit("bitcoin", render_pdf=False)
+    assert auto["tier"]["requested"] == "auto" and auto["tier"]["tier"] in ("rules", "fast", "full")
+    with pytest.raises(ValueError):
+        await pipeline.audit("bitcoin", tier="huge")
+
+# --- 5. LOKÁLIS API SZERVER (SERVE MÓD) ---
+class FakeRiskEngine:
+    model_version = "test"
+    def start_watching(self): pass
+    def stop_watching(self): pass
+
+class FakePipeline:
+    def __init__(self):
+        self.risk_engine = FakeRiskEngine()
+        self.calls = 0
+    async def score(self, coin_id):
+        self.calls += 1
+        return {"id": coin_id, "quantitative_score": 12} if coin_id == "bitcoin" else None
+    async def audit(self, token, render_pdf=True, tier=None, days=None, interval=None):
+        return {"token": token, "analysis": {"verdict": "Safe"}, "tier": {"tier": tier or "auto"}, "pdf_path": None}
+    async def close(self): pass
+
+@pytest.mark.asyncio
+async def test_local_api_server(tmp_path, monkeypatch):
+    from aiohttp.test_utils import TestServer, TestClient
+    from src.api.server import LocalAPIServer
+    from config.settings import settings
+    monkeypatch.setattr(settings, "LOG_DIR", tmp_path)  # A trace export ne a valódi log mappába írjon
+
+    fake = FakePipeline()
+    client = TestClient(TestServer(LocalAPIServer(fake).build_app()))
+    await client.start_server()
+    try:
+        resp = await client.get("/score/bitcoin")
+        assert resp.status == 200
+        assert (await resp.json())["quantitative_score"] == 12
+
+        resp = await client.get("/score/nope")
+        assert resp.status == 404
+
+        resp = await client.post("/audit", json={"token": "bitcoin", "pdf": False})
+        assert (await resp.json())["analysis"]["verdict"] == "Safe"
+
+        resp = await client.post("/audit", json={})
+        assert resp.status == 400
+        resp = await client.post("/audit", json={"token": "bitcoin", "tier": "huge"})
+        assert resp.status == 400
+
+        resp = await client.get("/metrics")
+        assert resp.status == 200
+        assert "chainsentinel_span_duration_seconds" in await resp.text()
+
+        # Ugyanaz a (meleg) pipeline példány szolgálja ki a kéréseket
+        assert fake.calls == 2
+    finally:
+        await client.close()
+
+# --- 6. HIBAINJEKTÁLÓ STAND-IN SZERVEREK (TERHELÉSES TESZTHEZ) ---
+@pytest.mark.asyncio
+async def test_standin_servers_fault_injection(monkeypatch):
+    import ollama
+    from config.settings import settings
+    from benchmarks.standin import CoinGeckoStandIn, OllamaStandIn, FaultConfig, start_site
+    from src.utils.rate_limiter import AsyncRateLimiter
+    monkeypatch.setattr(settings, "COINGECKO_RETRY_BACKOFF", 0.01)
+    # A folyamat közös (30/perc) kerete helyett gyors, tesztenkénti keret
+    monkeypatch.setattr(CoinGeckoService, "rate_limiter", AsyncRateLimiter(1000, burst=100))
+
+    healthy = CoinGeckoStandIn(FaultConfig())
+    throttled = CoinGeckoStandIn(FaultConfig(rate_429=1.0))
+    ollama_standin = OllamaStandIn(FaultConfig())
+    runners = []
+    try:
+        for standin in (healthy, throttled, ollama_standin):
+            runners.append(await start_site(standin.build_app()))
+        (_, healthy_url), (_, throttled_url), (_, ollama_url) = runners
+
+        service = CoinGeckoService(base_url=f"{healthy_url}/api/v3")
+        assert (await service.get_coin_data("bitcoin"))["name"] == "Bitcoin"
+        assert (await service.get_coin_data("loadcoin-7"))["id"] == "loadcoin-7"  # Szintetikus coin
+        assert len(await service.get_markets(["bitcoin", "loadcoin-1"])) == 2
+        assert len(await service.get_historical_prices("solana")) == 31
+        await service.close()
+
+        # Minden kérés 429: a kliens a retry keret után feladja
+        service = CoinGeckoService(base_url=f"{throttled_url}/api/v3")
+        assert await service.get_coin_data("bitcoin", retries=3) is None
+        assert throttled.stats["injected_429"] == 3
+        await service.close()
+
+        llm = LLMEngine()
+        llm.client = ollama.AsyncClient(host=ollama_url)
+        result = await llm.analyze_json("prompt", "system")
+        assert result["verdict"] == "High Risk"
+        assert ollama_standin.stats["requests"] == 1
+    finally:
+        for runner, _ in runners:
+            await runner.cleanup()
+
+# Terheléses teszt füstteszt: a teljes run_load_test út kis beállításokkal (ne törhessen el észrevétlenül)
+@pytest.mark.asyncio
+async def test_load_test_smoke():
+    from benchmarks.loadtest import run_load_test
+    from benchmarks.standin import FaultConfig
+
+    report = await run_load_test(coins=3, rounds=1, audits=2, concurrency=2, faults=FaultConfig(seed=1),
+                                 llm_faults=FaultConfig(seed=1), calls_per_minute=60000, backoff=0.01)
+    assert report["dashboard"]["count"] == 1 and report["audit"]["count"] == 2
+    assert sum(report["audit_outcomes"].values()) == 2 and report["audit_outcomes"]["failed"] == 0
+    assert report["audit_tiers"] == {"full": 2}
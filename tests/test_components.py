@@ -22,14 +22,17 @@ def test_rag_engine_loading():
 
 # 2. Teszteljük, hogy a Hírek modul ad-e vissza szöveget
 def test_news_service():
-    news = NewsService()
+    # Lokális stand-in a DuckDuckGo backend helyett (nincs valódi hálózati hívás)
+    news = NewsService(backend=lambda query, max_results: [{"title": "Bitcoin ETF", "body": "Listing news"}])
     result = news.get_latest_news("Bitcoin")
     
     assert isinstance(result, str)
     assert len(result) > 0
 
-# 3. Teszteljük a PDF generálást
-def test_pdf_generation():
+# 3. Teszteljük a PDF generálást (ideiglenes mappába, nem a valódi riportok közé)
+def test_pdf_generation(tmp_path, monkeypatch):
+    from config.settings import settings
+    monkeypatch.setattr(settings, "REPORT_DIR", tmp_path)
     dummy_data = {
         "verdict": "Safe",
         "score": 90,
@@ -42,6 +45,417 @@ def test_pdf_generation():
     
     assert path is not None
     assert os.path.exists(path)
-    
-    # Takarítás (opcionális, ha látni akarod a fájlt, vedd ki)
-    # os.remove(path)
\ No newline at end of file
+    assert os.path.dirname(path) == str(tmp_path)
+# 4. Élő monitor: csak a változott bemenetű sorok kerülnek újrapontozásra
+@pytest.mark.asyncio
+async def test_market_monitor_rescores_only_changed_rows():
+    from src.core.market_monitor import MarketMonitor
+    from src.core.risk_engine import RiskEngine
+
+    rows = [
+        {"id": "bitcoin", "name": "Bitcoin", "market_cap_rank": 1, "current_price": 65000.0,
+         "market_cap": 1.3e12, "total_volume": 3.6e10, "high_24h": 66000.0, "low_24h": 64000.0,
+         "price_change_percentage_24h": -1.7, "ath_change_percentage": -47.0},
+        {"id": "pepe", "name": "Pepe", "market_cap_rank": 40, "current_price": 0.00001,
+         "market_cap": 4e9, "total_volume": 8e8, "high_24h": 0.000011, "low_24h": 0.000009,
+         "price_change_percentage_24h": 6.5, "ath_change_percentage": -60.0},
+    ]
+
+    class FakeCoinGecko:
+        async def get_markets(self, coin_ids):
+            return [dict(r) for r in rows]
+
+    monitor = MarketMonitor(FakeCoinGecko(), RiskEngine(), ["bitcoin", "pepe", "bitcoin"])
+    assert await monitor.refresh() == {"bitcoin", "pepe"}
+    assert await monitor.refresh() == set()
+
+    # Tickenkénti apró ármozgás (kvantálási lépésen belül): nincs újrapontozás
+    rows[0].update(current_price=65010.0, market_cap=1.3001e12, price_change_percentage_24h=-1.68)
+    assert await monitor.refresh() == set() and monitor.scored_last_tick == 0
+
+    rows[1]["current_price"] = 0.000012
+    assert await monitor.refresh() == {"pepe"}
+    assert monitor.scored_last_tick == 1
+    assert [r["id"] for r in monitor.sorted_rows()] == ["bitcoin", "pepe"]
+
+# 5. Riasztó motor: vektorizált kiértékelés, felfutó él + cooldown deduplikáció
+def test_alert_engine_vectorized_rules(tmp_path):
+    from src.core.alert_engine import AlertEngine, AlertRule
+
+    rules = [
+        AlertRule(name="high_risk", metric="risk_score", op=">=", threshold=80, cooldown_s=100),
+        AlertRule(name="illiquid", metric="liquidity_ratio", op="<", threshold=0.01, cooldown_s=0, coins=["dead"]),
+    ]
+    engine = AlertEngine(rules, ["safe", "risky", "dead"])
+    rows = {
+        "safe": {"risk_score": 10, "liquidity_ratio": 0.005},
+        "risky": {"risk_score": 85, "liquidity_ratio": 0.2},
+        "dead": {"risk_score": 95, "liquidity_ratio": 0.001},
+    }
+    engine.update(rows)
+
+    fired = {(e["coin"], e["rule"]) for e in engine.evaluate(now=1000)}
+    # A "safe" illikvid, de az illiquid szabály csak a "dead" coinra vonatkozik
+    assert fired == {("risky", "high_risk"), ("dead", "high_risk"), ("dead", "illiquid")}
+
+    # Fennálló állapot: nincs ismételt riasztás
+    assert engine.evaluate(now=1001) == []
+
+    # Kilép, majd cooldown-on belül visszalép: elnyomjuk; cooldown után újra riaszt
+    rows["risky"]["risk_score"] = 20
+    engine.update(rows, {"risky"})
+    engine.evaluate(now=1002)
+    rows["risky"]["risk_score"] = 90
+    engine.update(rows, {"risky"})
+    assert engine.evaluate(now=1050) == []
+    rows["risky"]["risk_score"] = 20
+    engine.update(rows, {"risky"})
+    engine.evaluate(now=1060)
+    rows["risky"]["risk_score"] = 90
+    engine.update(rows, {"risky"})
+    assert [e["coin"] for e in engine.evaluate(now=1200)] == ["risky"]
+
+    # A szabály coinjai szimbólummal / névvel is megadhatók (CoinIndex feloldás)
+    from src.core.coin_index import CoinIndex
+    index = CoinIndex(tmp_path / "coin_index.json")
+    index.build([{"id": "solana", "symbol": "sol", "name": "Solana"}, {"id": "dead", "symbol": "ded", "name": "Dead"}],
+                ranks={"solana": 5})
+    rule = AlertRule(name="sol_risk", metric="risk_score", op=">=", threshold=50, coins=["SOL", "nope-coin"])
+    engine = AlertEngine([rule], ["solana", "dead"], coin_index=index)
+    engine.update({"solana": {"risk_score": 60}, "dead": {"risk_score": 95}})
+    assert [e["coin"] for e in engine.evaluate(now=0)] == ["solana"]
+
+# Telemetria: egymásba ágyazott span-ek, számlálók, JSONL és Prometheus export
+@pytest.mark.asyncio
+async def test_telemetry_spans_and_export(tmp_path, monkeypatch):
+    import asyncio
+    import json
+    from src.utils.telemetry import Telemetry
+
+    telemetry = Telemetry()
+    with telemetry.span("audit", token="x") as root:
+        async def child(name):
+            with telemetry.span(name):
+                await asyncio.sleep(0.01)
+        await asyncio.gather(child("stage.history"), child("stage.news"))
+    telemetry.incr("http_429_total", service="coingecko", endpoint="coin")
+    telemetry.incr("http_429_total", service="coingecko", endpoint="coin")
+
+    spans = telemetry.spans(root.trace_id)
+    assert {s.name for s in spans} == {"audit", "stage.history", "stage.news"}
+    # A párhuzamos taskok a gyökér span gyerekei
+    assert all(s.parent_id == root.span_id for s in spans if s.name != "audit")
+    assert telemetry.breakdown()[0]["name"] == "audit"
+
+    path = telemetry.export_jsonl(tmp_path / "traces.jsonl")
+    assert len(path.read_text().splitlines()) == 3
+    telemetry.export_jsonl(path)  # Csak az új span-eket fűzi hozzá
+    assert len(path.read_text().splitlines()) == 3
+    assert json.loads(path.read_text().splitlines()[0])["trace"] == root.trace_id
+
+    prom = telemetry.export_prometheus(tmp_path / "metrics.prom").read_text()
+    assert 'chainsentinel_http_429_total{endpoint="coin",service="coingecko"} 2' in prom
+    assert 'chainsentinel_span_duration_seconds_count{span="audit"} 1' in prom
+    # A maximum külön gauge család; a felhasználói bemenetből jövő címke értékek escape-elve
+    assert "# TYPE chainsentinel_span_duration_seconds_max gauge" in prom
+    assert prom.index("# TYPE chainsentinel_span_duration_seconds_max gauge") < \
+        prom.index('chainsentinel_span_duration_seconds_max{span="audit"}')
+    telemetry.incr("cache_requests_total", cache='evil"\\coin\nx')
+    assert 'cache="evil\\"\\\\coin\\nx"' in telemetry.render_prometheus()
+
+    # Méret alapú rotáció: a traces.jsonl nem nő korlátlanul, a régi példányok száma korlátos
+    from config.settings import settings
+    monkeypatch.setattr(settings, "TRACE_ROTATION_MB", 400 / (1024 * 1024))
+    monkeypatch.setattr(settings, "TRACE_BACKUPS", 2)
+    rotating = Telemetry()
+    for i in range(6):
+        with rotating.span("tick", i=i):
+            pass
+        rotating.export_jsonl(path)
+    assert path.stat().st_size <= 400 and len(list(tmp_path.glob("traces.*.jsonl"))) == 2
+
+
+# Benchmark: rögzített fixture-ök a valódi CoinGeckoService kódon át, regresszió jelzés
+@pytest.mark.asyncio
+async def test_benchmark_fixtures_and_regression_check():
+    from benchmarks.fakes import FixtureCoinGeckoService
+    from benchmarks.run import compare
+
+    service = FixtureCoinGeckoService()
+    assert (await service.get_coin_data("bitcoin"))["symbol"] == "btc"
+    assert await service.get_coin_data("nope") is None
+    assert len(await service.get_historical_prices("bitcoin", days=30)) == 31
+    assert {row["id"] for row in await service.get_markets(["bitcoin", "pepe"])} == {"bitcoin", "pepe"}
+
+    baseline = {"a": {"p50_ms": 10.0}, "b": {"p50_ms": 10.0}, "c": {"p50_ms": 10.0}}
+    results = {"a": {"p50_ms": 13.0}, "b": {"p50_ms": 11.0}, "c": {"p50_ms": 5.0}, "d": {"p50_ms": 1.0}}
+    assert compare(results, baseline, threshold=0.25) == {"a": "regression", "b": "ok", "c": "improved", "d": "new"}
+
+# Tömör snapshot: ugyanaz a pontszám, mint a nyers dict-ből; a cache snapshotot tárol
+@pytest.mark.asyncio
+async def test_market_snapshot_structured_scoring():
+    import time
+    from benchmarks.fakes import FixtureCoinGeckoService, load_fixture
+    from src.core.market_snapshot import MarketSnapshot, to_structured
+
+    payload = load_fixture("coins.json")["bitcoin"]
+    snap = MarketSnapshot.from_coin_payload(payload)
+    assert snap.name == "Bitcoin" and snap.current_price == payload["market_data"]["current_price"]["usd"]
+    assert not hasattr(snap, "__dict__")
+
+    rows = load_fixture("markets.json")
+    array = to_structured(rows)
+    assert array.shape == (len(rows),) and array["market_cap"][0] == rows[0]["market_cap"]
+
+    from src.core.risk_engine import RiskEngine
+    engine = RiskEngine()
+    payloads = list(load_fixture("coins.json").values())
+    snaps = [MarketSnapshot.from_coin_payload(p) for p in payloads]
+    assert engine.calculate_risk_batch(snaps) == engine.calculate_risk_batch(payloads)
+
+    service = FixtureCoinGeckoService()
+    first = await service.get_snapshot("bitcoin")
+    assert isinstance(first, MarketSnapshot)
+    assert await service.get_snapshot("bitcoin") is first
+    assert service.get_cached_snapshot("bitcoin") is first
+    assert await service.get_snapshot("nope") is None
+
+    # A cache-ek korlátosak: lejárt + tartalék időn túli snapshot kisöprődik, az idősor cache LRU
+    from config.settings import settings
+    service._coin_cache["old"] = (time.monotonic() - settings.COINGECKO_STALE_TTL - 1, first)
+    service._last_sweep = 0.0
+    assert service._sweep_coin_cache() == 1 and "old" not in service._coin_cache and "bitcoin" in service._coin_cache
+    for i in range(settings.COINGECKO_HISTORY_CACHE_MAX + 5):
+        service._history_cache[(f"coin-{i}", 30, "hourly")] = i
+    assert len(service._history_cache) == settings.COINGECKO_HISTORY_CACHE_MAX
+
+# Screener: toplista -> egy vektorizált pontozás -> oszlopos szűrés és rendezés
+@pytest.mark.asyncio
+async def test_market_screen_filter_sort_and_export(tmp_path):
+    import pandas as pd
+    from benchmarks.fakes import FixtureCoinGeckoService
+    from src.core.pipeline import AnalysisPipeline
+    from src.core.risk_engine import RiskEngine
+    from src.core.screener import ScreenError, apply_screen, export_screen
+
+    pipeline = AnalysisPipeline(FixtureCoinGeckoService(), None, None, None, RiskEngine())
+    frame = await pipeline.market_screen(universe=4)
+    assert list(frame["market_cap_rank"]) == sorted(frame["market_cap_rank"]) and len(frame) == 4
+
+    frame = await pipeline.market_screen(universe=100)
+    result = apply_screen(frame, where="market_cap_rank > 1 and liquidity_ratio > 0", sort="-risk_score, market_cap_rank")
+    assert "bitcoin" not in set(result["id"])
+    assert list(result["risk_score"]) == sorted(result["risk_score"], reverse=True)
+    assert list(apply_screen(frame, sort="market_cap_rank desc", limit=2)["market_cap_rank"]) == \
+        sorted(frame["market_cap_rank"], reverse=True)[:2]
+
+    for bad_where, bad_sort in (("risk_score +", None), ("risk_score * 2", None), (None, "nonexistent")):
+        with pytest.raises(ScreenError):
+            apply_screen(frame, where=bad_where, sort=bad_sort)
+
+    path = export_screen(result, tmp_path / "screen.csv")
+    assert len(pd.read_csv(path)) == len(result)
+
+# Központi naplózás: JSON sink a LOG_DIR-be, modulonkénti szint, ritkítás
+def test_logging_setup_json_sampling_and_levels(tmp_path, monkeypatch):
+    import sys
+    import json
+    from loguru import logger
+    from config.settings import settings
+    from src.utils.logging_setup import setup_logging
+
+    monkeypatch.setattr(settings, "LOG_DIR", tmp_path)
+    monkeypatch.setattr(settings, "LOG_SAMPLE_BURST", 3)
+    monkeypatch.setattr(settings, "LOG_SAMPLE_WINDOW", 60.0)
+    monkeypatch.setattr(settings, "LOG_MODULE_LEVELS", {"tests": "WARNING"})
+    try:
+        setup_logging(console_level="CRITICAL", enqueue=False)
+        for i in range(10):
+            logger.warning("ismétlődő {}", i)  # Ugyanaz a hívási hely: csak 3 megy át
+        logger.info("ezt a modul szint elnyeli")
+        # A modul szinten eldobott rekordok nem fogyasztják a hívási hely keretét
+        for level in ["DEBUG"] * 5 + ["WARNING"] * 2:
+            logger.log(level, "vegyes {}", level)
+        logger.complete()
+
+        lines = [json.loads(l) for l in (tmp_path / settings.LOG_JSON_FILE).read_text(encoding="utf-8").splitlines()]
+        assert [l["msg"] for l in lines] == ["ismétlődő 0", "ismétlődő 1", "ismétlődő 2",
+                                             "vegyes WARNING", "vegyes WARNING"]
+        assert lines[0]["level"] == "WARNING" and lines[0]["module"] == "tests.test_components"
+    finally:
+        logger.remove()
+        logger.configure(patcher=None)
+        logger.add(sys.stderr)
+
+# Lokális coin index: szimbólum / név / előtag / fuzzy feloldás, rang szerinti egyértelműsítés
+@pytest.mark.asyncio
+async def test_coin_index_resolution_and_refresh(tmp_path):
+    import asyncio
+    from benchmarks.fakes import FixtureCoinGeckoService
+    from src.core.coin_index import CoinIndex
+    from src.core.pipeline import AnalysisPipeline
+
+    listing = [
+        {"id": "solana", "symbol": "sol", "name": "Solana"},
+        {"id": "sol-wormhole", "symbol": "sol", "name": "Wrapped SOL (Wormhole)"},
+        {"id": "sol", "symbol": "sol2", "name": "Sol Token"},
+        {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+        {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+    ]
+    index = CoinIndex(tmp_path / "coin_index.json")
+    assert index.resolve("SOL").method == "passthrough"  # Üres index: a régi viselkedés
+    index.build(listing, ranks={"solana": 5, "sol-wormhole": 400, "ethereum": 2, "bitcoin": 1})
+
+    match = index.resolve(" SOL ")
+    assert (match.id, match.method) == ("solana", "symbol") and set(match.alternatives) == {"sol-wormhole", "sol"}
+    assert index.resolve("bitcoin").method == "id"
+    assert index.resolve("Ethereum")[:1] == ("ethereum",)
+    assert (index.resolve("ether").id, index.resolve("ether").method) == ("ethereum", "prefix")
+    assert (index.resolve("etherium").id, index.resolve("etherium").method) == ("ethereum", "fuzzy")
+    assert index.resolve("zzzznotacoin") is None
+
+    index.save()
+    reloaded = CoinIndex(tmp_path / "coin_index.json")
+    assert reloaded.load() and len(reloaded) == len(listing) and reloaded.resolve("sol").id == "solana"
+    assert not reloaded.is_stale(max_age=3600) and reloaded.is_stale(max_age=-1)
+
+    # Frissítés a /coins/list + toplista alapján; ismeretlen tokenre nincs coin API hívás
+    service = FixtureCoinGeckoService()
+    fresh = CoinIndex(tmp_path / "fresh.json")
+    pipeline = AnalysisPipeline(service, None, None, None, None, coin_index=fresh)
+    matches = await pipeline.resolve_coins(["BTC", "Cardano", "nope-coin"])
+    assert matches["BTC"].id == "bitcoin" and matches["BTC"].rank == 1
+    assert matches["Cardano"].id == "cardano" and matches["nope-coin"] is None
+    assert (tmp_path / "fresh.json").exists()
+
+    calls = service.session.calls
+    result = await pipeline.audit("nope-coin", render_pdf=False)
+    assert result["error"] == "not_found" and service.session.calls == calls
+
+    # Párhuzamos kérések: egyetlen frissítés; hiba után visszalépés, nincs hálózati próbálkozás minden hívásnál
+    class CountingService(FixtureCoinGeckoService):
+        list_calls = 0
+
+        async def get_coin_list(self, retries=3):
+            CountingService.list_calls += 1
+            await asyncio.sleep(0.05)
+            return [] if self.fail else await super().get_coin_list(retries)
+
+    counting = CountingService()
+    counting.fail = True
+    empty = CoinIndex(tmp_path / "empty.json")
+    await asyncio.gather(*(empty.ensure_fresh(counting) for _ in range(5)))
+    await empty.ensure_fresh(counting)
+    assert CountingService.list_calls == 1 and empty.backing_off()
+
+    # Lejárt, de meglévő index: azonnal kiszolgál, a frissítés a háttérben fut
+    counting.fail, CountingService.list_calls = False, 0
+    stale = CoinIndex(tmp_path / "coin_index.json")
+    stale.load()
+    stale.updated_at = 0.0
+    await asyncio.gather(*(stale.ensure_fresh(counting) for _ in range(5)))
+    assert stale.is_stale() and stale.resolve("sol").id == "solana"
+    await stale._background
+    assert CountingService.list_calls == 1 and not stale.is_stale() and len(stale) > len(listing)
+
+# Red flag előszűrő: tudásbázis + deklarált szignatúrák, egy menetes Aho-Corasick keresés
+def test_red_flag_scanner_signatures_and_scoring(tmp_path):
+    from config.settings import settings
+    from src.core.market_snapshot import MarketSnapshot
+    from src.core.red_flags import AhoCorasick, RedFlagScanner, extract_kb_signatures
+    from src.core.risk_engine import RiskEngine
+
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    found = sorted((end, automaton.patterns[idx]) for end, idx in automaton.iter_matches("ushers"))
+    assert found == [(4, "he"), (4, "she"), (6, "hers")]
+
+    kb = tmp_path / "kb"
+    kb.mkdir()
+    (kb / "scams.txt").write_text(
+        "1. HONEYPOT SCAM:\n"
+        "   - Indicators:\n"
+        '     * Code contains functions like "disableTrading()".\n'
+        "2. OWNERSHIP:\n"
+        '   - Safe: Contract ownership is "renounced".\n'
+        '   - High Risk: Developers kept supply for "Team".\n', encoding="utf-8")
+    extracted = extract_kb_signatures(kb, exclude=["Team"])
+    assert [(s.pattern, s.category, s.severity) for s in extracted] == [("disabletrading()", "honeypot_scam", "high")]
+
+    signatures = tmp_path / "red_flags.toml"
+    signatures.write_text(
+        '[[signatures]]\ncategory = "rug_pull"\nseverity = "critical"\npatterns = ["Rug Pull", "team"]\n', encoding="utf-8")
+    scanner = RedFlagScanner(signatures, kb)
+    report = scanner.scan({
+        "description": "Steam-powered token. Owner can call disableTrading() at will.",
+        "news": "Analysts warn of a possible RUG\n  pull. Another rug pull rumour. Team says no.",
+    })
+    hits = {hit["pattern"]: hit for hit in report["hits"]}
+    assert set(hits) == {"rug pull", "team", "disabletrading()"}  # "steam" nem "team"
+    assert hits["rug pull"]["count"] == 2 and hits["rug pull"]["source"] == "news"
+    assert hits["disabletrading()"]["source"] == "description" and hits["disabletrading()"]["origin"] == "scams.txt"
+    news_weight = settings.RED_FLAG_SOURCE_WEIGHTS["news"]
+    assert report["critical"] == 0 and report["score"] == 2 * round(35 * news_weight) + 20  # Kritikus, de csak hírben
+    assert scanner.scan({"description": "A fair-launch community token.", "news": None})["count"] == 0
+
+    risk = RiskEngine.apply_red_flags({"quantitative_score": 90, "dimensions": {}}, report)
+    assert risk["ml_score"] == 90 and risk["quantitative_score"] == 100 and risk["red_flags"] is report
+
+    # A hírek tört súllyal és kritikus eszkaláció nélkül számítanak; a parse-kor vizsgált leírással összevonható
+    news_only = scanner.scan({"news": "Exchange warns of a rug pull copycat."})
+    assert news_only["hits"][0]["weight"] == round(35 * news_weight)
+    assert news_only["critical"] == 0
+    merged = RedFlagScanner.merge(scanner.scan({"description": "Owner can call disableTrading()."}), news_only, None)
+    assert merged["count"] == 2 and merged["score"] == 20 + news_only["score"]
+
+    # Blue-chip negatív eset a valódi szignatúrákkal: kulcskezelést említő leírás + hack hírek
+    bitcoin = MarketSnapshot.from_coin_payload({
+        "id": "bitcoin", "name": "Bitcoin", "market_cap_rank": 1,
+        "description": {"en": "Bitcoin is a peer-to-peer electronic cash system. Users hold a private key "
+                              "and back it up with a seed phrase; transactions are secured by proof of work."},
+    }, scan=RedFlagScanner().scan)
+    assert not hasattr(bitcoin, "description")
+    news = ("Major exchange hacked, hot wallet drained. Researchers disclose a new exploit in a bridge. "
+            "DeFi lender exploited for $10M.")
+    blue_chip = RedFlagScanner.merge(bitcoin.description_flags, RedFlagScanner().scan({"news": news}))
+    assert blue_chip["critical"] == 0 and blue_chip["score"] <= 10
+    assert RiskEngine.apply_red_flags({"quantitative_score": 10, "dimensions": {}}, blue_chip)["red_flag_penalty"] <= 2
+
+# Nagy felbontású ártörténet: évesítés a mintavételből, LTTB / min-max ritkítás a grafikonhoz
+def test_price_series_downsampling_and_annualization(tmp_path, monkeypatch):
+    import numpy as np
+    from config.settings import settings
+    from src.core.price_series import PriceSeries
+    from src.core.risk_engine import RiskEngine
+    from src.services.coingecko import CoinGeckoService
+    from src.utils.downsample import downsample, lttb_indices, minmax_indices
+
+    hour = 3_600_000
+    rng = np.random.default_rng(7)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 24 * 30 + 1)))
+    hourly = PriceSeries.from_market_chart({"prices": [[i * hour, p] for i, p in enumerate(prices)]}, "hourly")
+    daily = hourly[::24]
+    assert len(hourly) == 721 and round(hourly.span_days) == 30 and round(hourly.periods_per_year) == 8760
+    assert isinstance(daily, PriceSeries) and round(daily.periods_per_year) == 365 and daily[0] == prices[0]
+
+    spiky = hourly.prices.copy()
+    spiky[400] *= 1.5  # Kiugró kanóc, a ritkításnak meg kell tartania
+    for idx in (lttb_indices(hourly.timestamps, spiky, 100), minmax_indices(spiky, 100)):
+        assert len(idx) <= 101 and idx[0] == 0 and 400 in idx and np.all(np.diff(idx) > 0)
+    assert len(downsample(np.arange(50), np.arange(50), 100)[0]) == 50
+
+    # Ugyanaz a folyamat óránként és naponta mérve: az évesített volatilitás nagyságrendje egyezik
+    engine = RiskEngine(model_dir=tmp_path)
+    fine, coarse = engine.get_quant_finance_metrics(hourly), engine.get_quant_finance_metrics(daily)
+    assert fine["observations"] == 721 and fine["window_days"] == 30.0 and coarse["observations"] == 31
+    assert 0.5 < fine["annualized_volatility_pct"] / coarse["annualized_volatility_pct"] < 2
+    assert engine.get_quant_finance_metrics(list(daily))["window_days"] == 30.0  # Sima lista: napi adat
+
+    assert CoinGeckoService.history_window(365, "hourly") == (90, "hourly")
+    assert CoinGeckoService.history_window(30, "5m") == (1, "5m")
+    with pytest.raises(ValueError):
+        CoinGeckoService.history_window(30, "weekly")
+
+    monkeypatch.setattr(settings, "REPORT_DIR", tmp_path)
+    chart = ReportGenerator._create_price_chart(hourly, "testcoin")
+    assert chart and os.path.exists(chart)
+    assert ReportGenerator._create_price_chart(list(daily), "legacy") and ReportGenerator._create_price_chart([], "x") is None
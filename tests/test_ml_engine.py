@@ -0,0 +1,242 @@
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from src.ml_engine.model_registry import ModelRegistry
+
+FEATURES = ["a", "b"]
+
+def _tiny_model(seed: int):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(40, 2))
+    y = (X[:, 0] > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    return LogisticRegression().fit(scaler.transform(X), y), scaler
+
+# 1. Registry: verziózás, atomikus CURRENT mutató és rollback
+def test_model_registry_versions_and_rollback(tmp_path):
+    registry = ModelRegistry(tmp_path)
+
+    v1 = registry.register(*_tiny_model(1), metrics={"f1": 0.5}, feature_columns=FEATURES, training_time_s=0.1)
+    v2 = registry.register(*_tiny_model(2), metrics={"f1": 0.7}, feature_columns=FEATURES, training_time_s=0.2)
+
+    assert registry.current_version() == v2
+    assert [m["version"] for m in registry.list_versions()] == [v1, v2]
+    assert registry.get_meta(v1)["feature_schema_hash"] == registry.get_meta(v2)["feature_schema_hash"]
+
+    # A régi útvonalak (RiskEngine) is az aktív verziót tartalmazzák
+    assert (tmp_path / "rf_risk_model.pkl").exists()
+    assert (tmp_path / "scaler.pkl").exists()
+
+    assert registry.rollback() == v1
+    assert registry.current_version() == v1
+    _, _, meta = registry.load()
+    assert meta["metrics"]["f1"] == 0.5
+
+# 2. Inkrementális frissítés: csak az új partíció tanul, a fák száma nő
+def test_incremental_update_warm_start(tmp_path):
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+    from src.ml_engine.train_model import incremental_update
+
+    rng = np.random.default_rng(0)
+    def partition(n):
+        df = pd.DataFrame(rng.normal(size=(n, 2)), columns=FEATURES)
+        df["TARGET_RISK"] = (df["a"] > 0.5).astype(int)
+        df["id"] = [f"coin{i}" for i in range(n)]
+        return df
+
+    base = partition(200)
+    scaler = StandardScaler().fit(base[FEATURES])
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(scaler.transform(base[FEATURES]), base["TARGET_RISK"])
+    registry = ModelRegistry(tmp_path / "models")
+    parent = registry.register(model, scaler, metrics={}, feature_columns=FEATURES, training_time_s=0.0,
+                               extra={"families": ["random_forest"]})
+
+    snapshots = tmp_path / "snapshots"
+    snapshots.mkdir()
+    partition(100).to_csv(snapshots / "snapshot_20260101_000000.csv", index=False)
+
+    version = incremental_update(snapshot_dir=str(snapshots), registry=registry)
+    meta = registry.get_meta(version)
+    assert meta["parent_version"] == parent
+    assert meta["update_strategy"] == "warm_start"
+    assert meta["families"] == ["random_forest"]  # A későbbi teljes újratanítás is ebben keres
+    assert meta["trained_partitions"] == ["snapshot_20260101_000000.csv"]
+
+    updated, _, _ = registry.load(version)
+    assert len(updated.estimators_) > 10
+
+    # Második futás: nincs új partíció, nincs új verzió
+    assert incremental_update(snapshot_dir=str(snapshots), registry=registry) is None
+
+# Nem bővíthető család / erős drift: teljes újratanítás a partíciókból; a CSV-only tanítás nem jelöl partíciót
+def test_incremental_update_falls_back_to_full_retrain(tmp_path, monkeypatch):
+    import pandas as pd
+    from config.settings import settings
+    from src.ml_engine.train_model import incremental_update, train_and_evaluate
+
+    # Kicsi keresés: a teszt az útvonalat ellenőrzi, nem a modell minőségét
+    monkeypatch.setattr(settings, "TRAIN_N_JOBS", 1)
+    monkeypatch.setattr(settings, "TRAIN_SEARCH_ITERATIONS", 1)
+    monkeypatch.setattr(settings, "TRAIN_CV_FOLDS", 2)
+    rng = np.random.default_rng(5)
+    def partition(n, shift=0.0):
+        df = pd.DataFrame(rng.normal(loc=shift, size=(n, 2)), columns=FEATURES)
+        df["TARGET_RISK"] = (df["a"] > shift + 0.5).astype(int)
+        return df
+
+    snapshots = tmp_path / "snapshots"
+    snapshots.mkdir()
+    partition(120).to_csv(snapshots / "snapshot_20260101_000000.csv", index=False)
+    dataset = tmp_path / "dataset.csv"
+    partition(120).to_csv(dataset, index=False)
+
+    registry = ModelRegistry(tmp_path / "models")
+    base = train_and_evaluate(families=["logistic_regression"], dataset_path=str(dataset), registry=registry)
+    assert registry.get_meta(base)["trained_partitions"] == []
+
+    version = incremental_update(snapshot_dir=str(snapshots), registry=registry)
+    meta = registry.get_meta(version)
+    assert meta["update_strategy"] == "full_retrain" and "LogisticRegression" in meta["fallback_reason"]
+    assert meta["parent_version"] == base and meta["trained_partitions"] == ["snapshot_20260101_000000.csv"]
+    assert incremental_update(snapshot_dir=str(snapshots), registry=registry) is None
+
+    # Warm startolható modell, de az új partíció erősen eltolódott: szintén teljes újratanítás
+    from sklearn.ensemble import RandomForestClassifier
+    train = partition(200)
+    scaler = StandardScaler().fit(train[FEATURES])
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(scaler.transform(train[FEATURES]), train["TARGET_RISK"])
+    registry.register(forest, scaler, metrics={}, feature_columns=FEATURES, training_time_s=0.0,
+                      extra={"families": ["random_forest"], "trained_partitions": ["snapshot_20260101_000000.csv"]})
+    partition(120, shift=10.0).to_csv(snapshots / "snapshot_20260102_000000.csv", index=False)
+    meta = registry.get_meta(incremental_update(snapshot_dir=str(snapshots), registry=registry))
+    assert meta["update_strategy"] == "full_retrain" and meta["fallback_reason"].startswith("feature drift")
+    assert len(meta["trained_partitions"]) == 2
+
+# 3. Hot reload: új verzió validálás után élesedik, a hibás modellt elutasítja
+def test_risk_engine_hot_reload(tmp_path):
+    import pandas as pd
+    from src.core.risk_engine import RiskEngine, FEATURE_COLUMNS, SMOKE_BATCH
+
+    rng = np.random.default_rng(3)
+    def model_for(columns):
+        X = pd.DataFrame(rng.normal(size=(60, len(columns))), columns=columns)
+        y = (X.iloc[:, 0] > 0).astype(int)
+        scaler = StandardScaler().fit(X)
+        return LogisticRegression().fit(scaler.transform(X), y), scaler
+
+    registry = ModelRegistry(tmp_path)
+    v1 = registry.register(*model_for(FEATURE_COLUMNS), metrics={}, feature_columns=FEATURE_COLUMNS, training_time_s=0.0)
+    engine = RiskEngine(model_dir=tmp_path)
+    assert engine.model_version == v1
+    assert engine.reload_if_changed() is False
+
+    v2 = registry.register(*model_for(FEATURE_COLUMNS), metrics={}, feature_columns=FEATURE_COLUMNS, training_time_s=0.0)
+    assert engine.reload_if_changed() is True
+    assert engine.model_version == v2
+    assert engine.calculate_risk_metrics({"market_cap_rank": 5})["model_version"] == v2
+
+    # Rossz feature sémájú modell: a füstteszt elbukik, marad az előző verzió
+    bad = registry.register(*model_for(["x", "y"]), metrics={}, feature_columns=["x", "y"], training_time_s=0.0)
+    assert engine.reload_if_changed() is False
+    assert engine.model_version == v2
+
+    # Az elutasított verziót megjegyzi: a következő kör be sem tölti újra
+    from unittest.mock import patch
+    with patch.object(RiskEngine, "_load_bundle", side_effect=AssertionError("újratöltés")):
+        assert engine.reload_if_changed() is False
+
+    # Induláskor is fut a füstteszt: a hibás aktív verzió helyett a statikus algoritmus
+    assert RiskEngine(model_dir=tmp_path).ml_enabled is False and registry.current_version() == bad
+    assert len(engine.calculate_risk_batch([{}] * len(SMOKE_BATCH))) == len(SMOKE_BATCH)
+
+
+def test_backtest_forward_outcomes_and_threshold_lift(tmp_path):
+    import pandas as pd
+    from src.core.risk_engine import FEATURE_COLUMNS
+    from src.ml_engine.backtest import forward_outcomes, run_backtest
+
+    prices = np.array([[100.0], [90.0], [120.0], [60.0], [np.nan]])
+    out = forward_outcomes(prices, horizon=2)
+    assert np.allclose(out["fwd_return"][:3, 0], [0.2, -1 / 3, np.nan], equal_nan=True)
+    assert np.allclose(out["fwd_drawdown"][:2, 0], [-0.1, -1 / 3])
+
+    # Két coin 20 napon át: a "doomed" minden nap 10%-ot esik, a "stable" áll
+    for day in range(20):
+        frame = pd.DataFrame(0.0, index=range(2), columns=FEATURE_COLUMNS)
+        frame.insert(0, "id", ["stable", "doomed"])
+        frame["current_price"] = [100.0, 100.0 * 0.9 ** day]
+        frame["market_cap_rank"] = [1, 900]  # A pontozó ebből "tudja" a kockázatot
+        frame["snapshot_date"] = f"2026-01-{day + 1:02d}"
+        frame.to_csv(tmp_path / f"snapshot_202601{day + 1:02d}_000000.csv", index=False)
+
+    class RankScorer:
+        def score_features(self, features):
+            return np.where(features["market_cap_rank"] > 100, 95, 5), "rank"
+
+    result = run_backtest(tmp_path, horizon=5, crash_pct=30, thresholds=[90], vol_thresholds=[],
+                          period="all", risk_engine=RankScorer(), chunk_rows=7)
+    assert result["coin_days"] == 40 and result["evaluated"] == 30
+    row = result["report"].iloc[0]
+    assert (row["precision"], row["hit_rate"]) == (1.0, 1.0)
+    assert row["lift"] == 2.0 and row["ret_flagged"] < row["ret_other"]
+    assert result["in_sample_partitions"] == "unknown" and not result["heuristic_fallback"]
+
+    # Registry modell: a tanító partíciók nem kerülnek pontozásra (nincs in-sample szivárgás)
+    class RegistryScorer(RankScorer):
+        model_version, model_dir = None, tmp_path / "models"
+    registry = ModelRegistry(RegistryScorer.model_dir)
+    RegistryScorer.model_version = registry.register(
+        *_tiny_model(1), metrics={}, feature_columns=FEATURES, training_time_s=0.0,
+        extra={"trained_partitions": [f"snapshot_202601{day + 1:02d}_000000.csv" for day in range(10)]})
+    result = run_backtest(tmp_path, horizon=5, crash_pct=30, thresholds=[90], vol_thresholds=[],
+                          period="all", risk_engine=RegistryScorer())
+    assert result["scored_partitions"] == 10 and len(result["in_sample_partitions"]) == 10
+    assert result["coin_days"] == 20 and result["evaluated"] == 10
+    assert run_backtest(tmp_path, horizon=5, risk_engine=RegistryScorer(), include_trained=True)["coin_days"] == 40
+
+    # Modell nélkül a statikus heurisztika fut: ezt jelezni kell
+    from src.core.risk_engine import RiskEngine
+    result = run_backtest(tmp_path, horizon=5, risk_engine=RiskEngine(model_dir=tmp_path / "empty"))
+    assert result["heuristic_fallback"] and result["model_versions"] == []
+
+
+def test_risk_store_precomputed_scores_skip_inference(tmp_path, monkeypatch):
+    import asyncio
+    import time
+    from benchmarks.fakes import FixtureCoinGeckoService, load_fixture
+    from src.core.market_monitor import MarketMonitor
+    from src.core.pipeline import AnalysisPipeline
+    from src.core.risk_engine import RiskEngine
+    from src.core.risk_store import RiskStore
+
+    store = RiskStore(tmp_path / "risk.sqlite")
+    engine = RiskEngine(store=store)
+    if not engine.ml_enabled:
+        return  # A tábla csak ML modell mellett értelmes
+    pipeline = AnalysisPipeline(FixtureCoinGeckoService(), None, None, None, engine)
+    summary = asyncio.run(pipeline.precompute_risk(store, universe=100))
+    assert summary["written"] == summary["coins"] == len(load_fixture("markets.json"))
+
+    live = RiskEngine().calculate_risk_batch(list(load_fixture("coins.json").values()))
+    # Friss bejegyzések: a predikció nem fut, az eredmény megegyezik az élő pontozással
+    def no_inference(*args):
+        raise AssertionError("inferencia friss tábla mellett")
+    monkeypatch.setattr(RiskEngine, "_predict_scores", staticmethod(no_inference))
+    assert engine.calculate_risk_batch(list(load_fixture("coins.json").values())) == live
+
+    # Lejárt bejegyzés vagy más modell verzió: nincs találat
+    assert store.lookup(["bitcoin"], engine.model_version, max_age=-1) == {}
+    assert store.lookup(["bitcoin"], "other-version") == {}
+    store.write_batch([{"id": "bitcoin", "risk_score": 99}], engine.model_version, computed_at=time.time() + 1)
+    assert store.lookup(["bitcoin", "nope"], engine.model_version) == {"bitcoin": 99}
+    assert [h["risk_score"] for h in store.history("bitcoin")][0] == 99
+
+    # A watch élő pontozást kér (use_store=False): a legfeljebb RISK_TABLE_MAX_AGE régi tábla kimarad
+    monkeypatch.undo()
+    cached, live_monitor = (MarketMonitor(FixtureCoinGeckoService(), engine, ["bitcoin"], use_store=use)
+                            for use in (True, False))
+    asyncio.run(cached.refresh())
+    asyncio.run(live_monitor.refresh())
+    assert cached.rows["bitcoin"]["risk_score"] == 99 != live_monitor.rows["bitcoin"]["risk_score"]
+    assert store.prune(retention_days=-1) == len(load_fixture("markets.json")) + 1